@@ -0,0 +1,127 @@
+"""
+Benchmark de los ACKs demorados del receptor de GBN (DelayedAck en lib/protocol/ack.py)
+
+Por cada valor de --every levanta el servidor de este árbol con ese -k (la política de los uploads)
+y, entre el cliente y el servidor, un relay UDP que cuenta los paquetes de cada sentido (y pierde
+--loss de ellos, con una semilla fija). Sube y baja el mismo archivo con el cliente de línea de
+comandos (el download con el mismo -k) y mide la duración y los paquetes que viajan en el sentido
+de los ACKs: hacia el cliente en el upload, hacia el servidor en el download.
+
+Uso:
+    python3 metricas/benchmark_acks.py --size 10 --every 1 2 4 --loss 0.01
+"""
+import argparse
+import os
+import random
+import selectors
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVER_DIR = os.path.join(REPO_ROOT, "src", "lib", "server")
+CLIENT_DIR = os.path.join(REPO_ROOT, "src", "lib", "client")
+
+
+class CountingLink:
+    """
+    Relay UDP entre los clientes y el servidor que cuenta los paquetes de cada sentido
+    """
+
+    def __init__(self, port, server_port, loss, seed):
+        self.server_addr = ("127.0.0.1", server_port)
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.front = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.front.bind(("127.0.0.1", port))
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.front, selectors.EVENT_READ, None)
+        self.upstream = {}          # dirección del cliente -> socket hacia el servidor
+        self.counts = {"up": 0, "down": 0}
+        self.running = True
+
+    def _forward(self, direction, pkg, sock, addr):
+        self.counts[direction] += 1
+        if self.loss and self.rng.random() < self.loss:
+            return
+        sock.sendto(pkg, addr)
+
+    def run(self):
+        while self.running:
+            for key, _ in self.selector.select(0.1):
+                pkg, addr = key.fileobj.recvfrom(65535)
+                if key.fileobj is self.front:
+                    sock = self.upstream.get(addr)
+                    if sock is None:
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                        sock.bind(("127.0.0.1", 0))
+                        self.upstream[addr] = sock
+                        self.selector.register(sock, selectors.EVENT_READ, addr)
+                    self._forward("up", pkg, sock, self.server_addr)
+                else:
+                    self._forward("down", pkg, self.front, key.data)
+
+
+def client(args, link, direction, command, *argv):
+    cmd = [sys.executable, "client.py", command, "-H", "127.0.0.1", "-p", str(args.port + 1), "-r", "GBN", "-q"]
+    before = link.counts[direction]
+    start = time.perf_counter()
+    subprocess.run(cmd + list(argv), cwd=CLIENT_DIR, capture_output=True, timeout=600)
+    return time.perf_counter() - start, link.counts[direction] - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los ACKs demorados de GBN")
+    parser.add_argument("--size", type=int, default=10, help="tamaño del archivo en MB")
+    parser.add_argument("--every", type=int, nargs="+", default=[1, 2, 4], help="paquetes en orden por ACK a comparar")
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilidad de perder cada paquete")
+    parser.add_argument("--runs", type=int, default=3, help="repeticiones de cada caso")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de las pérdidas")
+    parser.add_argument("--port", type=int, default=5093, help="puerto del servidor (el relay usa el siguiente)")
+    args = parser.parse_args()
+
+    link = CountingLink(args.port + 1, args.port, args.loss, args.seed)
+    relay = threading.Thread(target=link.run, daemon=True)
+    relay.start()
+    name = "bench_acks.bin"
+    tmp = tempfile.mkdtemp(prefix="bench-acks-")
+    src, dst = os.path.join(tmp, "src.bin"), os.path.join(tmp, "dst.bin")
+    try:
+        with open(src, "wb") as f:
+            f.write(os.urandom(args.size * 1024 * 1024))
+        print(f"{args.size} MB con GBN, {args.loss:.0%} de pérdida")
+        for every in args.every:
+            server = subprocess.Popen([sys.executable, "server.py", "start-server", "-H", "127.0.0.1", "-p",
+                                       str(args.port), "-q", "-k", str(every)], cwd=SERVER_DIR,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            time.sleep(1.0)
+            try:
+                ups, downs = [], []
+                for _ in range(args.runs):
+                    ups.append(client(args, link, "down", "upload", "-s", src, "-n", name))
+                    if os.path.exists(dst):
+                        os.remove(dst)
+                    downs.append(client(args, link, "up", "download", "-n", name, "-d", dst, "-k", str(every)))
+                    with open(src, "rb") as a, open(dst, "rb") as b:
+                        assert a.read() == b.read(), "el archivo bajado no coincide"
+            finally:
+                server.terminate()
+                server.wait()
+            up_time, up_acks = min(ups)
+            down_time, down_acks = min(downs)
+            print(f"  -k {every}: upload {up_time:.2f}s ({up_acks} paquetes hacia el cliente), "
+                  f"download {down_time:.2f}s ({down_acks} paquetes hacia el servidor)")
+    finally:
+        link.running = False
+        relay.join()
+        for path in (src, dst, os.path.join(SERVER_DIR, "storage", name)):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark de la escritura del receptor (ArchiveRecv.write_data) en storage/
+
+Escribe un archivo como lo hace el receptor, de a un paquete de datos por vez, y mide el throughput
+hasta que el archivo queda cerrado:
+- antes: write + flush por paquete (la versión anterior, copiada acá abajo)
+- diferida: bloques de WRITE_BLOCK_SIZE escritos en el mismo hilo
+- diferida en segundo plano: los bloques los escribe el hilo de escritura
+Las versiones nuevas incluyen el fsync del cierre (la anterior no lo hacía), que se informa aparte.
+
+Uso:
+    python3 metricas/benchmark_archive_recv.py --size 50 --payload 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from lib.protocol.archive import ArchiveRecv, partial_marker
+
+STORAGE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "lib", "server", "storage"))
+
+
+class LegacyArchiveRecv:
+    """
+    Escritura de ArchiveRecv antes del cambio
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.archivo = open(path, "wb")
+
+    def write_data(self, data):
+        self.archivo.write(data)
+        self.archivo.flush()
+
+    def close(self):
+        self.archivo.close()
+
+
+def run(arch, payloads, n_pkgs):
+    backlog = getattr(arch, "write_backlog", None)
+    start = time.perf_counter()
+    for i in range(n_pkgs):
+        arch.write_data(payloads[i % len(payloads)])
+        if backlog is not None:
+            # Como el servidor (que lo espera sin bloquear su loop): a lo sumo WRITE_BEHIND_MAX_PENDING bloques
+            future = backlog()
+            while future is not None:
+                future.result()
+                future = backlog()
+    middle = time.perf_counter()
+    arch.close()
+    end = time.perf_counter()
+    return end - start, end - middle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de throughput de escritura del receptor")
+    parser.add_argument("--size", type=int, default=50, help="tamaño del archivo en MB")
+    parser.add_argument("--payload", type=int, default=1000, help="bytes de datos por paquete")
+    args = parser.parse_args()
+
+    # Los datos llegan como memoryviews sobre los paquetes recibidos
+    payloads = [memoryview(os.urandom(args.payload + 7))[7:] for _ in range(64)]
+    n_pkgs = args.size * 1024 * 1024 // args.payload
+    mb = n_pkgs * args.payload / 1024 / 1024
+    path = os.path.join(STORAGE, "bench_archive_recv.bin")
+
+    print(f"{mb:.0f} MB en paquetes de {args.payload} bytes hacia {STORAGE}")
+    for name, make in (("antes (flush por paquete)", lambda: LegacyArchiveRecv(path)),
+                       ("diferida", lambda: ArchiveRecv(path)),
+                       ("diferida en segundo plano", lambda: ArchiveRecv(path, background=True))):
+        elapsed, closing = run(make(), payloads, n_pkgs)
+        print(f"  {name}: {elapsed:.3f}s -> {mb / elapsed:.0f} MB/s (cierre/fsync {closing * 1000:.1f} ms)")
+    os.remove(path)
+    os.remove(partial_marker(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark del armado de paquetes del emisor (ArchiveSender) y de la memoria de la ventana
+
+Mide, en un solo core y sin red:
+- paquetes por segundo armando todos los paquetes de un archivo: la versión anterior (header +
+  datos concatenados y un print por paquete, copiada acá abajo) contra la actual (mmap)
+- paquetes por segundo rearmando paquetes ya enviados (lo que hace un reenvío)
+- memoria que retiene un GoBackNSender con una ventana llena de paquetes en vuelo, contra los
+  datos de esos paquetes (lo que retenía antes, cuando guardaba una copia de cada uno)
+El print de la versión anterior va a /dev/null: en una terminal cuesta bastante más.
+
+Uso:
+    python3 metricas/benchmark_archive_sender.py --size 50 --payload 1000 --window 1024
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from lib.protocol.archive import ArchiveSender
+from lib.protocol.congestion import RenoController
+from lib.protocol.go_back_n import GoBackNSender
+from lib.protocol.rtt import RttEstimator
+
+
+class LegacyArchiveSender:
+    """
+    ArchiveSender antes del cambio (sólo lo necesario para armar paquetes)
+    """
+
+    def __init__(self, path, chunk_size):
+        self.archivo = open(path, "rb")
+        self.chunk_size = chunk_size
+
+    def next_pkg_go_back_n(self, seq_num=0):
+        data = self.archivo.read(self.chunk_size)
+        if not data:
+            return None, None
+        pkg_id = seq_num.to_bytes(4, "big")
+        header = (0).to_bytes(1, "big")
+        header += len(data).to_bytes(2, "big")
+        header += pkg_id
+        pkg = header + data
+        print(f"next_pkg_go_back_n: flag_end=0, seq_num={seq_num}, pkg_id={int.from_bytes(pkg_id, 'big')}")
+        return pkg, pkg_id
+
+    def close(self):
+        self.archivo.close()
+
+
+def run(arch):
+    n_pkgs = 0
+    seq_num = 3
+    start = time.perf_counter()
+    while True:
+        pkg, _ = arch.next_pkg_go_back_n(seq_num)
+        if pkg is None:
+            break
+        n_pkgs += 1
+        seq_num += 1
+    elapsed = time.perf_counter() - start
+    return n_pkgs, elapsed
+
+
+def run_rebuild(arch, n_pkgs):
+    pkg_ids = [random.randrange(3, 3 + n_pkgs) for _ in range(n_pkgs)]
+    start = time.perf_counter()
+    for pkg_id in pkg_ids:
+        arch.pkg(pkg_id)
+    return n_pkgs, time.perf_counter() - start
+
+
+def window_memory(path, payload, window):
+    """
+    Bytes que quedan retenidos con una ventana llena de paquetes en vuelo
+    """
+    arch = ArchiveSender(path, payload)
+    sender = GoBackNSender(arch, window, RttEstimator(1.0), RenoController(window, window))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    pkgs = sender.next_packets(0.0)
+    n_pkgs = len(pkgs)
+    del pkgs  # ya enviados
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    arch.close()
+    return n_pkgs, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de paquetes/s del emisor y memoria de la ventana")
+    parser.add_argument("--size", type=int, default=50, help="tamaño del archivo en MB")
+    parser.add_argument("--payload", type=int, default=1000, help="bytes de datos por paquete")
+    parser.add_argument("--window", type=int, default=1024, help="paquetes en vuelo para medir memoria")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(os.urandom(args.size * 1024 * 1024))
+        path = f.name
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            legacy = LegacyArchiveSender(path, args.payload)
+            before = run(legacy)
+            legacy.close()
+            arch = ArchiveSender(path, args.payload)
+            after = run(arch)
+            rebuild = run_rebuild(arch, after[0])
+            arch.close()
+            n_window, retained = window_memory(path, args.payload, args.window)
+    finally:
+        os.remove(path)
+
+    print(f"Archivo de {args.size} MB, {args.payload} bytes por paquete")
+    for name, (n_pkgs, elapsed) in (("antes", before), ("ahora", after), ("reenvíos (rearmados)", rebuild)):
+        print(f"  {name}: {n_pkgs} paquetes en {elapsed:.3f}s -> {n_pkgs / elapsed / 1000:.0f}k paquetes/s")
+    print(f"  ventana de {n_window} paquetes en vuelo: {retained / 1024:.0f} KB retenidos "
+          f"(copias de los paquetes: {n_window * (args.payload + 7) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
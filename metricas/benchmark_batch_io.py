@@ -0,0 +1,93 @@
+"""
+Benchmark del I/O en lotes (lib/protocol/batch_io.py) contra un sendto/recvfrom por paquete
+
+Envía ráfagas de paquetes de datos (1007 bytes, como los del protocolo) por loopback y mide
+paquetes por segundo y syscalls por paquete, del lado emisor y del receptor.
+
+Uso:
+    python3 metricas/benchmark_batch_io.py --pkgs 200000 --burst 64
+"""
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from lib.protocol.batch_io import BatchSocket
+
+PKG_SIZE = 1007
+
+
+def make_sockets():
+    recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+    recv_sock.bind(("127.0.0.1", 0))
+    send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    return send_sock, recv_sock
+
+
+def run_plain(n_pkgs, burst):
+    send_sock, recv_sock = make_sockets()
+    addr = recv_sock.getsockname()
+    pkgs = [os.urandom(PKG_SIZE) for _ in range(burst)]
+    send_time = recv_time = 0.0
+    send_calls = recv_calls = 0
+    for _ in range(n_pkgs // burst):
+        start = time.perf_counter()
+        for pkg in pkgs:
+            send_sock.sendto(pkg, addr)
+            send_calls += 1
+        middle = time.perf_counter()
+        for _ in range(burst):
+            recv_sock.recvfrom(2048)
+            recv_calls += 1
+        recv_time += time.perf_counter() - middle
+        send_time += middle - start
+    return send_time, recv_time, send_calls, recv_calls
+
+
+def run_batch(n_pkgs, burst):
+    send_sock, recv_sock = make_sockets()
+    addr = recv_sock.getsockname()
+    sender = BatchSocket(send_sock)
+    receiver = BatchSocket(recv_sock, gro=True)
+    pkgs = [os.urandom(PKG_SIZE) for _ in range(burst)]
+    send_time = recv_time = 0.0
+    recv_calls = 0
+    for _ in range(n_pkgs // burst):
+        start = time.perf_counter()
+        sender.send_many(pkgs, addr)
+        middle = time.perf_counter()
+        received = 0
+        while received < burst:
+            got, _ = receiver.recv_many()
+            received += len(got)
+            recv_calls += 1
+        recv_time += time.perf_counter() - middle
+        send_time += middle - start
+    send_calls = (n_pkgs // burst) * (1 if BatchSocket.gso_supported else burst)
+    return send_time, recv_time, send_calls, recv_calls, receiver.gro
+
+
+def report(name, n_pkgs, send_time, recv_time, send_calls, recv_calls):
+    print(f"{name}:")
+    print(f"  envío:     {n_pkgs / send_time:>12,.0f} paquetes/s, {send_calls / n_pkgs:.3f} syscalls/paquete")
+    print(f"  recepción: {n_pkgs / recv_time:>12,.0f} paquetes/s, {recv_calls / n_pkgs:.3f} syscalls/paquete")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de I/O en lotes (GSO/GRO) vs un syscall por paquete")
+    parser.add_argument("--pkgs", type=int, default=200000, help="paquetes a enviar")
+    parser.add_argument("--burst", type=int, default=64, help="paquetes por ráfaga (ventana)")
+    args = parser.parse_args()
+    n_pkgs = args.pkgs - args.pkgs % args.burst
+
+    report("sendto/recvfrom por paquete", n_pkgs, *run_plain(n_pkgs, args.burst))
+    send_time, recv_time, send_calls, recv_calls, gro = run_batch(n_pkgs, args.burst)
+    report(f"BatchSocket (GSO={'sí' if BatchSocket.gso_supported else 'no'}, GRO={'sí' if gro else 'no'})",
+           n_pkgs, send_time, recv_time, send_calls, recv_calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark de la transferencia de muchos archivos chicos: una sesión por archivo contra un bundle
+
+Arma un directorio con N archivos chicos, levanta el servidor de este árbol y sube los archivos de
+dos formas con el cliente (FileTransferInterface, en el mismo proceso):
+- uno por uno: un socket, un handshake y una sesión por archivo
+- en un bundle: el directorio entero en una sola sesión (upload -s directorio)
+Después baja el directorio en un bundle. No incluye el arranque del intérprete, que con el cliente
+de línea de comandos se paga además una vez por archivo.
+
+Uso:
+    python3 metricas/benchmark_bundle.py --files 1000 --size 2000 --protocol SR
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(REPO_ROOT, "src"))
+from lib.client.client import FileTransferInterface
+from lib.protocol.utils import create_upload_parser, create_download_parser
+
+SERVER_DIR = os.path.join(REPO_ROOT, "src", "lib", "server")
+STORAGE = os.path.join(SERVER_DIR, "storage")
+
+
+def timed(method, parser, argv):
+    # Sin los mensajes del cliente, que se repiten por cada archivo
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        method(parser.parse_args(argv))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de muchos archivos chicos en una sesión")
+    parser.add_argument("--files", type=int, default=1000, help="cantidad de archivos")
+    parser.add_argument("--size", type=int, default=2000, help="tamaño máximo de cada archivo en bytes")
+    parser.add_argument("--protocol", default="SR", help="SW, GBN o SR")
+    parser.add_argument("--port", type=int, default=5099, help="puerto del servidor")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    common = ["-H", "127.0.0.1", "-p", str(args.port), "-r", args.protocol, "-q"]
+    upload_parser, download_parser = create_upload_parser(), create_download_parser()
+    server = subprocess.Popen([sys.executable, "server.py", "start-server", "-H", "127.0.0.1", "-p", str(args.port),
+                               "-q"], cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    tmp = tempfile.mkdtemp(prefix="bench-bundle-")
+    try:
+        src = os.path.join(tmp, "src")
+        os.makedirs(src)
+        total = 0
+        for i in range(args.files):
+            data = rng.randbytes(rng.randint(1, args.size))
+            total += len(data)
+            with open(os.path.join(src, f"f{i:05d}.bin"), "wb") as f:
+                f.write(data)
+        print(f"{args.files} archivos, {total} bytes, {args.protocol}")
+
+        client = FileTransferInterface()
+        elapsed = 0.0
+        for name in sorted(os.listdir(src)):
+            elapsed += timed(client.upload_file, upload_parser,
+                             ["-s", os.path.join(src, name), "-n", f"bench_bundle_{name}"] + common)
+        print(f"  uno por uno: {elapsed:.2f}s -> {args.files / elapsed:.0f} archivos/s")
+
+        elapsed = timed(client.upload_file, upload_parser, ["-s", src, "-n", "bench_bundle"] + common)
+        print(f"  bundle (upload): {elapsed:.2f}s -> {args.files / elapsed:.0f} archivos/s")
+
+        dst = os.path.join(tmp, "dst")
+        elapsed = timed(client.download_file, download_parser, ["-n", "bench_bundle", "-d", dst] + common)
+        print(f"  bundle (download): {elapsed:.2f}s -> {args.files / elapsed:.0f} archivos/s")
+        assert not filecmp.dircmp(src, dst).diff_files and len(os.listdir(dst)) == args.files
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(tmp)
+        shutil.rmtree(os.path.join(STORAGE, "bench_bundle"), ignore_errors=True)
+        for name in os.listdir(STORAGE):
+            if name.startswith("bench_bundle_"):
+                os.remove(os.path.join(STORAGE, name))
+
+
+if __name__ == "__main__":
+    main()
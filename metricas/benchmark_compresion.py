@@ -0,0 +1,99 @@
+"""
+Benchmark de la compresión de los paquetes (lib/protocol/compression.py), sin red
+
+Arma los paquetes de un archivo como el emisor (ArchiveSender) con cada códec y sin comprimir, y mide
+cuántos paquetes hacen falta, cuánto tiempo de CPU lleva armarlos y descomprimirlos, y cuánto se
+achican los datos. Por defecto compara un log de texto generado y datos al azar (incompresibles: el
+emisor debería dejar de comprimir enseguida).
+
+Uso:
+    python3 metricas/benchmark_compresion.py --size 20 --payload 1000
+    python3 metricas/benchmark_compresion.py --src archivo.log
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from lib.constants import FIRST_DATA_PKG_ID
+from lib.protocol.archive import ArchiveSender, ArchiveRecv
+from lib.protocol.compression import available_codecs
+
+
+def make_log(size, rng):
+    lines = []
+    total = 0
+    while total < size:
+        line = (f"2026-10-18 12:{rng.randrange(60):02d}:{rng.randrange(60):02d} "
+                f"[{rng.choice(['INFO', 'DEBUG', 'WARNING'])}] worker-{rng.randrange(8)} request id={rng.randrange(10**6)} "
+                f"path=/api/v1/{rng.choice(['users', 'files', 'items'])} status={rng.choice([200, 404, 500])} "
+                f"took={rng.random() * 100:.2f}ms\n")
+        lines.append(line)
+        total += len(line)
+    return "".join(lines).encode()[:size]
+
+
+def run(path, payload, codec, out):
+    """
+    Returns:
+        tuple: (paquetes, bytes de los paquetes, segundos del emisor, segundos del receptor)
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        arch = ArchiveSender(path, payload, codec=codec)
+    pkgs = []
+    start = time.perf_counter()
+    seq = FIRST_DATA_PKG_ID
+    while True:
+        pkg, _ = arch.next_pkg_go_back_n(seq)
+        if pkg is None:
+            break
+        pkgs.append(pkg)
+        seq += 1
+    sending = time.perf_counter() - start
+    arch.close()
+
+    recv = ArchiveRecv(out, codec=codec)    # sólo desempaqueta, no escribe
+    start = time.perf_counter()
+    for pkg in pkgs:
+        recv.recv_pckg_go_back_n(pkg)
+    receiving = time.perf_counter() - start
+    recv.close(sync=False, complete=True)
+    return len(pkgs), sum(len(p) for p in pkgs), sending, receiving
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la compresión de los paquetes")
+    parser.add_argument("--src", help="archivo a comprimir (por defecto un log generado y datos al azar)")
+    parser.add_argument("--size", type=int, default=20, help="tamaño de los archivos generados en MB")
+    parser.add_argument("--payload", type=int, default=1000, help="bytes de datos por paquete")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.src:
+            sources = [(os.path.basename(args.src), args.src)]
+        else:
+            sources = []
+            for name, data in (("log", make_log(args.size * 1024 * 1024, rng)),
+                               ("al azar", rng.randbytes(args.size * 1024 * 1024))):
+                path = os.path.join(tmp, name.replace(" ", "_"))
+                with open(path, "wb") as f:
+                    f.write(data)
+                sources.append((name, path))
+
+        for name, path in sources:
+            size = os.path.getsize(path)
+            print(f"{name}: {size / 1024 / 1024:.1f} MB en paquetes de {args.payload} bytes")
+            for codec in (None,) + available_codecs():
+                n_pkgs, sent, sending, receiving = run(path, args.payload, codec, os.path.join(tmp, "recibido"))
+                print(f"  {codec or 'sin comprimir':13}: {n_pkgs:7} paquetes, {sent / size:6.1%} de los bytes, "
+                      f"emisor {sending:.3f}s ({size / sending / 1024 / 1024:.0f} MB/s), "
+                      f"receptor {receiving:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
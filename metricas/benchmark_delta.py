@@ -0,0 +1,79 @@
+"""
+Benchmark del upload delta (lib/protocol/delta.py), sin red
+
+Arma un archivo al azar y una versión modificada (bloques sobrescritos, bytes insertados y borrados
+en lugares al azar) y mide cada paso: las firmas del servidor, las diferencias del cliente y el
+rearmado del servidor. Compara lo que viajaría (firmas + diferencias) con el archivo entero.
+
+Uso:
+    python3 metricas/benchmark_delta.py --size 50 --changed 0.02
+"""
+import argparse
+import filecmp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from lib.protocol.delta import file_signatures, compute_delta, apply_delta
+
+
+def modify(data, changed, rng):
+    """
+    Cambia cerca de changed * len(data) bytes en tramos de hasta 4 KB: un tercio sobrescritos, un
+    tercio insertados y un tercio borrados
+    """
+    data = bytearray(data)
+    remaining = int(len(data) * changed)
+    while remaining > 0:
+        length = min(remaining, rng.randint(1, 4096))
+        pos = rng.randrange(max(len(data) - length, 1))
+        kind = rng.randrange(3)
+        if kind == 0:
+            data[pos:pos + length] = rng.randbytes(length)
+        elif kind == 1:
+            data[pos:pos] = rng.randbytes(length)
+        else:
+            del data[pos:pos + length]
+        remaining -= length
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del upload delta")
+    parser.add_argument("--size", type=int, default=50, help="tamaño del archivo en MB")
+    parser.add_argument("--changed", type=float, nargs="+", default=[0.001, 0.02, 0.2],
+                        help="fracción del archivo que cambia")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    original = rng.randbytes(args.size * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        base, new, delta, out = (os.path.join(tmp, n) for n in ("base", "new", "delta", "out"))
+        with open(base, "wb") as f:
+            f.write(original)
+
+        start = time.perf_counter()
+        signatures = file_signatures(base)
+        signing = time.perf_counter() - start
+        print(f"{args.size} MB: firmas {len(signatures)} bytes en {signing:.3f}s")
+
+        for changed in args.changed:
+            with open(new, "wb") as f:
+                f.write(modify(original, changed, rng))
+            start = time.perf_counter()
+            literal, copied = compute_delta(new, signatures, delta)
+            middle = time.perf_counter()
+            apply_delta(base, delta, out)
+            end = time.perf_counter()
+            assert filecmp.cmp(new, out, shallow=False)
+            sent = len(signatures) + os.path.getsize(delta)
+            print(f"  {changed:6.1%} cambiado: diferencias {middle - start:.3f}s, rearmado {end - middle:.3f}s, "
+                  f"{literal} bytes nuevos y {copied} reusados -> viajan {sent} bytes "
+                  f"({sent / os.path.getsize(new):.1%} del archivo)")
+
+
+if __name__ == "__main__":
+    main()
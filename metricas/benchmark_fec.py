@@ -0,0 +1,142 @@
+"""
+Benchmark de la corrección de errores (lib/protocol/fec.py) en un enlace con pérdidas
+
+Levanta el servidor de este árbol y, entre el cliente y el servidor, un relay UDP que descarta cada
+paquete con probabilidad --loss en ambos sentidos (con una semilla fija, así los casos ven la misma
+secuencia de pérdidas) y le agrega --delay ms de retardo. Sube y baja el mismo archivo con el
+cliente de línea de comandos, sin FEC y con cada configuración de --fec, y mide la duración y los
+paquetes retransmitidos de los uploads.
+
+Uso:
+    python3 metricas/benchmark_fec.py --size 2 --loss 0.1 --delay 5 --protocol SR --fec 8:2 8:4
+"""
+import argparse
+import heapq
+import os
+import random
+import re
+import selectors
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVER_DIR = os.path.join(REPO_ROOT, "src", "lib", "server")
+CLIENT_DIR = os.path.join(REPO_ROOT, "src", "lib", "client")
+
+
+class LossyLink:
+    """
+    Relay UDP entre los clientes y el servidor que pierde paquetes al azar en cada sentido
+    """
+
+    def __init__(self, port, server_port, loss, delay, seed):
+        self.server_addr = ("127.0.0.1", server_port)
+        self.loss = loss
+        self.delay = delay / 1000
+        self.rng = random.Random(seed)
+        self.front = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.front.bind(("127.0.0.1", port))
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.front, selectors.EVENT_READ, None)
+        self.upstream = {}          # dirección del cliente -> socket hacia el servidor
+        self.deliveries = []        # heap de (entrega, n, socket, paquete, destino)
+        self.count = 0
+        self.drops = 0
+        self.running = True
+
+    def _forward(self, now, pkg, sock, addr):
+        if self.rng.random() < self.loss:
+            self.drops += 1
+            return
+        self.count += 1
+        heapq.heappush(self.deliveries, (now + self.delay, self.count, sock, pkg, addr))
+
+    def run(self):
+        while self.running:
+            now = time.time()
+            while self.deliveries and self.deliveries[0][0] <= now:
+                _, _, sock, pkg, addr = heapq.heappop(self.deliveries)
+                sock.sendto(pkg, addr)
+            timeout = max(self.deliveries[0][0] - now, 0) if self.deliveries else 0.1
+            for key, _ in self.selector.select(timeout):
+                pkg, addr = key.fileobj.recvfrom(65535)
+                now = time.time()
+                if key.fileobj is self.front:
+                    sock = self.upstream.get(addr)
+                    if sock is None:
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                        sock.bind(("127.0.0.1", 0))
+                        self.upstream[addr] = sock
+                        self.selector.register(sock, selectors.EVENT_READ, addr)
+                    self._forward(now, pkg, sock, self.server_addr)
+                else:
+                    self._forward(now, pkg, self.front, key.data)
+
+
+def client(args, command, fec, *argv):
+    cmd = [sys.executable, "client.py", command, "-H", "127.0.0.1", "-p", str(args.port + 1), "-r", args.protocol]
+    if fec is not None:
+        cmd += ["-F", fec]
+    start = time.perf_counter()
+    output = subprocess.run(cmd + list(argv), cwd=CLIENT_DIR, capture_output=True, text=True, timeout=600)
+    elapsed = time.perf_counter() - start
+    match = re.search(r"pkgs_retransmitted=(\d+)", output.stderr + output.stdout)
+    return elapsed, int(match.group(1)) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de FEC en un enlace con pérdidas")
+    parser.add_argument("--size", type=int, default=2, help="tamaño del archivo en MB")
+    parser.add_argument("--loss", type=float, default=0.1, help="probabilidad de perder cada paquete")
+    parser.add_argument("--delay", type=float, default=5, help="retardo en cada sentido en ms")
+    parser.add_argument("--protocol", default="SR", help="GBN o SR")
+    parser.add_argument("--fec", nargs="+", default=["8:2"], help="configuraciones K:M a comparar")
+    parser.add_argument("--runs", type=int, default=3, help="repeticiones de cada caso")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de las pérdidas")
+    parser.add_argument("--port", type=int, default=5095, help="puerto del servidor (el relay usa el siguiente)")
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "server.py", "start-server", "-H", "127.0.0.1", "-p", str(args.port),
+                               "-q"], cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    link = LossyLink(args.port + 1, args.port, args.loss, args.delay, args.seed)
+    relay = threading.Thread(target=link.run, daemon=True)
+    relay.start()
+    time.sleep(1.0)
+    name = "bench_fec.bin"
+    tmp = tempfile.mkdtemp(prefix="bench-fec-")
+    src, dst = os.path.join(tmp, "src.bin"), os.path.join(tmp, "dst.bin")
+    try:
+        with open(src, "wb") as f:
+            f.write(os.urandom(args.size * 1024 * 1024))
+        print(f"{args.size} MB con {args.protocol}: {args.loss:.0%} de pérdida por sentido, {args.delay} ms por sentido")
+        for fec in [None] + args.fec:
+            ups, downs, retransmitted = [], [], []
+            for _ in range(args.runs):
+                elapsed, rtx = client(args, "upload", fec, "-s", src, "-n", name)
+                ups.append(elapsed)
+                retransmitted.append(rtx)
+                if os.path.exists(dst):
+                    os.remove(dst)
+                downs.append(client(args, "download", fec, "-n", name, "-d", dst, "-q")[0])
+                with open(src, "rb") as a, open(dst, "rb") as b:
+                    assert a.read() == b.read(), "el archivo bajado no coincide"
+            print(f"  {'sin FEC' if fec is None else 'FEC ' + fec:8}: upload {min(ups):.2f}s "
+                  f"(mediana {sorted(ups)[len(ups) // 2]:.2f}s, retransmitidos {retransmitted}), "
+                  f"download {min(downs):.2f}s (mediana {sorted(downs)[len(downs) // 2]:.2f}s)")
+    finally:
+        link.running = False
+        relay.join()
+        server.terminate()
+        server.wait()
+        for path in (src, dst, os.path.join(SERVER_DIR, "storage", name)):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark del pacing del emisor (lib/protocol/pacing.py) detrás de un cuello de botella
+
+Levanta el servidor de este árbol y, entre el cliente y el servidor, un enlace emulado como los
+TCLink de mininet: en cada sentido una cola drop-tail de --queue paquetes que se vacía a --rate
+Mbit/s, más --delay ms de retardo. Sube y baja el mismo archivo con el cliente de línea de comandos,
+con y sin pacing (-t auto / -t off), y mide la duración, los paquetes retransmitidos de los uploads
+y los paquetes que descartó la cola. Con una cola chica las ráfagas de una ventana entera la llenan
+y las pérdidas hacen que GBN reenvíe la ventana completa.
+
+Uso:
+    python3 metricas/benchmark_pacing.py --size 3 --rate 20 --queue 8 --delay 20 --protocol GBN
+"""
+import argparse
+import heapq
+import os
+import re
+import selectors
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVER_DIR = os.path.join(REPO_ROOT, "src", "lib", "server")
+CLIENT_DIR = os.path.join(REPO_ROOT, "src", "lib", "client")
+IP_UDP_HEADERS = 28
+
+
+class BottleneckLink:
+    """
+    Relay UDP entre los clientes y el servidor con un cuello de botella en cada sentido
+    """
+
+    def __init__(self, port, server_port, rate, queue, delay):
+        self.server_addr = ("127.0.0.1", server_port)
+        self.rate = rate * 1e6 / 8
+        self.queue = queue
+        self.delay = delay / 1000
+        self.front = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.front.bind(("127.0.0.1", port))
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.front, selectors.EVENT_READ, None)
+        self.upstream = {}          # dirección del cliente -> socket hacia el servidor
+        self.links = {}             # sentido -> [fin de la cola, salidas de los paquetes en cola]
+        self.deliveries = []        # heap de (entrega, n, socket, paquete, destino)
+        self.count = 0
+        self.drops = 0
+        self.running = True
+
+    def _enqueue(self, direction, now, pkg, sock, addr):
+        busy_until, departures = self.links.setdefault(direction, [0.0, []])
+        while departures and departures[0] <= now:
+            departures.pop(0)
+        if len(departures) >= self.queue:
+            self.drops += 1
+            return
+        departure = max(now, busy_until) + (len(pkg) + IP_UDP_HEADERS) / self.rate
+        self.links[direction][0] = departure
+        departures.append(departure)
+        self.count += 1
+        heapq.heappush(self.deliveries, (departure + self.delay, self.count, sock, pkg, addr))
+
+    def run(self):
+        while self.running:
+            now = time.time()
+            while self.deliveries and self.deliveries[0][0] <= now:
+                _, _, sock, pkg, addr = heapq.heappop(self.deliveries)
+                sock.sendto(pkg, addr)
+            timeout = max(self.deliveries[0][0] - now, 0) if self.deliveries else 0.1
+            for key, _ in self.selector.select(timeout):
+                pkg, addr = key.fileobj.recvfrom(65535)
+                now = time.time()
+                if key.fileobj is self.front:
+                    sock = self.upstream.get(addr)
+                    if sock is None:
+                        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                        sock.bind(("127.0.0.1", 0))
+                        self.upstream[addr] = sock
+                        self.selector.register(sock, selectors.EVENT_READ, addr)
+                    self._enqueue("up", now, pkg, sock, self.server_addr)
+                else:
+                    self._enqueue("down", now, pkg, self.front, key.data)
+
+
+def client(args, command, pace, *argv):
+    cmd = [sys.executable, "client.py", command, "-H", "127.0.0.1", "-p", str(args.port + 1), "-r", args.protocol,
+           "-t", pace] + list(argv)
+    start = time.perf_counter()
+    output = subprocess.run(cmd, cwd=CLIENT_DIR, capture_output=True, text=True, timeout=600)
+    elapsed = time.perf_counter() - start
+    match = re.search(r"pkgs_retransmitted=(\d+)", output.stderr + output.stdout)
+    return elapsed, int(match.group(1)) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pacing detrás de un cuello de botella")
+    parser.add_argument("--size", type=int, default=3, help="tamaño del archivo en MB")
+    parser.add_argument("--rate", type=float, default=20, help="ancho de banda del cuello de botella en Mbit/s")
+    parser.add_argument("--queue", type=int, default=8, help="paquetes en la cola del cuello de botella")
+    parser.add_argument("--delay", type=float, default=20, help="retardo en cada sentido en ms")
+    parser.add_argument("--protocol", default="GBN", help="SW, GBN o SR")
+    parser.add_argument("--runs", type=int, default=3, help="repeticiones de cada caso")
+    parser.add_argument("--port", type=int, default=5097, help="puerto del servidor (el enlace usa el siguiente)")
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "server.py", "start-server", "-H", "127.0.0.1", "-p", str(args.port),
+                               "-q"], cwd=SERVER_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    link = BottleneckLink(args.port + 1, args.port, args.rate, args.queue, args.delay)
+    relay = threading.Thread(target=link.run, daemon=True)
+    relay.start()
+    time.sleep(1.0)
+    name = "bench_pacing.bin"
+    tmp = tempfile.mkdtemp(prefix="bench-pacing-")
+    src, dst = os.path.join(tmp, "src.bin"), os.path.join(tmp, "dst.bin")
+    try:
+        with open(src, "wb") as f:
+            f.write(os.urandom(args.size * 1024 * 1024))
+        print(f"{args.size} MB con {args.protocol}: {args.rate} Mbit/s, cola de {args.queue} paquetes, "
+              f"{args.delay} ms por sentido")
+        for pace in ("auto", "off"):
+            drops, count = link.drops, link.count
+            ups, downs, retransmitted = [], [], []
+            for _ in range(args.runs):
+                elapsed, rtx = client(args, "upload", pace, "-s", src, "-n", name)
+                ups.append(elapsed)
+                retransmitted.append(rtx)
+                if os.path.exists(dst):
+                    os.remove(dst)
+                downs.append(client(args, "download", pace, "-n", name, "-d", dst, "-q")[0])
+            dropped = (link.drops - drops) / max(link.count - count + link.drops - drops, 1)
+            print(f"  pacing {pace:4}: upload {min(ups):.2f}s (mediana {sorted(ups)[len(ups) // 2]:.2f}s, "
+                  f"retransmitidos {retransmitted}), download {min(downs):.2f}s "
+                  f"(mediana {sorted(downs)[len(downs) // 2]:.2f}s), descartados en la cola {dropped:.1%}")
+    finally:
+        link.running = False
+        relay.join()
+        server.terminate()
+        server.wait()
+        for path in (src, dst, os.path.join(SERVER_DIR, "storage", name)):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark del scheduler de la salida del servidor (lib/server/scheduler.py)
+
+Por cada scheduler levanta el servidor de este árbol con ese -S y, mientras un cliente baja un
+archivo grande, otros --small clientes bajan a la vez un archivo chico. Mide cuánto tardan los
+downloads chicos y el grande, y toma del log del servidor la demora media y máxima de los paquetes
+en las colas de envío de cada sesión. Con una sola cola compartida los paquetes de los downloads
+chicos esperan detrás de la ventana del grande.
+
+Uso:
+    python3 metricas/benchmark_scheduler.py --big 20 --small 4 --small-size 200 --protocol GBN
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SERVER_DIR = os.path.join(REPO_ROOT, "src", "lib", "server")
+CLIENT_DIR = os.path.join(REPO_ROOT, "src", "lib", "client")
+STORAGE = os.path.join(SERVER_DIR, "storage")
+
+
+def download(args, name, dst):
+    cmd = [sys.executable, "client.py", "download", "-H", "127.0.0.1", "-p", str(args.port), "-r", args.protocol,
+           "-n", name, "-d", dst, "-q"]
+    return subprocess.Popen(cmd, cwd=CLIENT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), time.perf_counter()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del scheduler de la salida del servidor")
+    parser.add_argument("--big", type=int, default=20, help="tamaño del archivo grande en MB")
+    parser.add_argument("--small", type=int, default=4, help="cantidad de downloads chicos")
+    parser.add_argument("--small-size", type=int, default=200, help="tamaño del archivo chico en KB")
+    parser.add_argument("--protocol", default="GBN", help="GBN o SR")
+    parser.add_argument("--schedulers", nargs="+", default=["drr", "srpt"], help="schedulers a comparar")
+    parser.add_argument("--port", type=int, default=5091, help="puerto del servidor")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench-scheduler-")
+    names = {"bench_sched_big.bin": args.big * 1024 * 1024, "bench_sched_small.bin": args.small_size * 1024}
+    try:
+        for name, size in names.items():
+            with open(os.path.join(STORAGE, name), "wb") as f:
+                f.write(os.urandom(size))
+        print(f"{args.protocol}: 1 download de {args.big} MB y {args.small} de {args.small_size} KB a la vez")
+        for scheduler in args.schedulers:
+            log = os.path.join(tmp, f"server_{scheduler}.log")
+            with open(log, "w") as out:
+                server = subprocess.Popen([sys.executable, "server.py", "start-server", "-H", "127.0.0.1", "-p",
+                                           str(args.port), "-S", scheduler], cwd=SERVER_DIR, stdout=out, stderr=out)
+            time.sleep(1.0)
+            try:
+                big, big_start = download(args, "bench_sched_big.bin", os.path.join(tmp, "big.bin"))
+                time.sleep(0.3)  # que el grande ya tenga la ventana abierta
+                smalls = [download(args, "bench_sched_small.bin", os.path.join(tmp, f"small{i}.bin"))
+                          for i in range(args.small)]
+                small_times = []
+                for proc, start in smalls:
+                    proc.wait(timeout=300)
+                    small_times.append(time.perf_counter() - start)
+                big.wait(timeout=600)
+                big_time = time.perf_counter() - big_start
+            finally:
+                server.terminate()
+                server.wait()
+            with open(log) as f:
+                delays = [(int(sent), float(mean), float(peak)) for sent, mean, peak in
+                          re.findall(r"cola de envío: (\d+) paquetes, demora media=([\d.]+)ms, máxima=([\d.]+)ms",
+                                     f.read())]
+            small_delays = [d for d in delays if d[0] < 10 * args.small_size]
+            big_delays = [d for d in delays if d[0] >= 10 * args.small_size]
+            print(f"  {scheduler:4}: chicos {min(small_times):.2f}s a {max(small_times):.2f}s "
+                  f"(media {sum(small_times) / len(small_times):.2f}s), grande {big_time:.2f}s")
+            for label, group in (("chicos", small_delays), ("grande", big_delays)):
+                if group:
+                    print(f"        demora en la cola ({label}): media {sum(d[1] for d in group) / len(group):.3f}ms, "
+                          f"máxima {max(d[2] for d in group):.3f}ms")
+    finally:
+        for name in names:
+            if os.path.exists(os.path.join(STORAGE, name)):
+                os.remove(os.path.join(STORAGE, name))
+        for name in os.listdir(tmp):
+            os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Benchmark del servidor: sesiones por segundo y latencia por paquete
+
+Levanta el servidor de un árbol del repo (por defecto este) y simula N clientes concurrentes
+que hacen el handshake y suben un archivo chico con Stop and Wait, midiendo el tiempo entre
+cada paquete de datos y su ACK, y lo que tarda el handshake hasta poder mandar el primer dato.
+El cliente está implementado acá mismo sobre sockets crudos, así se puede correr contra cualquier
+versión del servidor que hable el mismo protocolo (--handshake legacy para las versiones con el
+handshake de tres mensajes y la espera de 1 segundo). Con --workers el servidor corre en N procesos
+(start-server --workers) y la memoria y los threads se suman entre todos.
+
+Uso:
+    python3 metricas/benchmark_servidor.py --clients 200 --pkgs 50
+    # comparar contra otra versión del servidor (p.ej. un git worktree)
+    git worktree add /tmp/baseline <commit>
+    python3 metricas/benchmark_servidor.py --tree /tmp/baseline [--handshake legacy]
+    # servidor con un proceso por core
+    python3 metricas/benchmark_servidor.py --clients 400 --workers 4
+"""
+import argparse
+import glob
+import os
+import random
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SIZE_PKG = 1000
+# SETUP y SETUP-ACK (lib/protocol/setup.py), copiados para no depender del árbol medido
+SETUP = struct.Struct(">BBBBBHI")
+SETUP_ACK = struct.Struct(">BBBBHII")
+
+
+def send_and_wait(sock, msg, ack_number, addr, timeout=0.2, max_retries=50, is_ack=None):
+    """
+    Envía msg hasta recibir el ACK ack_number (o un paquete que cumpla is_ack).
+    Devuelve la latencia del primer intento exitoso.
+    """
+    if is_ack is None:
+        is_ack = lambda pkg: len(pkg) == 4 and int.from_bytes(pkg, "big") == ack_number
+    start = time.perf_counter()
+    sock.sendto(msg, addr)
+    for _ in range(max_retries):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            sock.settimeout(max(deadline - time.perf_counter(), 0.001))
+            try:
+                pkg, _ = sock.recvfrom(2048)
+            except socket.timeout:
+                break
+            if is_ack(pkg):
+                return time.perf_counter() - start
+        start = time.perf_counter()
+        sock.sendto(msg, addr)
+    raise TimeoutError(f"sin ACK {ack_number}")
+
+
+def data_pkg(pkg_id, data, flag_end=0):
+    return flag_end.to_bytes(1, "big") + len(data).to_bytes(2, "big") + pkg_id.to_bytes(4, "big") + data
+
+
+def handshake(sock, addr, name, legacy):
+    """
+    Handshake de upload con Stop and Wait, hasta poder mandar el primer dato
+    """
+    if legacy:
+        send_and_wait(sock, b"U", 0, addr)
+        send_and_wait(sock, b"SW", 1, addr)
+        send_and_wait(sock, name.encode(), 2, addr)
+        time.sleep(1.0)  # El mismo delay que hacía el cliente luego del handshake
+        return
+    nonce = random.getrandbits(32)
+    setup = SETUP.pack(0xF0, 1, ord("U"), 0, 0, SIZE_PKG, nonce) + name.encode()
+    is_ack = lambda pkg: len(pkg) == SETUP_ACK.size and pkg[0] == 0xF1 and SETUP_ACK.unpack(pkg)[5] == nonce
+    send_and_wait(sock, setup, None, addr, is_ack=is_ack)
+
+
+def session(port, idx, n_pkgs, latencies, setup_times, errors, legacy):
+    """
+    Una sesión completa de upload con Stop and Wait
+    """
+    addr = ("127.0.0.1", port)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    try:
+        start = time.perf_counter()
+        handshake(sock, addr, f"bench_{idx}.bin", legacy)
+        setup_times.append(time.perf_counter() - start)
+
+        data = os.urandom(SIZE_PKG)
+        session_latencies = []
+        for i in range(n_pkgs):
+            pkg_id = 3 + i
+            session_latencies.append(send_and_wait(sock, data_pkg(pkg_id, data), pkg_id + 1, addr))
+        send_and_wait(sock, data_pkg(3 + n_pkgs, b"", flag_end=1), 4 + n_pkgs, addr)
+        latencies.extend(session_latencies)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        sock.close()
+
+
+def read_proc_status(pid, field):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return "-"
+
+
+def server_pids(pid):
+    """
+    pid y sus procesos hijos (los workers)
+    """
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [pid] + [int(child) for child in f.read().split()]
+    except OSError:
+        return [pid]
+
+
+def read_total(pids, field):
+    """
+    Suma de un campo numérico de /proc/<pid>/status entre pids ("-" si no se pudo leer)
+    """
+    values = [read_proc_status(pid, field).split()[0] for pid in pids]
+    if not all(value.isdigit() for value in values):
+        return "-"
+    return f"{sum(int(value) for value in values)} kB" if field.startswith("Vm") else sum(int(v) for v in values)
+
+
+def run(tree, port, clients, n_pkgs, legacy, workers=1):
+    server_dir = os.path.join(tree, "src", "lib", "server")
+    cmd = [sys.executable, "server.py", "start-server", "-H", "127.0.0.1", "-p", str(port), "-q"]
+    if workers > 1:
+        cmd += ["--workers", str(workers)]
+    server = subprocess.Popen(cmd, cwd=server_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+
+    latencies, setup_times, errors = [], [], []
+    peak_threads = [0]
+    running = threading.Event()
+    running.set()
+
+    def sample_threads():
+        while running.is_set():
+            n = read_total(server_pids(server.pid), "Threads")
+            if n != "-":
+                peak_threads[0] = max(peak_threads[0], n)
+            time.sleep(0.05)
+
+    sampler = threading.Thread(target=sample_threads)
+    sampler.start()
+    threads = [threading.Thread(target=session, args=(port, i, n_pkgs, latencies, setup_times, errors, legacy)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    running.clear()
+    sampler.join()
+
+    peak_rss = read_total(server_pids(server.pid), "VmHWM")
+    server.terminate()
+    server.wait()
+    for path in glob.glob(os.path.join(server_dir, "storage", "bench_*.bin")):
+        os.remove(path)
+
+    ok = clients - len(errors)
+    print(f"Servidor: {tree}" + (f" ({workers} workers)" if workers > 1 else ""))
+    print(f"  sesiones completas: {ok}/{clients} en {elapsed:.2f}s -> {ok / elapsed:.1f} sesiones/s")
+    if latencies:
+        latencies.sort()
+        ms = [x * 1000 for x in latencies]
+        print(f"  latencia por paquete (ms): media={statistics.mean(ms):.3f} p50={ms[len(ms) // 2]:.3f} "
+              f"p99={ms[int(len(ms) * 0.99)]:.3f} max={ms[-1]:.3f}")
+    if setup_times:
+        ms = sorted(x * 1000 for x in setup_times)
+        print(f"  handshake hasta el primer dato (ms): media={statistics.mean(ms):.3f} p50={ms[len(ms) // 2]:.3f} "
+              f"max={ms[-1]:.3f}")
+    print(f"  memoria pico del servidor: {peak_rss}, threads pico: {peak_threads[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sesiones/s y latencia por paquete del servidor")
+    parser.add_argument("--tree", default=REPO_ROOT, help="raíz del árbol cuyo servidor se mide")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--clients", type=int, default=200, help="clientes concurrentes")
+    parser.add_argument("--pkgs", type=int, default=50, help="paquetes de datos por sesión")
+    parser.add_argument("--handshake", choices=["setup", "legacy"], default="setup",
+                        help="legacy: handshake de tres mensajes de las versiones anteriores")
+    parser.add_argument("--workers", type=int, default=1, help="procesos del servidor (SO_REUSEPORT)")
+    args = parser.parse_args()
+    run(os.path.abspath(args.tree), args.port, args.clients, args.pkgs, args.handshake == "legacy", args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Microbenchmark de la ventana de envío (GoBackNSender y SelectiveRepeatSender)
+
+Simula en memoria una transferencia con ventana fija (sin red ni timers reales) y mide sólo el
+tiempo que pasa dentro del emisor: armar paquetes, procesar ACKs, buscar timers vencidos.
+Se pierde una fracción de los paquetes de datos para que haya ACKs duplicados, SACK y reenvíos.
+
+Uso:
+    python3 metricas/benchmark_ventana.py --windows 10 1000 65536
+    # comparar contra otra versión del emisor (p.ej. un git worktree)
+    git worktree add /tmp/baseline <commit>
+    python3 metricas/benchmark_ventana.py --tree /tmp/baseline
+"""
+import argparse
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEADER = struct.Struct(">BHI")
+TICK = 0.001  # tiempo simulado por vuelta
+
+
+class NullArchive:
+    """
+    Archivo del receptor que no escribe nada
+    """
+
+    def recv_pckg_go_back_n(self, msg):
+        flag_end, data_len, pkg_id = HEADER.unpack_from(msg)
+        return flag_end & 1, data_len, pkg_id, msg[HEADER.size:]
+
+    def write_data(self, data):
+        pass
+
+
+def simulate(lib, protocol, window, n_pkgs, payload, loss, path):
+    from lib.protocol.archive import ArchiveSender
+    from lib.protocol.congestion import RenoController
+    from lib.protocol.go_back_n import GoBackNSender, GoBackNReceiver
+    from lib.protocol.selective_repeat import SelectiveRepeatSender, SelectiveRepeatReceiver
+    from lib.protocol.rtt import RttEstimator
+    from lib.protocol.ack import decode_ack
+
+    arch = ArchiveSender(path, payload)
+    congestion = RenoController(window, window)
+    rtt = RttEstimator(0.05)
+    if protocol == "GBN":
+        sender = GoBackNSender(arch, window, rtt, congestion)
+        receiver = GoBackNReceiver(NullArchive(), window)
+    else:
+        sender = SelectiveRepeatSender(arch, window, rtt, congestion)
+        receiver = SelectiveRepeatReceiver(NullArchive(), window)
+
+    rng = random.Random(1)
+    now = 0.0
+    in_sender = 0.0
+    acks = 0
+    while not sender.finished:
+        start = time.perf_counter()
+        pkgs = sender.expired(now) + sender.next_packets(now)
+        in_sender += time.perf_counter() - start
+
+        replies = []
+        for pkg in pkgs:
+            if rng.random() < loss:
+                continue
+            reply = receiver.receive(pkg)
+            if reply is not None:
+                replies.append(decode_ack(reply) if protocol == "GBN" else (reply, []))
+
+        now += TICK
+        start = time.perf_counter()
+        for ack_num, sack_blocks in replies:
+            sender.ack(ack_num, now, sack_blocks)
+        sender.time_to_next_timeout(now)
+        in_sender += time.perf_counter() - start
+        acks += len(replies)
+    arch.close()
+    return in_sender, acks, sender.stats.pkgs_sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de la ventana de envío")
+    parser.add_argument("--tree", default=REPO_ROOT, help="raíz del árbol cuyo emisor se mide")
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 1000, 65536])
+    parser.add_argument("--pkgs", type=int, default=20000, help="paquetes mínimos por transferencia")
+    parser.add_argument("--payload", type=int, default=1000)
+    parser.add_argument("--loss", type=float, default=0.01)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.join(os.path.abspath(args.tree), "src"))
+    import lib
+
+    print(f"Emisor: {args.tree} (pérdida {args.loss:.0%}, {args.payload} bytes por paquete)")
+    for window in args.windows:
+        n_pkgs = max(args.pkgs, 4 * window)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.truncate(n_pkgs * args.payload)  # archivo disperso: no ocupa disco
+            path = f.name
+        try:
+            for protocol in ("GBN", "SR"):
+                with open(os.devnull, "w") as devnull:
+                    stdout, sys.stdout = sys.stdout, devnull
+                    try:
+                        elapsed, acks, sent = simulate(lib, protocol, window, n_pkgs, args.payload, args.loss, path)
+                    finally:
+                        sys.stdout = stdout
+                print(f"  {protocol:3} ventana {window:6}: {sent} paquetes, {acks} ACKs en {elapsed:.3f}s "
+                      f"-> {elapsed / acks * 1e6:.2f} us por ACK")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
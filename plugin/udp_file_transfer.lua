@@ -1,6 +1,6 @@
 -- UDP File Transfer Protocol Dissector for Wireshark
 -- Plugin para analizar el protocolo de transferencia de archivos UDP
--- Soporta Stop-and-Wait y Go-Back-N
+-- Soporta Stop-and-Wait, Go-Back-N y Selective Repeat
 
 -- Crear el protocolo
 local udp_file_transfer = Proto("udpft", "UDP File Transfer Protocol")
@@ -8,11 +8,52 @@ local udp_file_transfer = Proto("udpft", "UDP File Transfer Protocol")
 -- Definir los campos del protocolo
 local fields = udp_file_transfer.fields
 fields.flag_end = ProtoField.uint8("udpft.flag_end", "End Flag", base.DEC, {[0]="Data", [1]="Last"}, 0x01)
+fields.flag_compressed = ProtoField.uint8("udpft.flag_compressed", "Compressed", base.DEC, {[0]="No", [1]="Yes"}, 0x02)
+fields.flag_parity = ProtoField.uint8("udpft.flag_parity", "Parity", base.DEC, {[0]="No", [1]="Yes"}, 0x04)
 fields.data_len = ProtoField.uint16("udpft.data_len", "Data Length", base.DEC)
 fields.pkg_id = ProtoField.uint32("udpft.pkg_id", "Package ID", base.DEC)
 fields.data = ProtoField.bytes("udpft.data", "Data")
 fields.ack_num = ProtoField.uint32("udpft.ack_num", "ACK Number", base.DEC)
+fields.sack_count = ProtoField.uint8("udpft.sack_count", "SACK Blocks", base.DEC)
+fields.sack_first = ProtoField.uint32("udpft.sack_first", "SACK First", base.DEC)
+fields.sack_last = ProtoField.uint32("udpft.sack_last", "SACK Last", base.DEC)
 fields.handshake = ProtoField.string("udpft.handshake", "Handshake Data")
+fields.payload_size = ProtoField.uint32("udpft.payload_size", "Payload Size", base.DEC)
+fields.setup_version = ProtoField.uint8("udpft.setup_version", "Version", base.DEC)
+fields.setup_type = ProtoField.uint8("udpft.setup_type", "Type", base.DEC, {[85]="Upload", [68]="Download"})
+fields.setup_protocol = ProtoField.uint8("udpft.setup_protocol", "Protocol", base.DEC,
+                                         {[0]="Stop-and-Wait", [1]="Go-Back-N", [2]="Selective Repeat"})
+fields.setup_options = ProtoField.uint8("udpft.setup_options", "Options", base.HEX)
+fields.setup_nonce = ProtoField.uint32("udpft.setup_nonce", "Nonce", base.HEX)
+fields.setup_status = ProtoField.uint8("udpft.setup_status", "Status", base.DEC,
+                                       {[0]="OK", [1]="Not Found", [2]="Bad Request", [3]="Busy"})
+fields.session_id = ProtoField.uint32("udpft.session_id", "Session ID", base.HEX)
+fields.resume_offset = ProtoField.uint64("udpft.resume_offset", "Resume Offset", base.DEC)
+fields.transfer_id = ProtoField.uint32("udpft.transfer_id", "Transfer ID", base.HEX)
+fields.stream = ProtoField.uint8("udpft.stream", "Stream", base.DEC)
+fields.streams = ProtoField.uint8("udpft.streams", "Streams", base.DEC)
+fields.file_size = ProtoField.uint64("udpft.file_size", "File Size", base.DEC)
+fields.codec = ProtoField.uint8("udpft.codec", "Codec", base.DEC, {[0]="zlib", [1]="bz2", [2]="lzma"})
+fields.pace = ProtoField.uint32("udpft.pace", "Pacing (kbit/s)", base.DEC, {[0]="Off", [0xFFFFFFFF]="Auto"})
+fields.fec_k = ProtoField.uint8("udpft.fec_k", "FEC Data Packets (K)", base.DEC)
+fields.fec_m = ProtoField.uint8("udpft.fec_m", "FEC Parity Packets (M)", base.DEC)
+fields.fec_block = ProtoField.uint16("udpft.fec_block", "FEC Block Packets", base.DEC)
+
+-- Primer byte del handshake (SETUP_KIND y SETUP_ACK_KIND en lib/constants.py)
+local SETUP_KIND = 0xF0
+local SETUP_ACK_KIND = 0xF1
+local SETUP_HEADER = 11
+local SETUP_ACK_SIZE = 14
+local SETUP_OPT_RESUME = 0x01   -- con esta opción ambos llevan el offset (8 bytes) después del header
+local SETUP_OPT_STREAM = 0x02   -- SETUP: transferencia, stream, streams y tamaño (14 bytes); SETUP-ACK: tamaño (8)
+local SETUP_OPT_DELTA = 0x04    -- upload delta: el download trae firmas, el upload trae diferencias
+local SETUP_OPT_COMPRESS = 0x08 -- SETUP: códec (1 byte) después de los campos anteriores; SETUP-ACK: sin campos
+local SETUP_OPT_BUNDLE = 0x10   -- varios archivos o un directorio en un bundle (nombres separados por \0)
+local SETUP_OPT_PACE = 0x20     -- SETUP: ritmo (4 bytes, kbit/s; 0 sin pacing, 0xFFFFFFFF automático); SETUP-ACK: sin campos
+local SETUP_OPT_FEC = 0x40      -- SETUP: K y M (1 byte cada uno); SETUP-ACK: sin campos
+local FLAG_COMPRESSED = 0x02    -- bit del primer byte de un paquete de datos comprimido
+local FLAG_PARITY = 0x04        -- bit del primer byte de un paquete de paridad (FEC)
+local CODECS = {[0]="zlib", [1]="bz2", [2]="lzma"}
 
 -- Función para determinar si es un paquete de nuestro protocolo
 local function is_file_transfer_packet(buffer, pinfo)
@@ -24,26 +65,6 @@ local function is_file_transfer_packet(buffer, pinfo)
     return false
 end
 
--- Función para verificar si es texto ASCII imprimible
-local function is_printable_text(buffer)
-    local length = buffer:len()
-    if length == 0 or length > 256 then
-        return false
-    end
-    
-    local printable_count = 0
-    for i = 0, length - 1 do
-        local byte = buffer(i, 1):uint()
-        -- ASCII imprimible: 32-126, o newline/CR
-        if (byte >= 32 and byte <= 126) or byte == 10 or byte == 13 then
-            printable_count = printable_count + 1
-        end
-    end
-    
-    -- Si más del 90% son caracteres imprimibles, es texto
-    return printable_count > (length * 0.9)
-end
-
 -- Función para determinar el tipo de paquete
 local function detect_packet_type(buffer)
     local length = buffer:len()
@@ -52,27 +73,28 @@ local function detect_packet_type(buffer)
     if length == 4 then
         return "ACK"
     end
-    
-    -- Handshake: texto corto (1-256 bytes) que contiene comandos o nombres de archivo
-    if length >= 1 and length <= 256 and is_printable_text(buffer) then
-        local text = buffer():string()
-        
-        -- Paso 1: U o D (1 byte)
-        if length == 1 and (text == "U" or text == "D") then
-            return "HANDSHAKE_TYPE"
-        end
-        
-        -- Paso 2: SW o GBN (2-3 bytes)
-        if length <= 3 and (text == "SW" or text == "GBN") then
-            return "HANDSHAKE_PROTOCOL"
-        end
-        
-        -- Paso 3: nombre de archivo
-        if length > 3 then
-            return "HANDSHAKE_FILENAME"
+
+    -- ACK con SACK: 4 bytes de ACK + 1 byte con la cantidad de bloques + 8 bytes por bloque
+    if length >= 13 and (length - 5) % 8 == 0 then
+        local n_blocks = buffer(4, 1):uint()
+        if n_blocks > 0 and length == 5 + 8 * n_blocks then
+            return "SACK"
         end
-        
-        return "HANDSHAKE"
+    end
+    
+    -- Handshake: SETUP del cliente (header de 11 bytes + nombre) y SETUP-ACK del servidor (14 bytes)
+    local kind = buffer(0, 1):uint()
+    if kind == SETUP_KIND and length > SETUP_HEADER then
+        return "SETUP"
+    end
+    if kind == SETUP_ACK_KIND and (length == SETUP_ACK_SIZE or length == SETUP_ACK_SIZE + 8 or
+                                   length == SETUP_ACK_SIZE + 16) then
+        return "SETUP_ACK"
+    end
+    
+    -- Paridad de FEC: mismo header, pero el largo es la cantidad de paquetes del bloque
+    if length >= 7 and kind <= 0x07 and bit.band(kind, FLAG_PARITY) ~= 0 then
+        return "PARITY"
     end
     
     -- Paquetes de datos: header de 7 bytes + datos (0-1000 bytes)
@@ -117,44 +139,135 @@ function udp_file_transfer.dissector(buffer, pinfo, tree)
         local ack_num = buffer(0, 4):uint()
         subtree:add(fields.ack_num, buffer(0, 4))
         pinfo.cols.info = string.format("ACK %d", ack_num)
-        
-    elseif pkt_type == "HANDSHAKE_TYPE" then
-        -- Handshake paso 1: tipo de operación
-        local text = buffer():string()
-        subtree:add(fields.handshake, buffer())
-        
-        if text == "U" then
-            pinfo.cols.info = "Handshake: Upload Request"
-        elseif text == "D" then
-            pinfo.cols.info = "Handshake: Download Request"
-        else
-            pinfo.cols.info = "Handshake: " .. text
+
+    elseif pkt_type == "SACK" then
+        -- ACK acumulativo + rangos recibidos fuera de orden
+        local ack_num = buffer(0, 4):uint()
+        local n_blocks = buffer(4, 1):uint()
+        subtree:add(fields.ack_num, buffer(0, 4))
+        subtree:add(fields.sack_count, buffer(4, 1))
+
+        local ranges = {}
+        for i = 0, n_blocks - 1 do
+            local offset = 5 + 8 * i
+            local first = buffer(offset, 4):uint()
+            local last = buffer(offset + 4, 4):uint()
+            local block = subtree:add(buffer(offset, 8), string.format("SACK Block: %d-%d", first, last))
+            block:add(fields.sack_first, buffer(offset, 4))
+            block:add(fields.sack_last, buffer(offset + 4, 4))
+            table.insert(ranges, string.format("%d-%d", first, last))
         end
+        pinfo.cols.info = string.format("ACK %d SACK %s", ack_num, table.concat(ranges, ","))
         
-    elseif pkt_type == "HANDSHAKE_PROTOCOL" then
-        -- Handshake paso 2: protocolo
-        local text = buffer():string()
-        subtree:add(fields.handshake, buffer())
-        
-        if text == "SW" then
-            pinfo.cols.info = "Handshake: Stop-and-Wait Protocol"
-        elseif text == "GBN" then
-            pinfo.cols.info = "Handshake: Go-Back-N Protocol"
-        else
-            pinfo.cols.info = "Handshake: " .. text
+    elseif pkt_type == "SETUP" then
+        -- [kind:1][versión:1][tipo:1][protocolo:1][opciones:1][datos por paquete:2][nonce:4] + nombre
+        local protocols = {[0]="SW", [1]="GBN", [2]="SR"}
+        local conexion_type = buffer(2, 1):uint() == 85 and "Upload" or "Download"
+        local protocol = protocols[buffer(3, 1):uint()] or "?"
+        local options = buffer(4, 1):uint()
+        local resume = bit.band(options, SETUP_OPT_RESUME) ~= 0 and length > SETUP_HEADER + 8
+        local name_start = resume and SETUP_HEADER + 8 or SETUP_HEADER
+        local stream_start = name_start
+        local stream = bit.band(options, SETUP_OPT_STREAM) ~= 0 and length > stream_start + 14
+        if stream then
+            name_start = stream_start + 14
         end
+        local codec_start = name_start
+        local codec = bit.band(options, SETUP_OPT_COMPRESS) ~= 0 and length > codec_start + 1
+        if codec then
+            name_start = codec_start + 1
+        end
+        local pace_start = name_start
+        local pace = bit.band(options, SETUP_OPT_PACE) ~= 0 and length > pace_start + 4
+        if pace then
+            name_start = pace_start + 4
+        end
+        local fec_start = name_start
+        local fec = bit.band(options, SETUP_OPT_FEC) ~= 0 and length > fec_start + 2
+        if fec then
+            name_start = fec_start + 2
+        end
+        local name = buffer(name_start):string()
+        subtree:add(fields.setup_version, buffer(1, 1))
+        subtree:add(fields.setup_type, buffer(2, 1))
+        subtree:add(fields.setup_protocol, buffer(3, 1))
+        subtree:add(fields.setup_options, buffer(4, 1))
+        subtree:add(fields.payload_size, buffer(5, 2))
+        subtree:add(fields.setup_nonce, buffer(7, 4))
+        if resume then
+            subtree:add(fields.resume_offset, buffer(SETUP_HEADER, 8))
+        end
+        local stream_info = ""
+        if stream then
+            subtree:add(fields.transfer_id, buffer(stream_start, 4))
+            subtree:add(fields.stream, buffer(stream_start + 4, 1))
+            subtree:add(fields.streams, buffer(stream_start + 5, 1))
+            subtree:add(fields.file_size, buffer(stream_start + 6, 8))
+            stream_info = string.format(" stream %d/%d of 0x%08x", buffer(stream_start + 4, 1):uint() + 1,
+                                        buffer(stream_start + 5, 1):uint(), buffer(stream_start, 4):uint())
+        end
+        if codec then
+            subtree:add(fields.codec, buffer(codec_start, 1))
+            stream_info = stream_info .. " " .. (CODECS[buffer(codec_start, 1):uint()] or "?")
+        end
+        if pace then
+            subtree:add(fields.pace, buffer(pace_start, 4))
+            local rate = buffer(pace_start, 4):uint()
+            stream_info = stream_info .. (rate == 0 and " pace off" or rate == 0xFFFFFFFF and " pace auto"
+                                          or string.format(" pace %d kbit/s", rate))
+        end
+        if fec then
+            subtree:add(fields.fec_k, buffer(fec_start, 1))
+            subtree:add(fields.fec_m, buffer(fec_start + 1, 1))
+            stream_info = stream_info .. string.format(" fec %d:%d", buffer(fec_start, 1):uint(),
+                                                       buffer(fec_start + 1, 1):uint())
+        end
+        subtree:add(fields.handshake, buffer(name_start))
+        local delta = bit.band(options, SETUP_OPT_DELTA) ~= 0
+        local bundle = bit.band(options, SETUP_OPT_BUNDLE) ~= 0
+        pinfo.cols.info = string.format("SETUP: %s %s %s (payload %d bytes)%s%s%s%s", conexion_type, protocol, name,
+                                        buffer(5, 2):uint(), resume and " resume" or "", stream_info,
+                                        delta and (conexion_type == "Upload" and " delta" or " signatures") or "",
+                                        bundle and " bundle" or "")
         
-    elseif pkt_type == "HANDSHAKE_FILENAME" then
-        -- Handshake paso 3: nombre de archivo
-        local text = buffer():string()
-        subtree:add(fields.handshake, buffer())
-        pinfo.cols.info = "Handshake: " .. text
-        
-    elseif pkt_type == "HANDSHAKE" then
-        -- Handshake genérico
-        local text = buffer():string()
-        subtree:add(fields.handshake, buffer())
-        pinfo.cols.info = "Handshake: " .. text
+    elseif pkt_type == "SETUP_ACK" then
+        -- [kind:1][versión:1][estado:1][opciones:1][datos por paquete:2][nonce:4][sesión:4] (+ offset:8) (+ tamaño:8)
+        local statuses = {[0]="OK", [1]="Not Found", [2]="Bad Request", [3]="Busy"}
+        subtree:add(fields.setup_version, buffer(1, 1))
+        subtree:add(fields.setup_status, buffer(2, 1))
+        subtree:add(fields.setup_options, buffer(3, 1))
+        subtree:add(fields.payload_size, buffer(4, 2))
+        subtree:add(fields.setup_nonce, buffer(6, 4))
+        subtree:add(fields.session_id, buffer(10, 4))
+        local info = string.format("SETUP-ACK: %s, session 0x%08x (payload %d bytes)",
+                                   statuses[buffer(2, 1):uint()] or "?", buffer(10, 4):uint(), buffer(4, 2):uint())
+        local options = buffer(3, 1):uint()
+        local pos = SETUP_ACK_SIZE
+        if bit.band(options, SETUP_OPT_RESUME) ~= 0 and length >= pos + 8 then
+            subtree:add(fields.resume_offset, buffer(pos, 8))
+            info = info .. string.format(", resume at %s", tostring(buffer(pos, 8):uint64()))
+            pos = pos + 8
+        end
+        if bit.band(options, SETUP_OPT_STREAM) ~= 0 and length >= pos + 8 then
+            subtree:add(fields.file_size, buffer(pos, 8))
+            info = info .. string.format(", file size %s", tostring(buffer(pos, 8):uint64()))
+        end
+        if bit.band(options, SETUP_OPT_DELTA) ~= 0 then
+            info = info .. ", delta"
+        end
+        if bit.band(options, SETUP_OPT_COMPRESS) ~= 0 then
+            info = info .. ", compressed"
+        end
+        if bit.band(options, SETUP_OPT_BUNDLE) ~= 0 then
+            info = info .. ", bundle"
+        end
+        if bit.band(options, SETUP_OPT_PACE) ~= 0 then
+            info = info .. ", paced"
+        end
+        if bit.band(options, SETUP_OPT_FEC) ~= 0 then
+            info = info .. ", fec"
+        end
+        pinfo.cols.info = info
         
     elseif pkt_type == "DATA" then
         -- Paquete de datos (7 bytes header + datos)
@@ -164,6 +277,7 @@ function udp_file_transfer.dissector(buffer, pinfo, tree)
         local pkg_id = buffer(3, 4):uint()
         
         subtree:add(fields.flag_end, buffer(0, 1))
+        subtree:add(fields.flag_compressed, buffer(0, 1))
         subtree:add(fields.data_len, buffer(1, 2))
         subtree:add(fields.pkg_id, buffer(3, 4))
         
@@ -175,8 +289,21 @@ function udp_file_transfer.dissector(buffer, pinfo, tree)
         -- Determinar si es el último paquete
         local pkt_status = (flag_end == 1) and "LAST" or "DATA"
         
-        pinfo.cols.info = string.format("%s: ID=%d, Len=%d bytes", 
-                                        pkt_status, pkg_id, data_len)
+        pinfo.cols.info = string.format("%s: ID=%d, Len=%d bytes%s", 
+                                        pkt_status, pkg_id, data_len,
+                                        bit.band(first_byte, FLAG_COMPRESSED) ~= 0 and " (compressed)" or "")
+        
+    elseif pkt_type == "PARITY" then
+        -- Paridad de FEC: [flags:1][paquetes del bloque:2][primer pkg_id del grupo:4] + XOR del grupo
+        local pkg_id = buffer(3, 4):uint()
+        subtree:add(fields.flag_parity, buffer(0, 1))
+        subtree:add(fields.fec_block, buffer(1, 2))
+        subtree:add(fields.pkg_id, buffer(3, 4))
+        if length > 7 then
+            subtree:add(fields.data, buffer(7))
+        end
+        pinfo.cols.info = string.format("PARITY: ID=%d, block of %d packets, %d bytes", pkg_id,
+                                        buffer(1, 2):uint(), length - 7)
         
     else
         -- Paquete desconocido
@@ -204,7 +331,7 @@ end)
 
 -- Información del plugin
 set_plugin_info({
-    version = "1.2.0",
+    version = "1.11.0",
     author = "UDP File Transfer Protocol Analyzer",
-    description = "Dissector for custom UDP file transfer protocol supporting Stop-and-Wait and Go-Back-N"
+    description = "Dissector for custom UDP file transfer protocol supporting Stop-and-Wait, Go-Back-N and Selective Repeat"
 })
\ No newline at end of file
@@ -1,16 +1,92 @@
 import sys
 import os
+import random
+import tempfile
+import threading
+import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
-from lib.constants import UPLOAD, DOWNLOAD, WINDOW_SIZE_GBN, WINDOW_SIZE_SW, ACK_TIMEOUT_GBN, ACK_TIMEOUT_SW, GO_BACK_N, STOP_AND_WAIT
-from lib.protocol.archive import ArchiveSender, ArchiveRecv
-from lib.protocol.protocol import handshake, upload, download
+from lib.constants import (
+    UPLOAD, DOWNLOAD, WINDOW_SIZE_GBN, WINDOW_SIZE_SW, WINDOW_SIZE_SR, ACK_TIMEOUT_GBN, ACK_TIMEOUT_SW, ACK_TIMEOUT_SR,
+    GO_BACK_N, STOP_AND_WAIT, SELECTIVE_REPEAT, SETUP_OPT_DELTA, SETUP_OPT_BUNDLE, BUNDLE_NAME_SEP, BUNDLE_SUFFIX,
+    PACE_AUTO, ACK_EVERY
+)
+from lib.protocol.archive import ArchiveSender, ArchiveRecv, read_resume_offset, clear_partial_marker, partial_marker
+from lib.protocol.bundle import bundle_entries, write_bundle, extract_bundle
+from lib.protocol.delta import compute_delta
+from lib.protocol.payload import resolve_payload_size
+from lib.protocol.protocol import handshake, upload, download, upload_selective_repeat, download_selective_repeat
+from lib.protocol.setup import stream_range
 from lib.protocol.utils import (
     setup_logging, validate_file_path, validate_protocol, 
     setup_client_socket, create_upload_parser, create_download_parser
 )
 
 
+def _send_file(sock, arch, protocol, server_addr, args, rtt, fec=None):
+    """
+    Sube arch con el protocolo especificado, con la corrección de errores fec aceptada en el handshake
+
+    Returns:
+        TransferStats: las estadísticas del emisor
+    """
+    pace = PACE_AUTO if args.pace is None else args.pace
+    if protocol == STOP_AND_WAIT:
+        return upload(sock, arch, False, WINDOW_SIZE_SW, server_addr, ACK_TIMEOUT_SW, args.verbose, args.quiet, rtt,
+                      args.congestion, args.adaptive_payload, pace)
+    elif protocol == GO_BACK_N:
+        return upload(sock, arch, False, WINDOW_SIZE_GBN, server_addr, ACK_TIMEOUT_GBN, args.verbose, args.quiet, rtt,
+                      args.congestion, args.adaptive_payload, pace, fec)
+    elif protocol == SELECTIVE_REPEAT:
+        return upload_selective_repeat(sock, arch, WINDOW_SIZE_SR, server_addr, ACK_TIMEOUT_SR, args.verbose, args.quiet,
+                                       rtt, args.congestion, args.adaptive_payload, pace, fec)
+
+
+def _recv_file(sock, arch, protocol, server_addr, args, fec=None, ack_every=ACK_EVERY):
+    """
+    Descarga en arch con el protocolo especificado, con la corrección de errores fec aceptada en el handshake
+    y, con GBN, un ACK cada ack_every paquetes en orden
+    """
+    if protocol == STOP_AND_WAIT:
+        download(sock, arch, server_addr, ACK_TIMEOUT_SW, args.verbose, args.quiet) #GBN CON VENTANA DE 1
+    elif protocol == GO_BACK_N:
+        download(sock, arch, server_addr, ACK_TIMEOUT_GBN, args.verbose, args.quiet, WINDOW_SIZE_GBN, fec,
+                 ack_every)
+    elif protocol == SELECTIVE_REPEAT:
+        download_selective_repeat(sock, arch, server_addr, WINDOW_SIZE_SR, ACK_TIMEOUT_SR, args.verbose, args.quiet,
+                                  fec)
+
+
+def _run_streams(streams, transfer):
+    """
+    Corre transfer(stream) para cada stream en su propio hilo (cada uno con su socket, su sesión en el
+    servidor y su ventana) y espera a que terminen todos
+
+    Returns:
+        list: lo que devolvió cada stream, en orden
+
+    Raises:
+        Exception: la primera excepción de un stream, una vez terminados todos
+    """
+    results = [None] * streams
+    errors = []
+
+    def run(stream):
+        try:
+            results[stream] = transfer(stream)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(stream,), name=f"stream-{stream}") for stream in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
 class FileTransferInterface:
     def __init__(self):
         self.logger = setup_logging('file_transfer')
@@ -29,29 +105,48 @@ class FileTransferInterface:
             self.logger = setup_logging('file_transfer', args.verbose, args.quiet)
             self._setup_socket(args.host, args.port)
             
-            source_path = validate_file_path(args.src)
+            # Varios archivos o un directorio viajan juntos, en un bundle
+            bundle = len(args.src) > 1 or os.path.isdir(args.src[0])
+            sources = [src if os.path.isdir(src) else validate_file_path(src) for src in args.src]
+            source_path = sources[0]
             protocol = validate_protocol(args.protocol)
             
-            self.logger.info(f"Starting upload: {source_path} -> {args.name}")
+            self.logger.info(f"Starting upload: {', '.join(sources)} -> {args.name}")
             self.logger.debug(f"Protocol: {protocol}")
             
             # Crear dirección del servidor
             server_addr = (args.host, args.port)
             
+            payload_size = resolve_payload_size(args.payload, server_addr)
+            if bundle:
+                self._upload_bundle(args, sources, protocol, server_addr, payload_size)
+                return
+            if args.streams > 1:
+                self._upload_streams(args, source_path, protocol, server_addr, payload_size)
+                return
+            if args.delta and self._upload_delta(args, source_path, protocol, server_addr, payload_size):
+                return
+
             # Handshake
-            handshake(self.sock, args.name, UPLOAD, protocol, server_addr, args.verbose, args.quiet)
+            # Al retomar, el servidor responde cuántos bytes ya tiene
+            resume_offset = 0 if args.resume else None
+            rtt, payload_size, session_id, offset, _, codec, _, fec = handshake(self.sock, args.name, UPLOAD, protocol,
+                                                                                server_addr, args.verbose, args.quiet,
+                                                                                payload_size, resume_offset,
+                                                                                codec=args.compress, fec=args.fec)
+            self.logger.debug(f"Session: {session_id}")
             
             # Crear archivo sender
-            arch = ArchiveSender(source_path)
-            end = False
+            arch = ArchiveSender(source_path, payload_size, offset, codec=codec)
             
             # Usar el protocolo especificado
-            if protocol == "SW":
-                upload(self.sock, arch, end, WINDOW_SIZE_SW, server_addr, ACK_TIMEOUT_SW, args.verbose, args.quiet)
-            elif protocol == "GBN":
-                upload(self.sock, arch, end, WINDOW_SIZE_GBN, server_addr, ACK_TIMEOUT_GBN, args.verbose, args.quiet)
+            stats = _send_file(self.sock, arch, protocol, server_addr, args, rtt, fec)
+            arch.close()
                 
             self.logger.info("Upload completed successfully")
+            self.logger.info(f"Transfer stats: {stats}")
+            if arch.compressor is not None:
+                self.logger.info(f"Compression: {arch.compressor}")
             
         except Exception as e:
             self.logger.error(f"Upload failed: {e}")
@@ -67,24 +162,40 @@ class FileTransferInterface:
             
             protocol = validate_protocol(args.protocol)
             
-            self.logger.info(f"Starting download: {args.name} -> {args.dst}")
+            if len(args.name) > 1 and (args.streams > 1 or args.resume):
+                raise Exception("--streams y --resume no se pueden combinar con varios archivos")
+            
+            self.logger.info(f"Starting download: {', '.join(args.name)} -> {args.dst}")
             self.logger.debug(f"Protocol: {protocol}")
             
             # Crear dirección del servidor
             server_addr = (args.host, args.port)
             
+            payload_size = resolve_payload_size(args.payload, server_addr)
+            if args.streams > 1:
+                self._download_streams(args, protocol, server_addr, payload_size)
+                return
+
             # Handshake
-            handshake(self.sock, args.name, DOWNLOAD, protocol, server_addr, args.verbose, args.quiet)
+            # Al retomar, se piden los bytes que faltan después de los que ya están en dst
+            # Varios nombres se piden juntos, en un bundle (un directorio el servidor lo manda así siempre)
+            resume_offset = read_resume_offset(args.dst) if args.resume else None
+            options = SETUP_OPT_BUNDLE if len(args.name) > 1 else 0
+            _, _, session_id, offset, _, codec, bundle, fec = handshake(self.sock, BUNDLE_NAME_SEP.join(args.name),
+                                                                        DOWNLOAD, protocol, server_addr, args.verbose,
+                                                                        args.quiet, payload_size, resume_offset,
+                                                                        options=options, codec=args.compress,
+                                                                        pace=args.pace, fec=args.fec)
+            self.logger.debug(f"Session: {session_id}")
+            if bundle:
+                self._download_bundle(args, protocol, server_addr, codec, fec)
+                return
             
             # Crear archivo receiver
-            arch = ArchiveRecv(args.dst)
-            end = False
+            arch = ArchiveRecv(args.dst, offset=offset, codec=codec)
             
             # Usar el protocolo especificado
-            if protocol == STOP_AND_WAIT:
-                download(self.sock, arch, server_addr, ACK_TIMEOUT_SW, args.verbose, args.quiet) #GBN CON VENTANA DE 1
-            elif protocol == GO_BACK_N:
-                download(self.sock, arch, server_addr, ACK_TIMEOUT_GBN, args.verbose, args.quiet)
+            _recv_file(self.sock, arch, protocol, server_addr, args, fec, args.ack_every)
                     
             self.logger.info("Download completed successfully")
             
@@ -95,7 +206,184 @@ class FileTransferInterface:
             if self.sock:
                 self.sock.close()
 
+    def _upload_streams(self, args, source_path, protocol, server_addr, payload_size):
+        """
+        Upload en paralelo: el archivo se parte en args.streams rangos y cada uno viaja por su propio
+        socket y su propia sesión (con su ventana), atadas en el servidor por el id de transferencia
+        """
+        if args.resume or args.delta:
+            raise Exception("--resume y --delta no se pueden combinar con --streams")
+        size = os.path.getsize(source_path)
+        transfer_id = random.getrandbits(32)
+        self.logger.info(f"Upload en paralelo: {args.streams} streams, transferencia {transfer_id:#x}")
+
+        def transfer(stream):
+            sock, _ = setup_client_socket(args.host, args.port)
+            try:
+                rtt, payload, session_id, _, _, codec, _, fec = handshake(sock, args.name, UPLOAD, protocol, server_addr,
+                                                                          args.verbose, args.quiet, payload_size,
+                                                                          stream=(transfer_id, stream, args.streams,
+                                                                                  size),
+                                                                          codec=args.compress, fec=args.fec)
+                self.logger.debug(f"Stream {stream}: session {session_id}")
+                arch = ArchiveSender(source_path, payload, *stream_range(size, stream, args.streams), codec=codec)
+                try:
+                    return _send_file(sock, arch, protocol, server_addr, args, rtt, fec)
+                finally:
+                    arch.close()
+            finally:
+                sock.close()
+
+        start = time.time()
+        results = _run_streams(args.streams, transfer)
+        self.logger.info("Upload completed successfully")
+        for stream, stats in enumerate(results):
+            self.logger.info(f"Transfer stats (stream {stream}): {stats}")
+        self.logger.info(f"Transfer stats: {size} bytes en {time.time() - start:.3f}s con {args.streams} streams")
+
+    def _upload_delta(self, args, source_path, protocol, server_addr, payload_size):
+        """
+        Upload delta: se bajan las firmas de la copia que ya tiene el servidor (una sesión download con
+        SETUP_OPT_DELTA), se calculan las diferencias contra source_path y se suben sólo esas (una
+        sesión upload con SETUP_OPT_DELTA). El servidor rearma el archivo y verifica su hash.
+
+        Returns:
+            bool: False si el servidor no tiene el archivo (hay que subirlo entero)
+        """
+        if args.resume:
+            raise Exception("--resume no se puede combinar con --delta")
+        workdir = tempfile.mkdtemp(prefix="delta-")
+        signatures_path = os.path.join(workdir, "signatures")
+        delta_path = os.path.join(workdir, "delta")
+        try:
+            start = time.time()
+            sock, _ = setup_client_socket(args.host, args.port)
+            try:
+                _, _, session_id, _, _, codec, _, fec = handshake(sock, args.name, DOWNLOAD, protocol, server_addr,
+                                                                  args.verbose, args.quiet, payload_size,
+                                                                  options=SETUP_OPT_DELTA, codec=args.compress,
+                                                                  pace=args.pace, fec=args.fec)
+                self.logger.debug(f"Session (firmas): {session_id}")
+                _recv_file(sock, ArchiveRecv(signatures_path, codec=codec), protocol, server_addr, args, fec)
+            except FileNotFoundError:
+                self.logger.info(f"El servidor no tiene {args.name}: se sube entero")
+                return False
+            finally:
+                sock.close()
+            with open(signatures_path, "rb") as f:
+                signatures = f.read()
+
+            literal, copied = compute_delta(source_path, signatures, delta_path)
+            delta_size = os.path.getsize(delta_path)
+            self.logger.info(f"Delta: {literal} bytes nuevos, {copied} reusados del servidor "
+                             f"({len(signatures)} bytes de firmas, {delta_size} de diferencias)")
+
+            rtt, payload, session_id, _, _, codec, _, fec = handshake(self.sock, args.name, UPLOAD, protocol, server_addr,
+                                                                      args.verbose, args.quiet, payload_size,
+                                                                      options=SETUP_OPT_DELTA, codec=args.compress,
+                                                                      fec=args.fec)
+            self.logger.debug(f"Session: {session_id}")
+            arch = ArchiveSender(delta_path, payload, codec=codec)
+            try:
+                stats = _send_file(self.sock, arch, protocol, server_addr, args, rtt, fec)
+            finally:
+                arch.close()
+            self.logger.info("Upload completed successfully")
+            self.logger.info(f"Transfer stats: {stats}")
+            self.logger.info(f"Transfer stats: {literal + copied} bytes con {len(signatures) + delta_size} "
+                             f"transferidos en {time.time() - start:.3f}s")
+            return True
+        finally:
+            for path in (signatures_path, delta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            clear_partial_marker(signatures_path)
+            os.rmdir(workdir)
+
+    def _upload_bundle(self, args, sources, protocol, server_addr, payload_size):
+        """
+        Upload de varios archivos o de un directorio en una sola sesión: los archivos se juntan en un
+        bundle (uno detrás del otro, cada uno con su ruta y su tamaño) que viaja como un único archivo.
+        El servidor lo desarma en el directorio args.name.
+        """
+        if args.resume or args.streams > 1 or args.delta:
+            raise Exception("--resume, --streams y --delta no se pueden combinar con varios archivos")
+        fd, bundle_path = tempfile.mkstemp(suffix=BUNDLE_SUFFIX)
+        os.close(fd)
+        try:
+            start = time.time()
+            files, size = write_bundle(bundle_entries(sources), bundle_path)
+            self.logger.info(f"Bundle: {files} archivos, {size} bytes")
+
+            rtt, payload, session_id, _, _, codec, _, fec = handshake(self.sock, args.name, UPLOAD, protocol, server_addr,
+                                                                      args.verbose, args.quiet, payload_size,
+                                                                      options=SETUP_OPT_BUNDLE, codec=args.compress,
+                                                                      fec=args.fec)
+            self.logger.debug(f"Session: {session_id}")
+            arch = ArchiveSender(bundle_path, payload, codec=codec)
+            try:
+                stats = _send_file(self.sock, arch, protocol, server_addr, args, rtt, fec)
+            finally:
+                arch.close()
+            self.logger.info("Upload completed successfully")
+            self.logger.info(f"Transfer stats: {stats}")
+            if arch.compressor is not None:
+                self.logger.info(f"Compression: {arch.compressor}")
+            self.logger.info(f"Transfer stats: {files} archivos ({size} bytes) en {time.time() - start:.3f}s")
+        finally:
+            os.remove(bundle_path)
+
+    def _download_bundle(self, args, protocol, server_addr, codec, fec=None):
+        """
+        Recibe el bundle que armó el servidor (varios archivos o un directorio) en un archivo temporal y
+        lo desarma en el directorio args.dst
+        """
+        fd, bundle_path = tempfile.mkstemp(suffix=BUNDLE_SUFFIX)
+        os.close(fd)
+        try:
+            start = time.time()
+            _recv_file(self.sock, ArchiveRecv(bundle_path, codec=codec), protocol, server_addr, args, fec,
+                       args.ack_every)
+            if os.path.exists(partial_marker(bundle_path)):
+                raise Exception("el bundle no llegó completo")
+            files, size = extract_bundle(bundle_path, args.dst)
+            self.logger.info("Download completed successfully")
+            self.logger.info(f"Transfer stats: {files} archivos ({size} bytes) en {args.dst} "
+                             f"en {time.time() - start:.3f}s")
+        finally:
+            os.remove(bundle_path)
+            clear_partial_marker(bundle_path)
+
+    def _download_streams(self, args, protocol, server_addr, payload_size):
+        """
+        Download en paralelo: cada stream pide su rango del archivo por su propio socket y lo escribe en
+        su posición de dst. dst queda marcado como incompleto hasta que terminan todos.
+        """
+        if args.resume:
+            raise Exception("--resume no se puede combinar con --streams")
+        transfer_id = random.getrandbits(32)
+        self.logger.info(f"Download en paralelo: {args.streams} streams, transferencia {transfer_id:#x}")
+
+        def transfer(stream):
+            sock, _ = setup_client_socket(args.host, args.port)
+            try:
+                _, _, session_id, _, size, codec, _, fec = handshake(sock, args.name[0], DOWNLOAD, protocol,
+                                                                     server_addr, args.verbose, args.quiet, payload_size,
+                                                                     stream=(transfer_id, stream, args.streams, 0),
+                                                                     codec=args.compress, pace=args.pace, fec=args.fec)
+                self.logger.debug(f"Stream {stream}: session {session_id}")
+                offset = stream_range(size, stream, args.streams)[0]
+                _recv_file(sock, ArchiveRecv(args.dst, offset=offset, size=size, codec=codec), protocol, server_addr,
+                           args, fec, args.ack_every)
+                return size
+            finally:
+                sock.close()
 
+        start = time.time()
+        size = _run_streams(args.streams, transfer)[0]
+        clear_partial_marker(args.dst)
+        self.logger.info("Download completed successfully")
+        self.logger.info(f"Transfer stats: {size} bytes en {time.time() - start:.3f}s con {args.streams} streams")
 
 
 def main():
@@ -1,6 +1,18 @@
 UDP_IP_LOCALHOST = "127.0.0.1"
 SIZE_PKG = 1000
 
+# Tamaño de los datos por paquete, negociable en el handshake
+HEADER_SIZE = 7                                 # [flag_end:1][data_len:2][pkg_id:4]
+IP_UDP_HEADERS = 28                             # IPv4 (20) + UDP (8)
+MAX_UDP_PAYLOAD = 65507
+MIN_PAYLOAD_SIZE = 256
+MAX_PAYLOAD_SIZE = MAX_UDP_PAYLOAD - HEADER_SIZE
+PAYLOAD_AUTO = "auto"                           # usar el MTU del camino
+# Modo adaptativo: se mide la pérdida cada ADAPTIVE_EPOCH paquetes enviados
+ADAPTIVE_EPOCH = 64
+ADAPTIVE_LOSS_HIGH = 0.05                       # con más pérdida se achican los paquetes a la mitad
+ADAPTIVE_LOSS_LOW = 0.01                        # con menos pérdida se agrandan al doble
+
 # Usar localhost para Windows
 UDP_IP = "127.0.0.1"
 UDP_PORT = 5005
@@ -16,10 +28,143 @@ UPLOAD = "U"
 
 ACK_TIMEOUT_GBN = 0.05  
 ACK_TIMEOUT_SW = 0.05
+ACK_TIMEOUT_SR = 0.05
+
+# Límites del RTO calculado a partir del RTT medido
+INITIAL_RTO = 0.1
+MIN_RTO = 0.02
+MAX_RTO = 1.0
 
 STOP_AND_WAIT = "SW"
 GO_BACK_N = "GBN"
+SELECTIVE_REPEAT = "SR"
 
 PROTOCOLO = STOP_AND_WAIT
-WINDOW_SIZE_GBN = 10
-WINDOW_SIZE_SW = 1
\ No newline at end of file
+# Tope de la ventana, el tamaño real lo decide el control de congestión
+WINDOW_SIZE_GBN = 128
+WINDOW_SIZE_SW = 1
+WINDOW_SIZE_SR = 128
+
+# Control de congestión
+RENO = "reno"
+CUBIC = "cubic"
+CONGESTION_CONTROL = RENO
+INITIAL_CWND = 10
+# ACKs duplicados (o paquetes confirmados por SACK) que indican una pérdida
+DUP_ACK_THRESHOLD = 3
+
+# Los pkg_ids 0, 1 y 2 eran los ACKs del handshake de tres mensajes, los datos empiezan en 3
+FIRST_DATA_PKG_ID = 3
+
+# Handshake de un RTT: SETUP del cliente y SETUP-ACK del servidor (ver protocol/setup.py).
+# El primer byte los distingue de los paquetes de datos (flags en los bits bajos) y de los ACKs
+SETUP_VERSION = 1
+SETUP_KIND = 0xF0
+SETUP_ACK_KIND = 0xF1
+# Estado del SETUP-ACK
+SETUP_OK = 0
+SETUP_NOT_FOUND = 1         # download de un archivo que no está en el servidor
+SETUP_BAD_REQUEST = 2       # versión o protocolo desconocidos
+SETUP_BUSY = 3              # upload de un archivo que se está descargando
+SETUP_MAX_RETRIES = 70
+# Opciones del SETUP / SETUP-ACK (bits del byte de opciones)
+SETUP_OPT_RESUME = 0x01     # el mensaje lleva además el offset desde el que se retoma la transferencia
+SETUP_OPT_STREAM = 0x02     # una de las sesiones de una transferencia en paralelo (ver protocol/setup.py)
+MAX_STREAMS = 16            # sesiones en paralelo por transferencia
+SETUP_OPT_DELTA = 0x04      # upload delta: un download con esta opción pide las firmas del archivo, un upload
+                            # con esta opción manda las diferencias contra la copia del servidor (ver protocol/delta.py)
+
+# Tabla de sesiones del servidor: el id de conexión que va en el SETUP-ACK es
+# (generación << SESSION_SLOT_BITS) | slot, así un slot liberado se reusa con otro id
+SESSION_SLOT_BITS = 16
+MAX_SESSIONS = 1 << SESSION_SLOT_BITS
+SESSION_IDLE_TIMEOUT = 30.0     # segundos sin recibir paquetes del cliente antes de cerrar la sesión
+SESSION_REAP_INTERVAL = 5.0     # cada cuánto se buscan sesiones inactivas
+
+# Buffer de recepción (alcanza para el datagrama UDP más grande) y máximo de lecturas
+# por vuelta del event loop del servidor
+RECV_BUFFER_SIZE = 65535
+READ_BATCH = 64
+
+# ACK con SACK: [ack:4][cantidad de bloques:1][primero:4][último:4]...
+ACK_SIZE = 4
+SACK_MAX_BLOCKS = 4
+# ACKs demorados del receptor de GBN: un ACK cada ACK_EVERY paquetes en orden, o ACK_DELAY segundos después
+# del primero sin confirmar. Los que llegan fuera de orden, llenan un hueco o están repetidos se confirman enseguida
+ACK_EVERY = 2
+ACK_DELAY = 0.005
+
+# I/O en lotes (UDP GSO/GRO en Linux): máximo de segmentos por envío y buffer de lectura con GRO
+GSO_MAX_SEGMENTS = 64
+GRO_BUFFER_SIZE = 65535
+
+# Escritura diferida del receptor: los datos se juntan en bloques de WRITE_BLOCK_SIZE bytes
+# y en segundo plano hay a lo sumo WRITE_BEHIND_MAX_PENDING bloques por archivo sin escribir,
+# repartidos entre WRITE_BEHIND_WORKERS hilos de escritura (uno por archivo a la vez)
+WRITE_BLOCK_SIZE = 1024 * 1024
+WRITE_BEHIND_MAX_PENDING = 4
+WRITE_BEHIND_WORKERS = 4
+
+# Transferencias retomables: mientras un archivo se recibe, "<archivo>.part" guarda cuántos bytes
+# contiguos desde el principio ya están escritos
+PARTIAL_SUFFIX = ".part"
+# Streams de una transferencia en paralelo que ya recibieron su rango entero (una línea por stream)
+STREAMS_SUFFIX = ".streams"
+
+# Upload delta (estilo rsync): el archivo del servidor se firma en bloques de entre DELTA_MIN_BLOCK y
+# DELTA_MAX_BLOCK bytes, y las diferencias que manda el cliente se reciben en "<archivo>.delta"
+DELTA_MIN_BLOCK = 2048
+DELTA_MAX_BLOCK = 64 * 1024
+DELTA_SUFFIX = ".delta"
+
+# Compresión de los paquetes de datos, negociada en el handshake (ver protocol/compression.py). Un paquete
+# comprimido lleva FLAG_COMPRESSED en el primer byte del header (el bit 0 es flag_end)
+SETUP_OPT_COMPRESS = 0x08   # el SETUP lleva además [códec:1]; el SETUP-ACK la devuelve si acepta el códec
+FLAG_COMPRESSED = 0x02
+COMPRESS_ZLIB = "zlib"
+COMPRESS_BZ2 = "bz2"
+COMPRESS_LZMA = "lzma"
+COMPRESS_INITIAL_RATIO = 2.0    # relación de compresión supuesta para el primer paquete
+COMPRESS_MAX_RATIO = 16         # tope de bytes del archivo por paquete (en múltiplos de los datos por paquete)
+COMPRESS_USEFUL_RATIO = 0.9     # un paquete se manda comprimido si ocupa a lo sumo esta fracción de sus datos
+COMPRESS_GIVE_UP = 4            # paquetes seguidos que no se achican antes de dejar de comprimir
+COMPRESS_SAMPLE_INTERVAL = 256  # paquetes sin comprimir antes de volver a probar con uno
+
+# Varios archivos (o un directorio) en una sola sesión: se mandan uno detrás de otro en un "bundle"
+# (ver protocol/bundle.py), que el receptor guarda en "<destino>.bundle" y después desarma
+SETUP_OPT_BUNDLE = 0x10     # un upload con esta opción manda un bundle para el directorio del nombre, un download
+                            # pide los archivos de la lista (nombres separados por BUNDLE_NAME_SEP); el SETUP-ACK la
+                            # devuelve cuando lo que viaja es un bundle (también al descargar un directorio)
+BUNDLE_NAME_SEP = "\0"
+BUNDLE_SUFFIX = ".bundle"
+
+# Pacing del emisor (ver protocol/pacing.py): los paquetes salen repartidos a lo largo del RTT con un token
+# bucket en lugar de salir en ráfagas de una ventana entera
+PACE_AUTO = "auto"              # seguir la ventana y el ritmo de entrega medido
+PACE_OFF = "off"                # sin pacing: la ventana sale entera de una vez
+PACING_GAIN_STARTUP = 2.0       # ritmo sobre lo medido en slow start (la ventana se duplica por RTT)
+PACING_GAIN = 1.25              # ritmo sobre lo medido después de slow start
+PACING_RATE_SAMPLES = 10        # muestras del ritmo de entrega (una por RTT) de las que se toma el máximo
+PACING_BURST_TIME = 0.005       # el bucket junta a lo sumo los bytes de este tiempo al ritmo actual...
+PACING_MIN_BURST = 2            # ...y al menos estos paquetes
+SETUP_OPT_PACE = 0x20           # un download con esta opción lleva además [ritmo:4] en kbit/s para el servidor
+                                # (PACE_SETUP_OFF o PACE_SETUP_AUTO); el SETUP-ACK la devuelve
+PACE_SETUP_OFF = 0
+PACE_SETUP_AUTO = 0xFFFFFFFF
+
+# Corrección de errores (FEC), negociada en el handshake (ver protocol/fec.py): por cada bloque de K paquetes de
+# datos el emisor manda M paquetes de paridad (XOR), con los que el receptor rearma una pérdida por grupo sin
+# esperar la retransmisión. Un paquete de paridad lleva FLAG_PARITY en el primer byte del header
+SETUP_OPT_FEC = 0x40        # el SETUP lleva además [K:1][M:1]; el SETUP-ACK la devuelve si el servidor acepta
+FLAG_PARITY = 0x04
+FEC_MAX_BLOCK = 64          # tope de K (paquetes de datos por bloque)
+FEC_KEPT_BLOCKS = 64        # bloques hacia atrás que el receptor sigue intentando rearmar
+
+# Salida del servidor (ver server/scheduler.py): los paquetes de datos de cada sesión esperan en su propia cola
+# y un scheduler elige de cuál sale el próximo; los ACKs y el handshake no hacen cola
+SCHEDULER_DRR = "drr"       # deficit round robin: por ronda cada sesión manda hasta DRR_QUANTUM bytes
+SCHEDULER_SRPT = "srpt"     # primero la sesión a la que le quedan menos bytes (favorece las transferencias chicas)
+SCHEDULER = SCHEDULER_DRR
+DRR_QUANTUM = 16 * 1024
+SEND_QUEUE_MAX = 512        # paquetes en cola por sesión, los que no entran se descartan (como una pérdida)
+SEND_BATCH = 256            # paquetes por vuelta del event loop, después se atienden las lecturas
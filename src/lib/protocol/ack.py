@@ -0,0 +1,141 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import ACK_SIZE, SACK_MAX_BLOCKS, ACK_EVERY, ACK_DELAY, WINDOW_SIZE_SW
+
+
+def encode_ack(ack_num, sack_blocks=()):
+    """
+    Arma un ACK. Sin bloques es el ACK de siempre (4 bytes), con bloques se agrega
+    la cantidad de bloques (1 byte) y cada rango recibido fuera de orden.
+    Formato: [ack_num:4bytes][n:1byte][primero:4bytes][último:4bytes]...
+
+    Args:
+        ack_num: ACK acumulativo
+        sack_blocks: Rangos (primero, último) de pkg_ids ya recibidos, inclusive
+
+    Returns:
+        bytes: el ACK a enviar
+    """
+    ack = ack_num.to_bytes(ACK_SIZE, "big")
+    if not sack_blocks:
+        return ack
+    blocks = sack_blocks[:SACK_MAX_BLOCKS]
+    parts = [ack, len(blocks).to_bytes(1, "big")]
+    for first, last in blocks:
+        parts.append(first.to_bytes(4, "big"))
+        parts.append(last.to_bytes(4, "big"))
+    return b"".join(parts)
+
+
+def decode_ack(pkg):
+    """
+    Desarma un ACK (con o sin bloques SACK)
+
+    Returns:
+        tuple | None: (ack_num, [(primero, último), ...]) o None si no es un ACK válido
+    """
+    if len(pkg) == ACK_SIZE:
+        return int.from_bytes(pkg, "big"), []
+    if len(pkg) < ACK_SIZE + 1:
+        return None
+
+    n_blocks = pkg[ACK_SIZE]
+    if n_blocks == 0 or len(pkg) != ACK_SIZE + 1 + 8 * n_blocks:
+        return None
+
+    blocks = []
+    offset = ACK_SIZE + 1
+    for _ in range(n_blocks):
+        first = int.from_bytes(pkg[offset:offset + 4], "big")
+        last = int.from_bytes(pkg[offset + 4:offset + 8], "big")
+        if first > last:
+            return None
+        blocks.append((first, last))
+        offset += 8
+    return int.from_bytes(pkg[:ACK_SIZE], "big"), blocks
+
+
+class DelayedAck:
+    """
+    Política de ACKs del receptor de GBN: como los ACKs son acumulativos, no hace falta confirmar cada
+    paquete. Los paquetes en orden se confirman de a every, o a los delay segundos del primero sin
+    confirmar; los que llegan fuera de orden, llenan un hueco o están repetidos se confirman enseguida
+    (son los que el emisor necesita para detectar y recuperar pérdidas).
+    No hace I/O: el loop del receptor le pregunta si mandar el ACK y cuánto puede esperar.
+    """
+
+    def __init__(self, every=ACK_EVERY, delay=ACK_DELAY):
+        """
+        Inicializa la política
+
+        Args:
+            every: Paquetes en orden por ACK
+            delay: Máximo de segundos que se demora un ACK
+        """
+        self.every = every
+        self.delay = delay
+        self.pending = 0            # paquetes recibidos sin confirmar
+        self.deadline = None        # cuándo vence la demora del ACK pendiente
+        self.pkgs = 0
+        self.acks = 0
+
+    def on_packet(self, in_order, now):
+        """
+        Cuenta un paquete recibido
+
+        Args:
+            in_order: True si llegó en orden y sin huecos pendientes (GoBackNReceiver.in_order)
+            now: Momento de llegada
+
+        Returns:
+            bool: True si hay que mandar el ACK ahora (y después avisar con sent())
+        """
+        self.pkgs += 1
+        self.pending += 1
+        if self.deadline is None:
+            self.deadline = now + self.delay
+        return not in_order or self.pending >= self.every or now >= self.deadline
+
+    def sent(self):
+        """
+        Se mandó un ACK: confirma todo lo pendiente
+        """
+        self.acks += 1
+        self.pending = 0
+        self.deadline = None
+
+    def expired(self, now):
+        """
+        True si hay un ACK demorado que ya hay que mandar
+        """
+        return self.deadline is not None and now >= self.deadline
+
+    def timeout(self, now, timeout):
+        """
+        Cuánto esperar el próximo paquete: timeout, o menos si vence antes la demora del ACK pendiente
+        """
+        if self.deadline is None:
+            return timeout
+        return min(timeout, max(self.deadline - now, 0.001))
+
+    def __str__(self):
+        return f"ACKs={self.acks} para {self.pkgs} paquetes (uno cada {self.every} en orden, demora {self.delay * 1000:g} ms)"
+
+
+def create_ack_policy(every, window_sz):
+    """
+    Crea la política de ACKs de un receptor de GBN
+
+    Args:
+        every: Paquetes en orden por ACK (ACK_EVERY por defecto)
+        window_sz: Ventana del receptor
+
+    Returns:
+        DelayedAck | None: None si se confirma cada paquete (every 1, o Stop and Wait: con ventana de 1 el
+        emisor espera cada ACK)
+    """
+    if every <= 1 or window_sz <= WINDOW_SIZE_SW:
+        return None
+    return DelayedAck(every)
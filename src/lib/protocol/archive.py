@@ -1,75 +1,348 @@
+import mmap
+import struct
 import sys
 import os
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
-from lib.constants import SIZE_PKG
+from lib.constants import (
+    SIZE_PKG, HEADER_SIZE, WRITE_BLOCK_SIZE, WRITE_BEHIND_MAX_PENDING, WRITE_BEHIND_WORKERS, PARTIAL_SUFFIX,
+    STREAMS_SUFFIX, FLAG_COMPRESSED
+)
+from lib.protocol.compression import PacketCompressor, compress, decompress
+
+# [flags:1byte][data_len:2bytes][pkg_id:4bytes]; flags: bit 0 flag_end, bit 1 FLAG_COMPRESSED
+HEADER = struct.Struct(">BHI")
+
+_write_behind = None
+
+
+def _write_behind_executor():
+    """
+    Hilos que escriben a disco en segundo plano, compartidos por todos los archivos. Cada archivo
+    ocupa a lo sumo uno a la vez (ver ArchiveRecv._run_writes): sus bloques se escriben en orden y
+    un archivo con el disco lento no demora a los demás mientras queden hilos libres
+    """
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = ThreadPoolExecutor(max_workers=WRITE_BEHIND_WORKERS, thread_name_prefix="write-behind")
+    return _write_behind
+
+
+def _write_all(archivo, data):
+    """
+    Escribe data completo (un write sin buffer puede escribir menos de lo pedido)
+    """
+    data = memoryview(data)
+    while data:
+        data = data[archivo.write(data):]
+
+
+def _pwrite_all(fd, data, position):
+    """
+    Escribe data completo en la posición position del archivo, sin mover su posición actual
+    (los streams de una transferencia en paralelo escriben cada uno su rango del mismo archivo)
+    """
+    data = memoryview(data)
+    while data:
+        written = os.pwrite(fd, data, position)
+        data = data[written:]
+        position += written
+
+
+def partial_marker(path):
+    """
+    Path del marcador de archivo incompleto de path
+    """
+    return path + PARTIAL_SUFFIX
+
+
+def read_resume_offset(path):
+    """
+    Desde dónde se puede retomar la recepción de path: los bytes contiguos que guarda su marcador
+    de archivo incompleto (acotados al tamaño del archivo)
+
+    Returns:
+        int: el offset, 0 si no hay marcador (no hay nada que retomar)
+    """
+    try:
+        with open(partial_marker(path)) as f:
+            offset = int(f.read())
+        return max(0, min(offset, os.path.getsize(path)))
+    except (OSError, ValueError):
+        return 0
+
+
+def _save_offset(marker, offset):
+    """
+    Guarda el offset en el marcador (reemplazándolo de una vez, así nunca queda a medio escribir)
+    """
+    tmp = marker + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(str(offset))
+    os.replace(tmp, marker)
+
+
+def clear_partial_marker(path):
+    """
+    Borra el marcador de archivo incompleto de path (si lo tiene) y el registro de sus streams:
+    el archivo ya está entero
+    """
+    for marker in (partial_marker(path), path + STREAMS_SUFFIX):
+        try:
+            os.remove(marker)
+        except FileNotFoundError:
+            pass
+
+
+def mark_stream_done(path, transfer_id, stream, streams):
+    """
+    Anota que un stream de una transferencia en paralelo recibió su rango entero, y si era el último
+    marca el archivo como completo. Los streams pueden terminar en distintos procesos del servidor
+    (--workers), así que la cuenta vive en un archivo al lado de path: cada stream le agrega una
+    línea (un append chico es atómico) y después lo lee entero.
+
+    Args:
+        path: Archivo recibido
+        transfer_id: Id de la transferencia en paralelo
+        stream: Índice del stream que terminó
+        streams: Cantidad de streams de la transferencia
+
+    Returns:
+        bool: True si ya terminaron todos los streams
+    """
+    record = path + STREAMS_SUFFIX
+    tag = f"{transfer_id:08x}"
+    fd = os.open(record, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, f"{tag} {stream}\n".encode())
+    finally:
+        os.close(fd)
+    with open(record) as f:
+        done = {line.split()[1] for line in f if line.split()[0] == tag}
+    if len(done) < streams:
+        return False
+    clear_partial_marker(path)
+    return True
+
+
+def _write_and_mark(archivo, data, marker, offset):
+    """
+    Escribe data y recién después anota en el marcador hasta dónde está escrito el archivo
+    """
+    _write_all(archivo, data)
+    _save_offset(marker, offset)
 
 
 class ArchiveSender:
     """
     Clase para enviar archivos en paquetes UDP
     Maneja el empaquetado de datos según el protocolo (SW o GBN)
+    El archivo se mapea en memoria (mmap): cualquier paquete se puede rearmar a partir de su
+    pkg_id, así los emisores guardan sólo números de secuencia y no copias de los paquetes en vuelo.
+    Con compresión cada paquete lleva una cantidad distinta de bytes del archivo: se guarda la
+    posición de cada uno (8 bytes por paquete) y al reenviarlo se vuelve a comprimir.
     """
     
-    def __init__(self, path):
+    def __init__(self, path, chunk_size=SIZE_PKG, offset=0, length=None, data=None, codec=None):
         """
         Inicializa el sender de archivos
         
         Args:
-            path: Ruta del archivo a enviar
+            path: Ruta del archivo a enviar (None si se pasa data)
+            chunk_size: Bytes de datos por paquete (se puede cambiar durante la transferencia)
+            offset: Posición desde la que se envía (para retomar una transferencia)
+            length: Bytes a enviar desde offset (un stream de una transferencia en paralelo envía
+                sólo su rango), None para enviar hasta el final
+            data: Contenido a enviar desde memoria en lugar de un archivo (p.ej. las firmas de un
+                upload delta)
+            codec: Códec negociado para comprimir los paquetes, None para mandarlos sin comprimir
         """
-        self.archivo = open(path, "rb")
-        self.last_pkg_sent = 0
-        self.archivo.seek(0)
-        print(f"ArchiveSender inicializado: last_pkg_sent = {self.last_pkg_sent}, posicion={self.archivo.tell()}")
+        self.archivo = open(path, "rb") if data is None else None
+        self.size = os.fstat(self.archivo.fileno()).st_size if data is None else len(data)
+        self.mm = mmap.mmap(self.archivo.fileno(), 0, access=mmap.ACCESS_READ) if data is None and self.size else None
+        if data is not None:
+            self.data = memoryview(data)
+        else:
+            self.data = memoryview(self.mm) if self.mm is not None else memoryview(b"")
+        self.chunk_size = chunk_size
+        self.offset = min(offset, self.size)   # posición del próximo paquete nuevo
+        self.limit = self.size if length is None else min(self.offset + length, self.size)   # fin de lo que se envía
+        self.segments = []          # (primer pkg_id, posición, chunk_size) cada vez que cambia el tamaño
+        self.end_pkg_id = None
+        self.compressor = PacketCompressor(codec) if codec is not None else None
+        self.first_pkg_id = None    # con compresión: pkg_id del primer paquete,
+        self.pkg_offsets = array("Q")   # la posición de cada paquete
+        self.pkg_compressed = bytearray()   # y si va comprimido
 
     def next_pkg_go_back_n(self, seq_num=0):
         """
         Genera el siguiente paquete para Go Back N
         Formato: [flag_end:1bit][data_len:2bytes][pkg_id:4bytes][data:variable]
+        Los datos salen directo del mapeo del archivo (una sola copia, al armar el paquete)
         
         Args:
-            seq_num: Número de secuencia del paquete
+            seq_num: Número de secuencia del paquete (consecutivo al anterior)
             
         Returns:
             tuple: (paquete, pkg_id) o (None, None) si no hay más datos
         """
-        data = self.archivo.read(SIZE_PKG)
-        if not data:
+        if self.offset >= self.limit:
             return None, None
+        if self.compressor is not None:
+            return self._next_compressed_pkg(seq_num), seq_num
+        if not self.segments or self.segments[-1][2] != self.chunk_size:
+            self.segments.append((seq_num, self.offset, self.chunk_size))
 
-        pkg_id = seq_num.to_bytes(4, "big")
-        
-        # Crear header con flag_end en el primer byte
-        first_byte = 0  # flag_end = 0 para datos normales
-        header = first_byte.to_bytes(1, "big")
-        header += len(data).to_bytes(2, "big")          # tamaño de datos
-        header += pkg_id                                
-        pkg = header + data
-        print(f"next_pkg_go_back_n: flag_end=0, seq_num={seq_num}, pkg_id={int.from_bytes(pkg_id, 'big')}")
-        return pkg, pkg_id
+        data_len = min(self.chunk_size, self.limit - self.offset)
+        pkg = self._data_pkg(seq_num, self.offset, data_len)
+        self.offset += data_len
+        return pkg, seq_num
+
+    def pkg(self, seq_num):
+        """
+        Rearma un paquete ya generado (para reenviarlo) a partir de su pkg_id
+
+        Returns:
+            bytes: el paquete, igual al que se generó la primera vez
+        """
+        if seq_num == self.end_pkg_id:
+            return self.end_pkg(seq_num)[0]
+        if self.compressor is not None:
+            return self._compressed_pkg(seq_num)
+        for first_pkg_id, offset, chunk_size in reversed(self.segments):
+            if seq_num >= first_pkg_id:
+                offset += (seq_num - first_pkg_id) * chunk_size
+                return self._data_pkg(seq_num, offset, min(chunk_size, self.limit - offset))
+        raise ValueError(f"pkg_id {seq_num} todavía no generado")
+
+    def _data_pkg(self, seq_num, offset, data_len):
+        header = HEADER.pack(0, data_len, seq_num)  # flag_end = 0 para datos normales
+        return b"".join((header, self.data[offset:offset + data_len]))
+
+    def _next_compressed_pkg(self, seq_num):
+        """
+        Genera el siguiente paquete con compresión: comprimido si los datos se achican, si no
+        como un paquete normal
+        """
+        if self.first_pkg_id is None:
+            self.first_pkg_id = seq_num
+        payload, raw_len = self.compressor.pack(self.data, self.offset, self.limit, self.chunk_size)
+        self.pkg_offsets.append(self.offset)
+        self.pkg_compressed.append(payload is not None)
+        if payload is None:
+            raw_len = min(self.chunk_size, self.limit - self.offset)
+            pkg = self._data_pkg(seq_num, self.offset, raw_len)
+        else:
+            pkg = b"".join((HEADER.pack(FLAG_COMPRESSED, len(payload), seq_num), payload))
+        self.offset += raw_len
+        return pkg
+
+    def _compressed_pkg(self, seq_num):
+        """
+        Rearma un paquete generado con compresión (los códecs son deterministas: sale igual)
+        """
+        i = seq_num - self.first_pkg_id if self.first_pkg_id is not None else -1
+        if not 0 <= i < len(self.pkg_offsets):
+            raise ValueError(f"pkg_id {seq_num} todavía no generado")
+        start = self.pkg_offsets[i]
+        end = self.pkg_offsets[i + 1] if i + 1 < len(self.pkg_offsets) else self.offset
+        if not self.pkg_compressed[i]:
+            return self._data_pkg(seq_num, start, end - start)
+        payload = compress(self.compressor.codec, self.data[start:end])
+        return b"".join((HEADER.pack(FLAG_COMPRESSED, len(payload), seq_num), payload))
+
+    def end_pkg(self, seq_num):
+        """
+        Genera el paquete END (flag_end = 1, sin datos)
+
+        Args:
+            seq_num: Número de secuencia del paquete END
+
+        Returns:
+            tuple: (paquete, pkg_id)
+        """
+        self.end_pkg_id = seq_num
+        pkg = HEADER.pack(1, 0, seq_num)  # flag_end = 1 para END
+        return pkg, seq_num
+
+    def close(self):
+        self.data.release()
+        if self.mm is not None:
+            self.mm.close()
+        if self.archivo is not None:
+            self.archivo.close()
 
 
 class ArchiveRecv:
     """
     Clase para recibir archivos en paquetes UDP
     Maneja el desempaquetado de datos según el protocolo (SW o GBN)
+    Los datos se escriben diferidos: se juntan en bloques de WRITE_BLOCK_SIZE bytes y cada bloque
+    sale en una sola escritura (opcionalmente desde un hilo en segundo plano; quien recibe espera
+    con write_backlog cuando hay demasiados bloques pendientes). Recién close() garantiza que todo
+    está en disco.
+    Hasta que se cierra con complete=True el archivo tiene al lado su marcador de incompleto, con
+    los bytes ya escritos: una transferencia cortada se retoma desde ahí (ver read_resume_offset).
+    Con size se recibe sólo un rango del archivo (un stream de una transferencia en paralelo): cada
+    bloque se escribe con os.pwrite en su posición, así varios ArchiveRecv llenan el mismo archivo a
+    la vez. El marcador queda en 0 hasta que terminan todos los streams (ver mark_stream_done).
     """
     
-    def __init__(self, path):
+    def __init__(self, path, background=False, offset=0, size=None, codec=None):
         """
         Inicializa el receptor de archivos
         
         Args:
             path: Ruta donde guardar el archivo recibido
+            background: Escribir los bloques desde el hilo de escritura en segundo plano
+            offset: Bytes ya recibidos en una transferencia anterior (se conservan y se sigue desde ahí),
+                o el comienzo del rango si se pasa size
+            size: Tamaño del archivo entero cuando se recibe sólo el rango que empieza en offset
+            codec: Códec negociado para los paquetes comprimidos, None si no se negoció compresión
         """
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        self.archivo = open(path, "wb")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.ranged = size is not None
+        # sin buffer: los bloques los arma write_data
+        if self.ranged:
+            # No se trunca: los otros streams pueden estar escribiendo sus rangos
+            self.archivo = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b", buffering=0)
+            if os.fstat(self.archivo.fileno()).st_size != size:
+                os.ftruncate(self.archivo.fileno(), size)
+        elif offset:
+            self.archivo = open(path, "r+b", buffering=0)
+            self.archivo.truncate(offset)   # lo que pasaba del marcador puede estar incompleto
+            self.archivo.seek(offset)
+        else:
+            self.archivo = open(path, "wb", buffering=0)
+        self.path = path
+        self.marker = partial_marker(path)
+        self.written = offset       # posición del archivo hasta la que ya se entregaron datos para escribir
+        if self.ranged:
+            # Todos los streams escriben lo mismo: se escribe directo, sin reemplazar el marcador
+            with open(self.marker, "w") as f:
+                f.write("0")
+        else:
+            _save_offset(self.marker, offset)
+        self.background = background
+        self.codec = codec
+        self.block = bytearray()    # datos todavía sin escribir
+        self.pending = deque()      # escrituras en segundo plano sin terminar
+        self.queued = deque()       # (escritura, argumentos, futuro) que el hilo todavía no empezó
+        self.writing = False        # hay un hilo de escritura atendiendo este archivo
+        self.write_error = None     # primer error de las escrituras en segundo plano
+        self.lock = threading.Lock()
+        self.closed = False
 
     def recv_pckg_go_back_n(self, msg):
         """
         Desempaqueta un paquete de Go Back N
         Formato: [flag_end:1bit][data_len:2bytes][pkg_id:4bytes][data:variable]
+        data es un memoryview sobre msg: los datos llegan al archivo sin copiarse. Un paquete
+        comprimido (FLAG_COMPRESSED) se descomprime acá; si no se puede, se descarta como uno roto.
         
         Args:
             msg: Paquete recibido
@@ -77,15 +350,123 @@ class ArchiveRecv:
         Returns:
             tuple: (flag_end, data_len, pkg_id, data)
         """
-        first_byte = msg[0]
+        if len(msg) < HEADER_SIZE:
+            return 0, -1, 0, b""
+        first_byte, data_len, pkg_id = HEADER.unpack_from(msg)
         flag_end = first_byte & 1        # Extraer bit 0
-        data_len = int.from_bytes(msg[1:3], "big") 
-        pkg_id = int.from_bytes(msg[3:7], "big")
-        data = msg[7:7+data_len]
+        data = memoryview(msg)[HEADER_SIZE:HEADER_SIZE + data_len]
         if (data_len != len(data)):
             data_len = -1
+        elif first_byte & FLAG_COMPRESSED:
+            try:
+                data = decompress(self.codec, data)
+            except ValueError:
+                data_len = -1
         return flag_end, data_len, pkg_id, data
 
     def write_data(self, data):
-        self.archivo.write(data)
-        self.archivo.flush()
\ No newline at end of file
+        """
+        Agrega los datos al bloque actual y lo escribe cuando se completa
+        """
+        self.block += data
+        if len(self.block) >= WRITE_BLOCK_SIZE:
+            self._write_block(len(self.block) - len(self.block) % WRITE_BLOCK_SIZE)
+
+    def _write_block(self, size):
+        """
+        Escribe los primeros size bytes del bloque (múltiplo de WRITE_BLOCK_SIZE, salvo al cerrar,
+        así las escrituras quedan alineadas) y deja el resto para la próxima
+        """
+        position = self.written
+        self.written += size
+        if not self.background and not self.ranged:
+            with memoryview(self.block) as view:
+                _write_and_mark(self.archivo, view[:size], self.marker, self.written)
+            del self.block[:size]
+            return
+
+        # El bloque se escribe aparte (en el hilo de escritura si background) y se sigue en uno nuevo
+        block, self.block = self.block, self.block[size:]
+        del block[size:]
+        if self.ranged:
+            self._submit(_pwrite_all, self.archivo.fileno(), block, position)
+        else:
+            self._submit(_write_and_mark, self.archivo, block, self.marker, self.written)
+
+    def _submit(self, write, *args):
+        """
+        Escribe en el hilo de escritura si background, si no en el momento.
+        Nunca espera al disco: el receptor frena cuando hay demasiados bloques pendientes con
+        write_backlog, sin bloquear el loop del servidor.
+        """
+        if not self.background:
+            write(*args)
+            return
+        future = Future()
+        # Ya empezada: si se cancela la espera del receptor, el bloque igual se escribe
+        future.set_running_or_notify_cancel()
+        with self.lock:
+            self.queued.append((write, args, future))
+            start, self.writing = not self.writing, True
+        if start:
+            _write_behind_executor().submit(self._run_writes)
+        self.pending.append(future)
+
+    def _run_writes(self):
+        """
+        Escribe en orden los bloques encolados del archivo (corre en un hilo de escritura).
+        Después de un error no se escribe más: el marcador no puede pasar por encima de un bloque
+        que faltó.
+        """
+        while True:
+            with self.lock:
+                if not self.queued:
+                    self.writing = False
+                    return
+                write, args, future = self.queued.popleft()
+            if self.write_error is not None:
+                future.set_exception(self.write_error)
+                continue
+            try:
+                future.set_result(write(*args))
+            except BaseException as e:
+                self.write_error = e
+                future.set_exception(e)
+
+    def write_backlog(self):
+        """
+        Escritura a esperar antes de seguir recibiendo: la más vieja sin terminar, si hay más de
+        WRITE_BEHIND_MAX_PENDING bloques pendientes. También propaga los errores de las escrituras
+        ya terminadas.
+
+        Returns:
+            concurrent.futures.Future | None: La escritura a esperar, o None si se puede seguir
+        """
+        while self.pending and self.pending[0].done():
+            self.pending.popleft().result()
+        if len(self.pending) > WRITE_BEHIND_MAX_PENDING:
+            return self.pending[0]
+        return None
+
+    def close(self, sync=True, complete=False):
+        """
+        Escribe lo pendiente y cierra el archivo. Se puede llamar más de una vez.
+
+        Args:
+            sync: Hacer fsync antes de cerrar (el archivo queda en disco al volver)
+            complete: Se recibió el archivo entero: se borra el marcador de incompleto
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.block:
+                self._write_block(len(self.block))
+            while self.pending:
+                self.pending.popleft().result()
+            if sync:
+                os.fsync(self.archivo.fileno())
+        finally:
+            self.archivo.close()
+        if complete and not self.ranged:
+            clear_partial_marker(self.path)
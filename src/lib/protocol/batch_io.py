@@ -0,0 +1,98 @@
+import socket
+import struct
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import GSO_MAX_SEGMENTS, GRO_BUFFER_SIZE, RECV_BUFFER_SIZE, MAX_UDP_PAYLOAD
+
+# Valores de Linux (el módulo socket no siempre exporta las constantes)
+SOL_UDP = getattr(socket, "SOL_UDP", 17)
+UDP_SEGMENT = getattr(socket, "UDP_SEGMENT", 103)
+UDP_GRO = getattr(socket, "UDP_GRO", 104)
+
+
+class BatchSocket:
+    """
+    Envío y recepción de datagramas en lotes sobre un socket UDP.
+    - Envío: los paquetes consecutivos del mismo tamaño hacia la misma dirección salen en un
+      único sendmsg con UDP_SEGMENT (GSO), el kernel los separa en datagramas.
+    - Recepción: con UDP_GRO el kernel junta varios datagramas del mismo origen en una sola
+      lectura, que acá se vuelve a separar.
+    Si el sistema no soporta GSO/GRO se usa un sendto/recvfrom por paquete.
+    Los datagramas de una lectura agrupada se devuelven como memoryviews sobre lo leído, sin copiarlos.
+    """
+
+    gso_supported = sys.platform.startswith("linux") and hasattr(socket.socket, "sendmsg")
+
+    def __init__(self, sock, gro=False):
+        """
+        Inicializa el socket
+
+        Args:
+            sock: Socket UDP
+            gro: Activar UDP_GRO. Todas las lecturas del socket tienen que pasar por
+                recv_many(), porque un recvfrom() común truncaría una lectura agrupada.
+        """
+        self.sock = sock
+        self.gro = gro and self._enable_gro()
+        self.gso_max_size = MAX_UDP_PAYLOAD    # segmentos más grandes no se agrupan
+
+    def _enable_gro(self):
+        if not self.gso_supported or not hasattr(self.sock, "recvmsg"):
+            return False
+        try:
+            self.sock.setsockopt(SOL_UDP, UDP_GRO, 1)
+        except OSError:
+            return False
+        return True
+
+    def send_many(self, pkgs, addr):
+        """
+        Envía los paquetes en orden hacia addr, agrupándolos con GSO cuando se puede
+        """
+        i = 0
+        while i < len(pkgs):
+            size = len(pkgs[i])
+            j = i + 1
+            if BatchSocket.gso_supported and size <= self.gso_max_size:
+                # Un lote GSO: segmentos de igual tamaño (el último puede ser más chico) que en total
+                # entren en un datagrama UDP
+                max_segments = min(GSO_MAX_SEGMENTS, MAX_UDP_PAYLOAD // size)
+                while j < len(pkgs) and j - i < max_segments and len(pkgs[j - 1]) == size and len(pkgs[j]) <= size:
+                    j += 1
+            if j - i == 1 or not self._send_segmented(pkgs[i:j], size, addr):
+                for pkg in pkgs[i:j]:
+                    self.sock.sendto(pkg, addr)
+            i = j
+
+    def _send_segmented(self, batch, size, addr):
+        try:
+            self.sock.sendmsg([b"".join(batch)], [(SOL_UDP, UDP_SEGMENT, struct.pack("H", size))], 0, addr)
+        except (BlockingIOError, InterruptedError):
+            raise
+        except OSError:
+            # El kernel o la interfaz no soportan GSO, o el segmento no entra en el MTU:
+            # no volver a intentarlo con segmentos de este tamaño o más grandes
+            self.gso_max_size = size - 1
+            return False
+        return True
+
+    def recv_many(self):
+        """
+        Lee del socket (respeta el timeout del socket)
+
+        Returns:
+            tuple: (lista de paquetes, dirección de origen)
+        """
+        if not self.gro:
+            pkg, addr = self.sock.recvfrom(RECV_BUFFER_SIZE)
+            return [pkg], addr
+
+        data, ancdata, _, addr = self.sock.recvmsg(GRO_BUFFER_SIZE, socket.CMSG_SPACE(4))
+        for level, kind, value in ancdata:
+            if level == SOL_UDP and kind == UDP_GRO:
+                size = struct.unpack("i", value[:4])[0]
+                view = memoryview(data)
+                return [view[k:k + size] for k in range(0, len(data), size)], addr
+        return [data], addr
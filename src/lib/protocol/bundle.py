@@ -0,0 +1,140 @@
+import struct
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import PARTIAL_SUFFIX, STREAMS_SUFFIX, DELTA_SUFFIX, BUNDLE_SUFFIX
+
+# Bundle: los archivos uno detrás de otro, cada uno con su path relativo (separado con "/")
+#   [largo del path:2][tamaño:8] + path + datos
+# Sólo van archivos (los directorios vacíos no viajan). Viaja como un archivo más, así los archivos
+# chicos comparten paquetes y todos comparten el handshake, la ventana y el control de congestión de
+# una sola sesión.
+ENTRY = struct.Struct(">HQ")
+COPY_CHUNK = 1024 * 1024
+# Lo que queda en el storage mientras se recibe algo (no se manda en un bundle)
+_INCOMPLETE_SUFFIXES = (PARTIAL_SUFFIX, STREAMS_SUFFIX, DELTA_SUFFIX, BUNDLE_SUFFIX, ".tmp")
+
+
+def _incomplete(path):
+    return path.endswith(_INCOMPLETE_SUFFIXES) or os.path.exists(path + PARTIAL_SUFFIX)
+
+
+def bundle_entries(sources, skip_incomplete=False):
+    """
+    Archivos a mandar en un bundle. Un solo directorio se manda con los paths relativos a él; en una
+    lista cada archivo va con su nombre y cada directorio con su nombre como prefijo.
+
+    Args:
+        sources: Archivos y directorios
+        skip_incomplete: Saltear los archivos que se están recibiendo (los del storage del servidor)
+
+    Returns:
+        list: (path en el bundle, path del archivo), en orden
+    """
+    entries = []
+    for source in sources:
+        if not os.path.isdir(source):
+            entries.append((os.path.basename(source), source))
+            continue
+        prefix = "" if len(sources) == 1 else os.path.basename(os.path.normpath(source)) + "/"
+        for dirpath, dirnames, filenames in os.walk(source):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if skip_incomplete and _incomplete(path):
+                    continue
+                entries.append((prefix + os.path.relpath(path, source).replace(os.sep, "/"), path))
+    return entries
+
+
+def _copy_exactly(src, dst, size):
+    """
+    Copia exactamente size bytes de src a dst
+
+    Raises:
+        ValueError: si src termina antes
+    """
+    while size:
+        chunk = src.read(min(size, COPY_CHUNK))
+        if not chunk:
+            raise ValueError("datos incompletos")
+        dst.write(chunk)
+        size -= len(chunk)
+
+
+def write_bundle(entries, out_path):
+    """
+    Arma el bundle de entries en out_path
+
+    Returns:
+        tuple: (archivos, bytes de datos)
+    """
+    total = 0
+    with open(out_path, "wb") as out:
+        for name, path in entries:
+            encoded = name.encode()
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                out.write(ENTRY.pack(len(encoded), size))
+                out.write(encoded)
+                try:
+                    _copy_exactly(f, out, size)
+                except ValueError:
+                    raise ValueError(f"{path} se achicó mientras se armaba el bundle") from None
+            total += size
+    return len(entries), total
+
+
+def _safe_join(root, name):
+    """
+    Path de name dentro de root, sin salir de root (el bundle lo armó el otro extremo)
+
+    Raises:
+        ValueError: si name es absoluto o tiene componentes vacíos, "." o ".."
+    """
+    parts = name.split("/")
+    if any(part in ("", ".", "..") or "\0" in part or os.sep in part for part in parts):
+        raise ValueError(f"path inválido en el bundle: {name!r}")
+    return os.path.join(root, *parts)
+
+
+def extract_bundle(bundle_path, root):
+    """
+    Desarma el bundle dentro del directorio root. Cada archivo se escribe aparte y reemplaza al
+    anterior de una vez, así quien lo esté leyendo nunca ve uno a medio escribir.
+
+    Returns:
+        tuple: (archivos, bytes de datos)
+
+    Raises:
+        ValueError: si el bundle está mal formado (los archivos anteriores quedan escritos)
+    """
+    os.makedirs(root, exist_ok=True)
+    files = total = 0
+    with open(bundle_path, "rb") as f:
+        while True:
+            header = f.read(ENTRY.size)
+            if not header:
+                break
+            if len(header) != ENTRY.size:
+                raise ValueError("bundle mal formado")
+            name_len, size = ENTRY.unpack(header)
+            try:
+                name = f.read(name_len).decode()
+            except UnicodeDecodeError:
+                raise ValueError("bundle mal formado") from None
+            target = _safe_join(root, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp = target + ".tmp"
+            try:
+                with open(tmp, "wb") as out:
+                    _copy_exactly(f, out, size)
+                os.replace(tmp, target)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            files += 1
+            total += size
+    return files, total
@@ -0,0 +1,58 @@
+import asyncio
+from collections import deque
+
+
+class PacketChannel:
+    """
+    Cola de paquetes recibidos de una sesión del servidor.
+    El loop del servidor agrega los paquetes con put() y la corrutina de la sesión los
+    consume con get(). Es más liviana que asyncio.Queue + asyncio.wait_for: esperar con
+    timeout usa un único future y un timer del loop, sin crear una tarea por paquete.
+    """
+
+    def __init__(self):
+        self.pkgs = deque()
+        self.waiter = None
+        self.closed = False
+
+    def empty(self):
+        return not self.pkgs
+
+    def put(self, pkg):
+        if self.closed:
+            return
+        self.pkgs.append(pkg)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def get(self, timeout=None):
+        """
+        Devuelve el próximo paquete, o None si vence el timeout (en segundos)
+        """
+        if self.pkgs:
+            return self.pkgs.popleft()
+
+        loop = asyncio.get_running_loop()
+        self.waiter = loop.create_future()
+        timer = None
+        if timeout is not None:
+            timer = loop.call_later(timeout, self._wake)
+        try:
+            await self.waiter
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self.waiter = None
+        return self.pkgs.popleft() if self.pkgs else None
+
+    def close(self):
+        """
+        La sesión terminó: se descartan los paquetes pendientes y los que sigan llegando
+        (así no retienen los buffers de recepción)
+        """
+        self.closed = True
+        self.pkgs.clear()
+
+    def _wake(self):
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
@@ -0,0 +1,151 @@
+import bz2
+import sys
+import os
+import zlib
+
+try:
+    import lzma
+except ImportError:     # Python compilado sin liblzma
+    lzma = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import (
+    COMPRESS_ZLIB, COMPRESS_BZ2, COMPRESS_LZMA, COMPRESS_INITIAL_RATIO, COMPRESS_MAX_RATIO, COMPRESS_USEFUL_RATIO,
+    COMPRESS_GIVE_UP, COMPRESS_SAMPLE_INTERVAL, MAX_PAYLOAD_SIZE
+)
+
+# El índice de cada códec es su id en el SETUP
+CODECS = (COMPRESS_ZLIB, COMPRESS_BZ2, COMPRESS_LZMA)
+# Bytes descomprimidos que puede llevar un paquete como máximo
+MAX_RAW_SIZE = MAX_PAYLOAD_SIZE * COMPRESS_MAX_RATIO
+# Intentos de achicar los datos de un paquete hasta que comprimidos entren en él
+FIT_TRIES = 3
+# Sin headers ni checksums (zlib y xz agregan los suyos): el paquete ya tiene su largo y UDP su checksum
+_LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 1}] if lzma is not None else None
+# Errores de los descompresores ante datos mal formados
+_DECOMPRESS_ERRORS = (zlib.error, OSError, EOFError) + ((lzma.LZMAError,) if lzma is not None else ())
+
+
+def available_codecs():
+    """
+    Códecs que se pueden usar en esta instalación de Python (lzma es opcional)
+    """
+    return tuple(codec for codec in CODECS if codec != COMPRESS_LZMA or lzma is not None)
+
+
+def compress(codec, data):
+    """
+    Comprime los datos de un paquete por separado (sin estado compartido con los otros paquetes, así
+    cada uno se rearma y se descomprime solo)
+
+    Args:
+        codec: COMPRESS_ZLIB, COMPRESS_BZ2 o COMPRESS_LZMA
+        data: Datos del archivo
+
+    Returns:
+        bytes: los datos comprimidos
+    """
+    if codec == COMPRESS_ZLIB:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush()
+    if codec == COMPRESS_BZ2:
+        return bz2.compress(data)
+    return lzma.compress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+
+def decompress(codec, data):
+    """
+    Descomprime los datos de un paquete
+
+    Returns:
+        bytes: los datos del archivo
+
+    Raises:
+        ValueError: si el códec no está disponible o los datos están mal formados (o descomprimidos
+        pasan de MAX_RAW_SIZE)
+    """
+    if codec not in available_codecs():
+        raise ValueError(f"códec no disponible: {codec}")
+    if codec == COMPRESS_ZLIB:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    elif codec == COMPRESS_BZ2:
+        decompressor = bz2.BZ2Decompressor()
+    else:
+        decompressor = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+    try:
+        raw = decompressor.decompress(data, MAX_RAW_SIZE)
+    except _DECOMPRESS_ERRORS as e:
+        raise ValueError(f"paquete comprimido inválido: {e}") from e
+    if not decompressor.eof or decompressor.unused_data or getattr(decompressor, "unconsumed_tail", b""):
+        raise ValueError("paquete comprimido inválido")
+    return raw
+
+
+class PacketCompressor:
+    """
+    Compresión de los paquetes de un emisor. Cada paquete se comprime por separado: se toman tantos
+    bytes del archivo como se estima que entran comprimidos en un paquete, según la relación de
+    compresión de los anteriores, y si no entran se prueba con menos.
+    Si los datos no se achican (p.ej. un archivo ya comprimido) se deja de comprimir, para no gastar
+    CPU, y cada COMPRESS_SAMPLE_INTERVAL paquetes se vuelve a probar con uno.
+    """
+
+    def __init__(self, codec):
+        """
+        Inicializa el compresor
+
+        Args:
+            codec: Códec negociado en el handshake
+        """
+        self.codec = codec
+        self.ratio = COMPRESS_INITIAL_RATIO    # bytes del archivo por byte comprimido del último paquete
+        self.misses = 0                        # paquetes seguidos que no se achicaron
+        self.paused = 0                        # paquetes que faltan para volver a probar
+        self.pkgs = 0                          # paquetes enviados comprimidos
+        self.raw_bytes = 0                     # bytes del archivo que viajaron comprimidos
+        self.compressed_bytes = 0              # y lo que ocuparon
+
+    def pack(self, data, offset, limit, chunk_size):
+        """
+        Comprime el próximo paquete
+
+        Args:
+            data: Contenido del archivo
+            offset: Posición del próximo paquete
+            limit: Fin de lo que se envía
+            chunk_size: Bytes de datos por paquete (el tope de los datos comprimidos)
+
+        Returns:
+            tuple: (datos comprimidos, bytes del archivo que llevan), o (None, 0) si el paquete va sin
+            comprimir
+        """
+        if self.paused:
+            self.paused -= 1
+            return None, 0
+        want = min(limit - offset, max(int(chunk_size * min(self.ratio, COMPRESS_MAX_RATIO)), 1))
+        packed = None
+        for _ in range(FIT_TRIES):
+            out = compress(self.codec, data[offset:offset + want])
+            if len(out) <= chunk_size:
+                packed = out
+                break
+            want = want * chunk_size * 9 // (len(out) * 10)
+            if want <= chunk_size:
+                break   # comprimido entraría lo mismo que sin comprimir
+        if packed is None or len(packed) > want * COMPRESS_USEFUL_RATIO:
+            self.misses += 1
+            if self.misses >= COMPRESS_GIVE_UP:
+                self.paused = COMPRESS_SAMPLE_INTERVAL
+            return None, 0
+        self.misses = 0
+        # Con la relación de este paquete se apunta a llenar el próximo (con un margen)
+        self.ratio = want / len(packed) * 0.95
+        self.pkgs += 1
+        self.raw_bytes += want
+        self.compressed_bytes += len(packed)
+        return packed, want
+
+    def __str__(self):
+        saved = 1 - self.compressed_bytes / self.raw_bytes if self.raw_bytes else 0
+        return (f"{self.codec}: {self.pkgs} paquetes comprimidos, {self.raw_bytes} bytes en {self.compressed_bytes} "
+                f"({saved:.0%} menos)")
@@ -0,0 +1,131 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import INITIAL_CWND, RENO, CUBIC
+
+
+class RenoController:
+    """
+    Control de congestión estilo TCP Reno, con la ventana medida en paquetes
+    - Slow start: la ventana crece un paquete por cada ACK hasta ssthresh
+    - AIMD: luego crece un paquete por RTT y se reduce a la mitad ante una pérdida
+    - Timeout: la ventana vuelve a 1 y se reinicia slow start
+    """
+    name = RENO
+
+    def __init__(self, max_window, initial_window=INITIAL_CWND):
+        """
+        Inicializa el controlador
+
+        Args:
+            max_window: Tope de la ventana (tamaño máximo del protocolo)
+            initial_window: Ventana inicial
+        """
+        self.max_window = max_window
+        self.cwnd = float(min(initial_window, max_window))
+        self.ssthresh = float(max_window)
+
+    @property
+    def window(self):
+        """
+        Cantidad de paquetes que se pueden tener en vuelo
+        """
+        return max(1, min(int(self.cwnd), self.max_window))
+
+    def on_ack(self, acked, now):
+        """
+        Agranda la ventana por cada uno de los `acked` paquetes confirmados
+        """
+        for _ in range(acked):
+            if self.cwnd < self.ssthresh:
+                self.cwnd += 1
+            else:
+                self.cwnd += 1 / self.cwnd
+        self.cwnd = min(self.cwnd, self.max_window)
+
+    def on_loss(self, now):
+        """
+        Pérdida detectada sin timeout (ACKs duplicados o timer de un solo paquete)
+        """
+        self.ssthresh = max(self.cwnd / 2, 2)
+        self.cwnd = self.ssthresh
+
+    def on_timeout(self, now):
+        """
+        Timeout de retransmisión: se vuelve a slow start
+        """
+        self.ssthresh = max(self.cwnd / 2, 2)
+        self.cwnd = 1.0
+
+    def __str__(self):
+        return f"{self.name}: cwnd={self.cwnd:.2f}, ssthresh={self.ssthresh:.2f}"
+
+
+class CubicController(RenoController):
+    """
+    Control de congestión CUBIC (RFC 8312)
+    Después de una pérdida la ventana crece según una función cúbica del tiempo transcurrido,
+    rápido lejos de la ventana donde hubo la última pérdida (w_max) y despacio cerca de ella.
+    """
+    name = CUBIC
+
+    C = 0.4
+    BETA = 0.7
+
+    def __init__(self, max_window, initial_window=INITIAL_CWND):
+        super().__init__(max_window, initial_window)
+        self.w_max = 0.0
+        self.k = 0.0
+        self.origin = 0.0
+        self.epoch_start = None
+
+    def on_ack(self, acked, now):
+        if self.cwnd < self.ssthresh:
+            super().on_ack(acked, now)
+            return
+
+        if self.epoch_start is None:
+            self.epoch_start = now
+            if self.cwnd < self.w_max:
+                self.k = ((self.w_max - self.cwnd) / self.C) ** (1 / 3)
+                self.origin = self.w_max
+            else:
+                self.k = 0.0
+                self.origin = self.cwnd
+
+        t = now - self.epoch_start
+        target = self.origin + self.C * (t - self.k) ** 3
+        for _ in range(acked):
+            if target > self.cwnd:
+                self.cwnd += (target - self.cwnd) / self.cwnd
+            else:
+                self.cwnd += 0.01 / self.cwnd
+        self.cwnd = min(self.cwnd, self.max_window)
+
+    def on_loss(self, now):
+        self.w_max = self.cwnd
+        self.cwnd = max(self.cwnd * self.BETA, 2)
+        self.ssthresh = self.cwnd
+        self.epoch_start = None
+
+    def on_timeout(self, now):
+        self.w_max = self.cwnd
+        self.ssthresh = max(self.cwnd * self.BETA, 2)
+        self.cwnd = 1.0
+        self.epoch_start = None
+
+
+CONGESTION_CONTROLLERS = {
+    RENO: RenoController,
+    CUBIC: CubicController,
+}
+
+
+def create_congestion_controller(name, max_window):
+    """
+    Crea el controlador de congestión por nombre (ver CONGESTION_CONTROLLERS)
+    """
+    if name not in CONGESTION_CONTROLLERS:
+        raise ValueError(f"Invalid congestion control. Must be one of: {list(CONGESTION_CONTROLLERS)}")
+    return CONGESTION_CONTROLLERS[name](max_window)
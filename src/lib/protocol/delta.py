@@ -0,0 +1,246 @@
+import hashlib
+import math
+import mmap
+import struct
+import sys
+import os
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import DELTA_MIN_BLOCK, DELTA_MAX_BLOCK
+
+# Upload delta, estilo rsync:
+# 1. el servidor firma su copia del archivo: por cada bloque una suma débil (adler32, se puede
+#    "correr" de a un byte) y un hash fuerte (blake2b)
+# 2. el cliente recorre su archivo buscando bloques con la misma firma en cualquier posición, y arma
+#    las diferencias: referencias a bloques del servidor y datos literales para lo que cambió
+# 3. el servidor rearma el archivo con su copia y las diferencias, y verifica el hash del resultado
+#
+# Firmas:      [tamaño de bloque:4][tamaño del archivo:8] + por bloque [débil:4][fuerte:16]
+# Diferencias: [tamaño de bloque:4][tamaño del archivo nuevo:8][hash del archivo nuevo:32] + instrucciones
+#   literal: [0x00][largo:4] + datos
+#   copia:   [0x01][primer bloque:4][bloques:4]
+SIGNATURES_HEADER = struct.Struct(">IQ")
+BLOCK_SIGNATURE = struct.Struct(">I16s")
+DELTA_HEADER = struct.Struct(">IQ32s")
+LITERAL = struct.Struct(">BI")
+COPY = struct.Struct(">BII")
+OP_LITERAL = 0x00
+OP_COPY = 0x01
+MAX_LITERAL = 1024 * 1024       # los literales largos se parten (así se escriben de a bloques)
+ADLER_MOD = 65521
+
+
+def block_size_for(size):
+    """
+    Tamaño de bloque para firmar un archivo de size bytes: del orden de la raíz del tamaño (como rsync),
+    así la cantidad de firmas y el tamaño de cada bloque crecen parejo
+
+    Returns:
+        int: múltiplo de 1024 entre DELTA_MIN_BLOCK y DELTA_MAX_BLOCK
+    """
+    return min(DELTA_MAX_BLOCK, max(DELTA_MIN_BLOCK, -(-math.isqrt(size) // 1024) * 1024))
+
+
+def _strong(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def file_signatures(path, block_size=None):
+    """
+    Firmas de los bloques de path (el último puede ser más corto)
+
+    Args:
+        path: Archivo a firmar
+        block_size: Tamaño de bloque, None para elegirlo según el tamaño del archivo
+
+    Returns:
+        bytes: las firmas, en el formato de arriba
+    """
+    size = os.path.getsize(path)
+    if block_size is None:
+        block_size = block_size_for(size)
+    parts = [SIGNATURES_HEADER.pack(block_size, size)]
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            parts.append(BLOCK_SIGNATURE.pack(zlib.adler32(block), _strong(block)))
+    return b"".join(parts)
+
+
+def decode_signatures(data):
+    """
+    Desarma las firmas
+
+    Returns:
+        tuple: (tamaño de bloque, tamaño del archivo, {suma débil: [(bloque, hash fuerte)]}) con sólo
+        los bloques completos (el último, si es más corto, no se busca)
+
+    Raises:
+        ValueError: si las firmas están mal formadas
+    """
+    if len(data) < SIGNATURES_HEADER.size or (len(data) - SIGNATURES_HEADER.size) % BLOCK_SIGNATURE.size:
+        raise ValueError("firmas mal formadas")
+    block_size, size = SIGNATURES_HEADER.unpack_from(data)
+    if not block_size:
+        raise ValueError("firmas mal formadas")
+    table = {}
+    full_blocks = size // block_size
+    for index, (weak, strong) in enumerate(BLOCK_SIGNATURE.iter_unpack(memoryview(data)[SIGNATURES_HEADER.size:])):
+        if index < full_blocks:
+            table.setdefault(weak, []).append((index, strong))
+    return block_size, size, table
+
+
+class _DeltaWriter:
+    """
+    Escribe las instrucciones de las diferencias, juntando las copias de bloques consecutivos
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.copy_first = None
+        self.copy_count = 0
+        self.literal_bytes = 0
+        self.copied_bytes = 0
+
+    def literal(self, data):
+        if not data:
+            return
+        self._flush_copy()
+        for start in range(0, len(data), MAX_LITERAL):
+            chunk = data[start:start + MAX_LITERAL]
+            self.out.write(LITERAL.pack(OP_LITERAL, len(chunk)))
+            self.out.write(chunk)
+        self.literal_bytes += len(data)
+
+    def copy(self, index, block_size):
+        if self.copy_first is not None and index == self.copy_first + self.copy_count:
+            self.copy_count += 1
+        else:
+            self._flush_copy()
+            self.copy_first, self.copy_count = index, 1
+        self.copied_bytes += block_size
+
+    def _flush_copy(self):
+        if self.copy_first is not None:
+            self.out.write(COPY.pack(OP_COPY, self.copy_first, self.copy_count))
+            self.copy_first = None
+
+    def close(self):
+        self._flush_copy()
+
+
+def compute_delta(path, signatures, out_path):
+    """
+    Arma las diferencias entre path (el archivo nuevo, del cliente) y el archivo cuyas firmas se
+    recibieron. Donde el archivo coincide con un bloque del servidor se avanza de a un bloque; donde
+    no, la suma débil se corre de a un byte hasta volver a encontrar un bloque conocido.
+
+    Args:
+        path: Archivo nuevo
+        signatures: Firmas del archivo del servidor (file_signatures)
+        out_path: Donde se escriben las diferencias
+
+    Returns:
+        tuple: (bytes literales, bytes reusados del servidor)
+    """
+    block_size, _, table = decode_signatures(signatures)
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f, open(out_path, "wb") as out:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        try:
+            out.write(DELTA_HEADER.pack(block_size, size, bytes(32)))  # el hash se completa al final
+            writer = _DeltaWriter(out)
+            pos = 0
+            literal_start = 0
+            weak = None
+            while pos + block_size <= size:
+                if weak is None:
+                    weak = zlib.adler32(mm[pos:pos + block_size])
+                candidates = table.get(weak)
+                if candidates is not None:
+                    strong = _strong(mm[pos:pos + block_size])
+                    index = next((i for i, s in candidates if s == strong), None)
+                    if index is not None:
+                        writer.literal(mm[literal_start:pos])
+                        writer.copy(index, block_size)
+                        pos += block_size
+                        literal_start = pos
+                        weak = None
+                        continue
+                # Correr la suma débil un byte (adler32: a = 1 + suma, b = suma de los a parciales)
+                if pos + block_size < size:
+                    out_byte, in_byte = mm[pos], mm[pos + block_size]
+                    a = ((weak & 0xFFFF) - out_byte + in_byte) % ADLER_MOD
+                    b = ((weak >> 16) - block_size * out_byte + a - 1) % ADLER_MOD
+                    weak = (b << 16) | a
+                pos += 1
+            writer.literal(mm[literal_start:size])
+            writer.close()
+            for start in range(0, size, MAX_LITERAL):
+                digest.update(mm[start:start + MAX_LITERAL])
+        finally:
+            if size:
+                mm.close()
+        out.seek(0)
+        out.write(DELTA_HEADER.pack(block_size, size, digest.digest()))
+    return writer.literal_bytes, writer.copied_bytes
+
+
+def apply_delta(base_path, delta_path, out_path):
+    """
+    Rearma el archivo nuevo a partir de base_path (la copia del servidor) y las diferencias
+
+    Args:
+        base_path: Archivo contra el que se calcularon las diferencias
+        delta_path: Diferencias recibidas (compute_delta)
+        out_path: Donde se escribe el archivo nuevo
+
+    Raises:
+        ValueError: si las diferencias están mal formadas o el resultado no coincide con el hash
+    """
+    with open(base_path, "rb") as base, open(delta_path, "rb") as delta, open(out_path, "wb") as out:
+        header = delta.read(DELTA_HEADER.size)
+        if len(header) != DELTA_HEADER.size:
+            raise ValueError("diferencias mal formadas")
+        block_size, size, expected = DELTA_HEADER.unpack(header)
+        digest = hashlib.blake2b(digest_size=32)
+        written = 0
+        while True:
+            op = delta.read(1)
+            if not op:
+                break
+            if op[0] == OP_LITERAL:
+                length = LITERAL.unpack(op + delta.read(LITERAL.size - 1))[1]
+                data = delta.read(length)
+                if len(data) != length:
+                    raise ValueError("diferencias mal formadas")
+                chunks = (data,)
+            elif op[0] == OP_COPY:
+                _, first, count = COPY.unpack(op + delta.read(COPY.size - 1))
+                base.seek(first * block_size)
+                chunks = (base.read(block_size * n) for n in _split(count, MAX_LITERAL // block_size))
+            else:
+                raise ValueError(f"instrucción desconocida {op[0]}")
+            for chunk in chunks:
+                out.write(chunk)
+                digest.update(chunk)
+                written += len(chunk)
+        if written != size or digest.digest() != expected:
+            raise ValueError("el archivo rearmado no coincide con el del cliente")
+        out.flush()
+        os.fsync(out.fileno())
+
+
+def _split(count, step):
+    """
+    Parte count bloques en grupos de a lo sumo step (al menos 1)
+    """
+    step = max(step, 1)
+    while count > 0:
+        yield min(count, step)
+        count -= step
@@ -0,0 +1,190 @@
+import sys
+import os
+from collections import OrderedDict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import FIRST_DATA_PKG_ID, HEADER_SIZE, FLAG_PARITY, FEC_KEPT_BLOCKS
+from lib.protocol.archive import HEADER
+
+# Corrección de errores con XOR. Los paquetes de datos se agrupan en bloques de K pkg_ids consecutivos
+# (desde FIRST_DATA_PKG_ID; el último bloque termina en el END y puede ser más corto). Dentro de un bloque,
+# el paquete i es del grupo i % M, y cada grupo tiene un paquete de paridad: el XOR de los paquetes del
+# grupo enteros (header incluido, los más cortos completados con ceros). Si del grupo se pierde uno solo, es
+# el XOR de la paridad con los que llegaron.
+# Paridad: [FLAG_PARITY:1][paquetes del bloque:2][pkg_id:4] + XOR, donde pkg_id es el primer paquete del
+# grupo y el campo de largo lleva la cantidad de paquetes del bloque (para el último, más corto)
+# Sólo se protegen los paquetes nuevos: las retransmisiones no pasan otra vez por acá.
+
+
+class FecEncoder:
+    """
+    Lado del emisor: acumula el XOR de cada grupo a medida que salen los paquetes nuevos y, al completarse
+    el bloque, agrega sus paquetes de paridad. Los paquetes de paridad no ocupan lugar en la ventana ni se
+    confirman: si se pierden, la pérdida de datos la recupera la retransmisión de siempre.
+    """
+
+    def __init__(self, k, m, first_pkg_id=FIRST_DATA_PKG_ID):
+        """
+        Inicializa el codificador
+
+        Args:
+            k: Paquetes de datos por bloque
+            m: Paquetes de paridad por bloque (grupos de K/M paquetes)
+            first_pkg_id: pkg_id del primer paquete de datos
+        """
+        self.k = k
+        self.m = m
+        self.next_pkg_id = first_pkg_id     # próximo paquete nuevo
+        self.block_first = first_pkg_id     # primer pkg_id del bloque actual
+        self.count = 0                      # paquetes del bloque actual
+        self.xors = [0] * m                 # XOR de cada grupo, como entero little endian (así los más
+        self.lengths = [0] * m              # cortos quedan completados con ceros al final)
+        self.parity_sent = 0
+
+    def protect(self, pkgs):
+        """
+        Agrega a pkgs los paquetes de paridad de los bloques que completan
+
+        Args:
+            pkgs: Paquetes que arma el emisor (nuevos y retransmisiones)
+
+        Returns:
+            list: pkgs, seguidos de los paquetes de paridad
+        """
+        parity = []
+        for pkg in pkgs:
+            if int.from_bytes(pkg[3:HEADER_SIZE], "big") != self.next_pkg_id:
+                continue  # una retransmisión: ya está en su grupo
+            self.next_pkg_id += 1
+            group = self.count % self.m
+            self.xors[group] ^= int.from_bytes(pkg, "little")
+            self.lengths[group] = max(self.lengths[group], len(pkg))
+            self.count += 1
+            if self.count == self.k or pkg[0] & 1:  # bloque completo o END
+                parity.extend(self._parity())
+        return pkgs + parity if parity else pkgs
+
+    def _parity(self):
+        """
+        Paquetes de paridad del bloque actual, y empieza el siguiente
+        """
+        pkgs = [b"".join((HEADER.pack(FLAG_PARITY, self.count, self.block_first + group),
+                          self.xors[group].to_bytes(self.lengths[group], "little")))
+                for group in range(min(self.m, self.count))]
+        self.parity_sent += len(pkgs)
+        self.block_first = self.next_pkg_id
+        self.count = 0
+        self.xors = [0] * self.m
+        self.lengths = [0] * self.m
+        return pkgs
+
+    def __str__(self):
+        return f"FEC {self.k}:{self.m}, paquetes de paridad={self.parity_sent}"
+
+
+class FecDecoder:
+    """
+    Lado del receptor: por cada grupo acumula el XOR de los paquetes que llegaron y, cuando tiene la paridad
+    y falta uno solo, lo rearma. Se ubica delante del receptor de GBN/SR: le pasa los paquetes de datos tal
+    como llegan más los que rearma, y se queda con los de paridad.
+    """
+
+    def __init__(self, k, m, first_pkg_id=FIRST_DATA_PKG_ID):
+        """
+        Inicializa el decodificador
+
+        Args:
+            k: Paquetes de datos por bloque
+            m: Paquetes de paridad por bloque
+            first_pkg_id: pkg_id del primer paquete de datos
+        """
+        self.k = k
+        self.m = m
+        self.first_pkg_id = first_pkg_id
+        # (bloque, grupo) -> [XOR de los recibidos, pkg_ids recibidos, paridad, paquetes del bloque, largo de
+        # la paridad], o None si el grupo ya está completo (así las retransmisiones no lo vuelven a abrir)
+        self.groups = OrderedDict()
+        self.last_block = -1
+        self.recovered = 0
+
+    def receive(self, pkg):
+        """
+        Procesa un paquete recibido
+
+        Returns:
+            tuple: los paquetes para el receptor: pkg si es de datos (o no es de FEC) seguido de los
+            que se pudieron rearmar
+        """
+        if len(pkg) < HEADER_SIZE or pkg[0] > FLAG_PARITY | 0x03:
+            return (pkg,)  # no es un paquete de datos (p.ej. un SETUP-ACK duplicado)
+        pkg_id = int.from_bytes(pkg[3:HEADER_SIZE], "big")
+        if pkg_id < self.first_pkg_id:
+            return (pkg,) if not pkg[0] & FLAG_PARITY else ()
+        block, index = divmod(pkg_id - self.first_pkg_id, self.k)
+
+        if pkg[0] & FLAG_PARITY:
+            count = int.from_bytes(pkg[1:3], "big")
+            if index >= self.m or not index < count <= self.k:
+                return ()
+            key = (block, index)
+            group = self._group(key, block)
+            if group is None or group[2] is not None:
+                return ()
+            group[2] = int.from_bytes(pkg[HEADER_SIZE:], "little")
+            group[3] = count
+            group[4] = len(pkg) - HEADER_SIZE
+            return self._recover(key, group)
+
+        key = (block, index % self.m)
+        group = self._group(key, block)
+        if group is None or pkg_id in group[1]:
+            return (pkg,)
+        group[0] ^= int.from_bytes(pkg, "little")
+        group[1].add(pkg_id)
+        if group[2] is None:
+            return (pkg,)
+        return (pkg,) + self._recover(key, group)
+
+    def _group(self, key, block):
+        """
+        Estado del grupo key (se crea si hace falta), o None si ya está completo o es demasiado viejo
+        """
+        group = self.groups.get(key, False)
+        if group is not False:
+            return group
+        if block < self.last_block - FEC_KEPT_BLOCKS:
+            return None
+        if block > self.last_block:
+            self.last_block = block
+            while self.groups and next(iter(self.groups))[0] < block - FEC_KEPT_BLOCKS:
+                self.groups.popitem(last=False)
+        group = self.groups[key] = [0, set(), None, 0, 0]
+        return group
+
+    def _recover(self, key, group):
+        """
+        Si al grupo le falta un solo paquete lo rearma con la paridad
+
+        Returns:
+            tuple: el paquete rearmado, o vacía
+        """
+        block, index = key
+        first = self.first_pkg_id + block * self.k
+        missing = [pkg_id for pkg_id in range(first + index, first + group[3], self.m) if pkg_id not in group[1]]
+        if len(missing) > 1:
+            return ()
+        self.groups[key] = None
+        if not missing:
+            return ()
+        try:
+            data = (group[2] ^ group[0]).to_bytes(group[4], "little")
+        except OverflowError:
+            return ()  # llegó un paquete más largo que la paridad: no es de este grupo
+        data_len = int.from_bytes(data[1:3], "big")
+        if data[0] & FLAG_PARITY or HEADER_SIZE + data_len > len(data):
+            return ()
+        self.recovered += 1
+        return (b"".join((data[:3], missing[0].to_bytes(4, "big"), data[HEADER_SIZE:HEADER_SIZE + data_len])),)
+
+    def __str__(self):
+        return f"FEC {self.k}:{self.m}, paquetes recuperados={self.recovered}"
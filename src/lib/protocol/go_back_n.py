@@ -0,0 +1,314 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import FIRST_DATA_PKG_ID, DUP_ACK_THRESHOLD, SACK_MAX_BLOCKS
+from lib.protocol.stats import TransferStats
+from lib.protocol.ack import encode_ack
+from lib.protocol.window import SendWindow, RangeSet
+
+
+class GoBackNSender:
+    """
+    Estado del emisor de Go Back N (Stop and Wait es Go Back N con ventana de 1)
+    Hay un único timer para el paquete más viejo sin ACK. Cuando vence, el emisor vuelve
+    al primer paquete sin confirmar y reenvía desde ahí, respetando la ventana de congestión.
+    Si el receptor informa bloques SACK, al volver atrás se saltean los paquetes que ya tiene.
+    No hace I/O: el cliente y el servidor se encargan de enviar lo que devuelve.
+    """
+
+    def __init__(self, arch, window_sz, rtt, congestion, ack_next_expected=False, max_retries=70,
+                 first_pkg_id=FIRST_DATA_PKG_ID, dup_ack_threshold=DUP_ACK_THRESHOLD):
+        """
+        Inicializa el emisor
+
+        Args:
+            arch: ArchiveSender del archivo a enviar
+            window_sz: Tope de la ventana (paquetes en vuelo)
+            rtt: RttEstimator que da el timeout
+            congestion: Controlador de congestión (ver lib.protocol.congestion)
+            ack_next_expected: True si el ACK indica el próximo paquete esperado (upload)
+                en vez del último paquete recibido en orden (download)
+            max_retries: Reintentos del paquete más viejo antes de abandonar la transferencia
+            first_pkg_id: pkg_id del primer paquete de datos
+            dup_ack_threshold: ACKs duplicados (o paquetes confirmados por SACK) que indican una pérdida
+        """
+        self.arch = arch
+        self.window_sz = window_sz
+        self.rtt = rtt
+        self.congestion = congestion
+        self.ack_next_expected = ack_next_expected
+        self.dup_ack_threshold = dup_ack_threshold
+        self.max_retries = max_retries
+        self.stats = TransferStats(rtt)
+
+        self.base = first_pkg_id            # menor pkg_id sin ACK
+        self.send_next = first_pkg_id       # próximo pkg_id a (re)enviar
+        self.next_pkg_id = first_pkg_id     # próximo pkg_id que todavía no se leyó del archivo
+        self.in_flight = SendWindow(window_sz, first_pkg_id)  # paquetes entre base y next_pkg_id
+        self.sacked = RangeSet()            # pkg_ids en vuelo que el receptor ya tiene (SACK)
+        self.holes_end = None               # reenviando huecos (SACK) hasta este pkg_id...
+        self.resume_pkg_id = first_pkg_id   # ...y después se sigue desde acá
+        self.high_rxt = first_pkg_id - 1    # mayor pkg_id reenviado en la recuperación actual
+        self.deadline = None
+        self.file_finished = False
+        self.gave_up = False
+
+        self.last_ack = first_pkg_id - 1
+        self.dup_acks = 0
+        self.recovery_pkg_id = first_pkg_id  # pérdidas de paquetes anteriores son el mismo evento
+
+    @property
+    def finished(self):
+        return self.gave_up or (self.file_finished and not self.in_flight)
+
+    @property
+    def window(self):
+        # Limited transmit (RFC 3042): cada uno de los dos primeros ACKs duplicados habilita
+        # un paquete nuevo, para que lleguen los duplicados necesarios para el fast retransmit
+        return min(self.window_sz, self.congestion.window + min(self.dup_acks, 2))
+
+    def next_packets(self, now, limit=None):
+        """
+        Arma los paquetes a enviar mientras haya lugar en la ventana:
+        primero los que hay que reenviar (luego de un timeout o de un fast retransmit)
+        y después los nuevos
+
+        Args:
+            now: Momento del envío
+            limit: Máximo de paquetes a armar (el pacing), None para llenar la ventana
+
+        Returns:
+            list: paquetes a enviar
+        """
+        pkgs = []
+        while self.send_next - self.base < self.window and (limit is None or len(pkgs) < limit):
+            if self.holes_end is not None and self.send_next >= self.holes_end:
+                # Ya se reenviaron los huecos informados por SACK: seguir desde donde estaba
+                self.send_next = max(self.send_next, self.resume_pkg_id)
+                self.holes_end = None
+                continue
+            if self.send_next in self.sacked:
+                pass
+            elif self.send_next < self.next_pkg_id:
+                self.in_flight.retries[self.in_flight.slot(self.send_next)] += 1
+                self.high_rxt = max(self.high_rxt, self.send_next)
+                pkg = self.arch.pkg(self.send_next)  # Se rearma desde el archivo
+                self.stats.on_send(pkg, retransmission=True)
+                pkgs.append(pkg)
+            elif not self.file_finished:
+                pkg, _ = self.arch.next_pkg_go_back_n(self.next_pkg_id)
+                if pkg is None:
+                    pkg, _ = self.arch.end_pkg(self.next_pkg_id)
+                    self.file_finished = True
+                self.in_flight.push(now)
+                self.next_pkg_id += 1
+                self.stats.on_send(pkg)
+                pkgs.append(pkg)
+            else:
+                break
+            self.send_next += 1
+
+        if pkgs and self.deadline is None:
+            self.deadline = now + self.rtt.rto
+        return pkgs
+
+    def ack(self, ack_num, now, sack_blocks=()):
+        """
+        Procesa un ACK acumulativo
+
+        Args:
+            ack_num: ACK acumulativo
+            now: Momento de llegada del ACK
+            sack_blocks: Rangos (primero, último) que el receptor guardó fuera de orden
+
+        Returns:
+            bool: True si el ACK confirmó paquetes nuevos
+        """
+        for first, last in sack_blocks:
+            first, last = max(first, self.base), min(last, self.next_pkg_id - 1)
+            if first <= last:
+                self.sacked.add_range(first, last)
+
+        last_acked = ack_num - 1 if self.ack_next_expected else ack_num
+
+        if last_acked < self.base or last_acked >= self.next_pkg_id:
+            if last_acked == self.last_ack and self.in_flight:
+                self.on_dup_ack(now)
+            return False
+
+        # Regla de Karn: no medir si se reenvió algún paquete de lo confirmado (al llenarse un hueco
+        # el ACK salta sobre paquetes que esperaron en el receptor toda la recuperación), ni si
+        # last_acked ya estaba confirmado por SACK (el ACK llega mucho después que el paquete)
+        retransmitted = any(self.in_flight.retries[self.in_flight.slot(pkg_id)]
+                            for pkg_id in range(self.base, last_acked + 1))
+        if not retransmitted and last_acked not in self.sacked:
+            self.rtt.sample(now - self.in_flight.sent_time[self.in_flight.slot(last_acked)])
+        else:
+            self.rtt.restore()
+
+        acked = last_acked - self.base + 1
+        self.in_flight.advance(last_acked + 1)
+        self.sacked.discard_below(last_acked + 1)
+        self.base = last_acked + 1
+        self.send_next = max(self.send_next, self.base)
+        self.last_ack = last_acked
+        self.dup_acks = 0
+        self.congestion.on_ack(acked, now)
+        self.stats.on_ack(acked)
+
+        if self.sacked and self.base < self.recovery_pkg_id:
+            # ACK parcial durante la recuperación: hay más huecos antes de lo confirmado por SACK
+            self._retransmit_holes(max(self.base, self.high_rxt + 1))
+
+        # Reiniciar el timer para el paquete más viejo que queda sin ACK
+        self.deadline = now + self.rtt.rto if self.in_flight else None
+        return True
+
+    def on_dup_ack(self, now):
+        """
+        ACK duplicado: el receptor recibió un paquete fuera de orden.
+        Se considera perdido el paquete base con dup_ack_threshold duplicados o con esa cantidad
+        de paquetes posteriores confirmados por SACK (así cuenta aunque se pierdan ACKs).
+        Con pocos paquetes en vuelo alcanza con uno menos que los que hay (early retransmit).
+        Se hace fast retransmit sin esperar el timer: si hay SACK se reenvían sólo los huecos,
+        si no se vuelve a base.
+        """
+        self.dup_acks += 1
+        if self.high_rxt >= self.base:
+            return  # base ya se reenvió en esta recuperación, si se pierde de nuevo lo ve el timer
+
+        threshold = min(self.dup_ack_threshold, max(len(self.in_flight) - 1, 1))
+        if self.dup_acks < threshold and len(self.sacked) < threshold:
+            return
+
+        if self.base >= self.recovery_pkg_id:
+            self.congestion.on_loss(now)
+            self.recovery_pkg_id = self.next_pkg_id
+        if self.sacked:
+            self._retransmit_holes(self.base)
+        else:
+            self.send_next = self.base
+        self.deadline = now + self.rtt.rto
+        self.stats.fast_retransmits += 1
+
+    def _retransmit_holes(self, start):
+        """
+        Vuelve a start para que next_packets() reenvíe los paquetes sin SACK hasta el último
+        confirmado por SACK (esos se perdieron); los posteriores siguen en vuelo y no se reenvían.
+        """
+        holes_end = self.sacked.max() + 1
+        if start >= holes_end:
+            return
+        if self.holes_end is None:
+            self.resume_pkg_id = self.send_next
+        self.holes_end = holes_end
+        self.send_next = start
+
+    def expired(self, now):
+        """
+        Si venció el timer vuelve al primer paquete sin ACK (go back N) y reenvía
+        los que entran en la ventana de congestión.
+
+        Returns:
+            list: paquetes a reenviar
+        """
+        if self.deadline is None or now < self.deadline or not self.in_flight:
+            return []
+
+        if self.in_flight.retries[self.in_flight.slot(self.base)] >= self.max_retries:
+            self.gave_up = True
+            return []
+
+        self.rtt.backoff()
+        self.congestion.on_timeout(now)
+        self.recovery_pkg_id = self.next_pkg_id
+        self.dup_acks = 0
+        self.holes_end = None
+        self.high_rxt = self.base - 1
+        self.send_next = self.base
+        self.deadline = now + self.rtt.rto
+        return self.next_packets(now)
+
+    def time_to_next_timeout(self, now):
+        """
+        Tiempo hasta que venza el timer (o el RTO completo si no hay paquetes en vuelo)
+        """
+        if self.deadline is None:
+            return self.rtt.rto
+        return max(self.deadline - now, 0)
+
+
+class GoBackNReceiver:
+    """
+    Estado del receptor de Go Back N (y de Stop and Wait, con ventana de 1)
+    Confirma con ACKs acumulativos. Con ventana mayor a 1 guarda los paquetes que llegan
+    fuera de orden y los informa en bloques SACK, para que el emisor no los reenvíe.
+    """
+
+    def __init__(self, arch, window_sz, ack_next_expected=False, first_pkg_id=FIRST_DATA_PKG_ID):
+        """
+        Inicializa el receptor
+
+        Args:
+            arch: ArchiveRecv donde se escribe el archivo
+            window_sz: Paquetes fuera de orden que se pueden guardar (1 = no guardar ninguno)
+            ack_next_expected: True si el ACK indica el próximo paquete esperado (upload)
+                en vez del último paquete recibido en orden (download)
+            first_pkg_id: pkg_id del primer paquete de datos
+        """
+        self.arch = arch
+        self.window_sz = window_sz
+        self.ack_next_expected = ack_next_expected
+        self.expected_pkg_id = first_pkg_id
+        self.buffer = {}                    # pkg_id -> (flag_end, data)
+        self.buffered = RangeSet()          # los pkg_ids de buffer, para los bloques SACK
+        self.finished = False
+        self.in_order = True                # el último paquete llegó en orden y sin huecos pendientes
+
+    def receive(self, pkg):
+        """
+        Procesa un paquete de datos. in_order queda en False si el paquete llegó fuera de orden, llenó
+        un hueco o estaba repetido: su ACK no se demora (ver protocol/ack.py, DelayedAck)
+
+        Returns:
+            bytes | None: ACK a enviar, o None si el paquete se descarta
+        """
+        flag_end, data_len, pkg_id, data = self.arch.recv_pckg_go_back_n(pkg)
+        if data_len == -1:
+            return None
+
+        self.in_order = pkg_id == self.expected_pkg_id and not self.buffer
+        if pkg_id == self.expected_pkg_id:
+            self._deliver(flag_end, data)
+            while not self.finished and self.expected_pkg_id in self.buffer:
+                self._deliver(*self.buffer.pop(self.expected_pkg_id))
+            self.buffered.discard_below(self.expected_pkg_id)
+        elif self.expected_pkg_id < pkg_id < self.expected_pkg_id + self.window_sz:
+            # Se copia: data es una vista de toda la lectura con GRO (hasta 64 KiB), que si no quedaría
+            # en memoria mientras el paquete espera en el buffer
+            self.buffer.setdefault(pkg_id, (flag_end, bytes(data)))
+            self.buffered.add(pkg_id)
+
+        return self.ack()
+
+    def _deliver(self, flag_end, data):
+        if flag_end == 1:
+            self.finished = True
+        else:
+            self.arch.write_data(data)
+        self.expected_pkg_id += 1
+
+    def ack(self):
+        """
+        ACK acumulativo actual, con los bloques SACK de lo guardado fuera de orden
+        """
+        ack_num = self.expected_pkg_id if self.ack_next_expected else self.expected_pkg_id - 1
+        return encode_ack(ack_num, self.sack_blocks())
+
+    def sack_blocks(self):
+        """
+        Los primeros SACK_MAX_BLOCKS rangos (primero, último) de pkg_ids guardados fuera de orden,
+        de menor a mayor (los que entran en el ACK)
+        """
+        return self.buffered.ranges(SACK_MAX_BLOCKS)
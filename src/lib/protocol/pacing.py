@@ -0,0 +1,135 @@
+import math
+import sys
+import os
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import (
+    PACE_AUTO, PACE_OFF, PACING_GAIN_STARTUP, PACING_GAIN, PACING_RATE_SAMPLES, PACING_BURST_TIME, PACING_MIN_BURST
+)
+
+
+class Pacer:
+    """
+    Pacing del emisor con un token bucket: los paquetes salen a `rate` bytes por segundo, con
+    ráfagas de a lo sumo `burst` bytes, en lugar de salir juntos todos los que entran en la ventana
+    (una ráfaga así llena la cola del cuello de botella y es la que termina en pérdidas).
+    Con un ritmo fijo se usa ese; en modo automático se recalcula en cada vuelta del loop del emisor
+    a partir de:
+    - la ventana repartida a lo largo del RTT: cwnd paquetes por srtt
+    - el ritmo de entrega medido: bytes confirmados por segundo, una muestra por RTT, el máximo
+      de las últimas PACING_RATE_SAMPLES (así una cola que infla el RTT no frena al emisor)
+    por PACING_GAIN_STARTUP en slow start y PACING_GAIN después, para dejar crecer a la ventana.
+    Hasta tener el RTT no hay ritmo y los paquetes salen como sin pacing.
+    No hace I/O: el loop del emisor le pregunta cuántos paquetes puede mandar y cuánto esperar.
+    """
+
+    def __init__(self, pkg_size, rate=None):
+        """
+        Inicializa el pacing
+
+        Args:
+            pkg_size: Bytes por paquete hasta medir el promedio de los enviados
+            rate: Ritmo fijo en bytes por segundo, None para el modo automático
+        """
+        self.fixed = rate is not None
+        self.rate = None
+        self.burst = 0.0
+        self.pkg_size = pkg_size        # bytes promedio por paquete enviado
+        self.tokens = 0.0
+        self.last_refill = None
+        self.last_delivered = -1
+        self.sample_start = None
+        self.sample_delivered = 0
+        self.delivery_rates = deque(maxlen=PACING_RATE_SAMPLES)
+        self.max_delivery_rate = 0.0
+        if rate is not None:
+            self._set_rate(rate)
+
+    def _set_rate(self, rate):
+        self.rate = rate
+        self.burst = max(PACING_MIN_BURST * self.pkg_size, rate * PACING_BURST_TIME)
+
+    def update(self, sender, now):
+        """
+        Recalcula el ritmo con el estado del emisor (GoBackNSender o SelectiveRepeatSender). Sólo cambia
+        cuando llega un ACK de datos nuevos (se llama en cada vuelta del loop, tiene que ser barato)
+        """
+        stats = sender.stats
+        delivered = stats.pkgs_delivered
+        if self.fixed or delivered == self.last_delivered or sender.rtt.srtt is None or not stats.pkgs_sent:
+            return
+        self.last_delivered = delivered
+        self.pkg_size = stats.bytes_sent / stats.pkgs_sent
+
+        srtt = max(sender.rtt.srtt, 1e-6)
+        if self.sample_start is None:
+            self.sample_start, self.sample_delivered = now, delivered
+        elif now - self.sample_start >= srtt:
+            self.delivery_rates.append((delivered - self.sample_delivered) * self.pkg_size / (now - self.sample_start))
+            self.max_delivery_rate = max(self.delivery_rates)
+            self.sample_start, self.sample_delivered = now, delivered
+
+        congestion = sender.congestion
+        rate = max(congestion.window * self.pkg_size / srtt, self.max_delivery_rate)
+        self._set_rate(rate * (PACING_GAIN_STARTUP if congestion.cwnd < congestion.ssthresh else PACING_GAIN))
+
+    def _refill(self, now):
+        if self.last_refill is None:
+            self.tokens = self.burst
+        elif now != self.last_refill:
+            self.tokens = min(self.tokens + self.rate * (now - self.last_refill), self.burst)
+        self.last_refill = now
+
+    def allowance(self, now):
+        """
+        Paquetes que se pueden mandar ahora
+
+        Returns:
+            int | None: cantidad de paquetes, None si todavía no hay ritmo (sin límite)
+        """
+        if self.rate is None:
+            return None
+        self._refill(now)
+        if self.tokens <= 0:
+            return 0
+        return math.ceil(self.tokens / self.pkg_size)
+
+    def on_send(self, pkgs, now):
+        """
+        Descuenta los paquetes enviados (también las retransmisiones, que no piden permiso: el bucket
+        queda en negativo y los próximos paquetes esperan)
+        """
+        if self.rate is None or not pkgs:
+            return
+        self._refill(now)
+        self.tokens -= sum(map(len, pkgs))
+
+    def delay(self, now):
+        """
+        Tiempo hasta que se pueda mandar el próximo paquete
+        """
+        if self.rate is None or self.last_refill is None:
+            return 0.0
+        return max(-self.tokens / self.rate - (now - self.last_refill), 0.0)
+
+    def __str__(self):
+        if self.rate is None:
+            return "pacing=-"
+        return f"pacing={self.rate * 8 / 1e6:.2f}Mbit/s" + (" (fijo)" if self.fixed else "")
+
+
+def create_pacer(pace, pkg_size):
+    """
+    Crea el pacing de una sesión
+
+    Args:
+        pace: PACE_AUTO, PACE_OFF o un ritmo fijo en Mbit/s
+        pkg_size: Bytes por paquete (datos negociados + header)
+
+    Returns:
+        Pacer | None: None sin pacing
+    """
+    if pace == PACE_OFF:
+        return None
+    return Pacer(pkg_size, None if pace == PACE_AUTO else pace * 1e6 / 8)
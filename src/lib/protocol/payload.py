@@ -0,0 +1,90 @@
+import socket
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import (
+    SIZE_PKG, HEADER_SIZE, IP_UDP_HEADERS, MIN_PAYLOAD_SIZE, MAX_PAYLOAD_SIZE, PAYLOAD_AUTO,
+    ADAPTIVE_EPOCH, ADAPTIVE_LOSS_HIGH, ADAPTIVE_LOSS_LOW
+)
+
+IP_MTU = getattr(socket, "IP_MTU", 14)  # Linux
+
+
+def path_mtu(addr):
+    """
+    MTU del camino hacia addr según la tabla de rutas del kernel (sólo Linux)
+
+    Returns:
+        int | None: MTU en bytes, o None si no se puede obtener
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(addr)
+        return sock.getsockopt(socket.IPPROTO_IP, IP_MTU)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+def clamp_payload_size(size):
+    return max(MIN_PAYLOAD_SIZE, min(size, MAX_PAYLOAD_SIZE))
+
+
+def resolve_payload_size(value, server_addr):
+    """
+    Tamaño de datos por paquete a proponer en el handshake
+
+    Args:
+        value: Tamaño en bytes, o PAYLOAD_AUTO para que el datagrama entre justo en el MTU del camino
+        server_addr: Dirección del servidor
+
+    Returns:
+        int: tamaño de datos por paquete
+    """
+    if value == PAYLOAD_AUTO:
+        mtu = path_mtu(server_addr)
+        if mtu is None:
+            return SIZE_PKG
+        return clamp_payload_size(mtu - IP_UDP_HEADERS - HEADER_SIZE)
+    return clamp_payload_size(int(value))
+
+
+class AdaptiveChunking:
+    """
+    Modo adaptativo del tamaño de los paquetes: cada ADAPTIVE_EPOCH paquetes enviados mira
+    qué fracción fueron retransmisiones. Con mucha pérdida achica los datos por paquete a la
+    mitad (un paquete grande que se pierde cuesta más, y si se fragmenta en IP basta con perder
+    un fragmento), con poca pérdida los vuelve a agrandar hasta el tamaño negociado.
+    """
+
+    def __init__(self, arch, max_size):
+        """
+        Inicializa el modo adaptativo
+
+        Args:
+            arch: ArchiveSender cuyo chunk_size se ajusta
+            max_size: Tamaño negociado en el handshake (tope)
+        """
+        self.arch = arch
+        self.max_size = max_size
+        self.min_size = min(MIN_PAYLOAD_SIZE, max_size)
+        self.last_sent = 0
+        self.last_retransmitted = 0
+
+    def update(self, stats):
+        """
+        Ajusta el tamaño de los próximos paquetes según las TransferStats del emisor
+        """
+        sent = stats.pkgs_sent - self.last_sent
+        if sent < ADAPTIVE_EPOCH:
+            return
+        loss = (stats.pkgs_retransmitted - self.last_retransmitted) / sent
+        self.last_sent = stats.pkgs_sent
+        self.last_retransmitted = stats.pkgs_retransmitted
+
+        if loss > ADAPTIVE_LOSS_HIGH:
+            self.arch.chunk_size = max(self.arch.chunk_size // 2, self.min_size)
+        elif loss < ADAPTIVE_LOSS_LOW:
+            self.arch.chunk_size = min(self.arch.chunk_size * 2, self.max_size)
@@ -1,216 +1,545 @@
+import asyncio
 import socket
-import queue
-from lib.protocol.archive import ArchiveSender, ArchiveRecv
+import tempfile
+from lib.protocol.archive import ArchiveSender, ArchiveRecv, read_resume_offset, partial_marker, mark_stream_done
+from lib.protocol.delta import file_signatures, apply_delta
+from lib.protocol.compression import available_codecs
+from lib.protocol.bundle import bundle_entries, write_bundle, extract_bundle
+from lib.protocol.go_back_n import GoBackNSender, GoBackNReceiver
+from lib.protocol.ack import decode_ack, create_ack_policy
+from lib.protocol.batch_io import BatchSocket
+from lib.protocol.selective_repeat import SelectiveRepeatSender, SelectiveRepeatReceiver
+from lib.protocol.congestion import create_congestion_controller
+from lib.protocol.rtt import RttEstimator
+from lib.protocol.channel import PacketChannel
+from lib.protocol.setup import (
+    encode_setup, decode_setup, setup_nonce, encode_setup_ack, decode_setup_ack, is_setup_ack, stream_range
+)
 import os
+import random
 import time
 from lib.protocol.utils import setup_logging
-from lib.constants import STOP_AND_WAIT
+from lib.protocol.payload import AdaptiveChunking
+from lib.protocol.pacing import create_pacer
+from lib.protocol.fec import FecEncoder, FecDecoder
+from lib.constants import (
+    STOP_AND_WAIT, INITIAL_RTO, CONGESTION_CONTROL, WINDOW_SIZE_SW, WINDOW_SIZE_GBN, SIZE_PKG, RECV_BUFFER_SIZE,
+    UPLOAD, DOWNLOAD, SETUP_OK, SETUP_NOT_FOUND, SETUP_BAD_REQUEST, SETUP_BUSY, SETUP_MAX_RETRIES, SETUP_OPT_DELTA,
+    DELTA_SUFFIX, SETUP_OPT_COMPRESS, SETUP_OPT_BUNDLE, BUNDLE_NAME_SEP, BUNDLE_SUFFIX, SETUP_OPT_PACE, PACE_AUTO,
+    HEADER_SIZE, SETUP_OPT_FEC, DUP_ACK_THRESHOLD, ACK_EVERY
+)
+
+
+def _storage_path(name):
+    """
+    Path absoluto del archivo dentro del storage del servidor
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    target_dir = os.path.abspath(os.path.join(current_dir, "..", "server"))
+    return os.path.join(target_dir, "storage", name)
+
+def _receive_path(path, delta, bundle):
+    """
+    Dónde se recibe un upload: las diferencias de un upload delta y los bundles se reciben al lado del
+    destino y recién al final se aplican
+    """
+    if delta:
+        return path + DELTA_SUFFIX
+    if bundle:
+        return path + BUNDLE_SUFFIX
+    return path
+
+def _dup_ack_threshold(fec):
+    """
+    ACKs duplicados con los que el emisor de GBN da un paquete por perdido. Con FEC se espera a que pase
+    el bloque con sus paquetes de paridad: el receptor puede rearmar la pérdida sin que se retransmita
+    """
+    return DUP_ACK_THRESHOLD if fec is None else max(DUP_ACK_THRESHOLD, fec[0] + fec[1])
+
 
 ################################### PROTOCOLO DEL SERVIDOR ################################################################
-def handshake_server(channel: queue.Queue, addr, writing_queue, verbose=False, quiet=False):
-    logger = setup_logging('protocol.server.handshake', verbose, quiet)
+async def _recv(channel: PacketChannel, timeout=None):
+    """
+    Espera el próximo paquete de la sesión (los pone el loop del servidor al recibirlos).
+    Devuelve None si vence el timeout.
+    """
+    return await channel.get(timeout)
+
+async def _wait_writes(arch: ArchiveRecv):
+    """
+    Frena la recepción mientras el archivo tiene demasiados bloques sin escribir (ver
+    ArchiveRecv.write_backlog), sin bloquear el loop del servidor: las demás sesiones siguen.
+    """
+    future = arch.write_backlog()
+    while future is not None:
+        await asyncio.wrap_future(future)
+        future = arch.write_backlog()
+
+async def _close_archive(arch: ArchiveRecv, complete=False):
+    """
+    Cierra el archivo recibido (escribe lo pendiente y hace fsync) sin bloquear el loop del servidor.
+    Si no está completo queda su marcador, para poder retomar el upload.
+    """
+    if not arch.closed:
+        await asyncio.get_running_loop().run_in_executor(None, arch.close, True, complete)
+
+def _pack_bundle(name):
+    """
+    Arma en un archivo temporal el bundle de los archivos de name (un directorio del storage, o una
+    lista de nombres separados por BUNDLE_NAME_SEP)
+
+    Returns:
+        str: path del bundle
+    """
+    fd, bundle_path = tempfile.mkstemp(suffix=BUNDLE_SUFFIX)
+    os.close(fd)
     try:
-        logger.debug(f">>> Server: Iniciando manejo de cliente {addr}")
-        conexion_type = channel.get(block=True)
-        logger.debug(f">>> Server: Recibí conexion_type de {addr}")
-
-        writing_queue.put(((0).to_bytes(4, "big"), addr))
-        logger.debug(f">>> Server: Envié ACK de conexion_type a {addr}")
-        
-        # Esperar protocol con timeout
+        write_bundle(bundle_entries([_storage_path(n) for n in name.split(BUNDLE_NAME_SEP)], skip_incomplete=True),
+                     bundle_path)
+    except BaseException:
+        os.remove(bundle_path)
+        raise
+    return bundle_path
+
+async def _open_sender(path, payload_size, offset, length, delta, codec=None, bundle=None):
+    """
+    ArchiveSender de un download: el archivo, sus firmas si el cliente las pidió para un upload delta,
+    o el bundle de los archivos pedidos (bundle es el nombre pedido). Las firmas y el bundle se arman
+    fuera del loop del servidor.
+    """
+    loop = asyncio.get_running_loop()
+    if bundle is not None:
+        bundle_path = await loop.run_in_executor(None, _pack_bundle, bundle)
         try:
-            queue_size = channel.qsize()
-            #print(f">>> Server: Cola de {addr} tiene {queue_size} paquetes antes de esperar protocol")
-            protocol = channel.get(block=True, timeout=2.0)  # Timeout aumentado
-            logger.debug(f">>> Server: recibí protocol={protocol} de {addr}")
-        except queue.Empty:
-            queue_size = channel.qsize()
-            #print(f">>> Server: timeout esperando protocol de {addr}, cola tiene {queue_size} paquetes")
-            return
+            return ArchiveSender(bundle_path, payload_size, codec=codec)
+        finally:
+            os.remove(bundle_path)  # el sender lo tiene abierto y mapeado
+    if not delta:
+        return ArchiveSender(path, payload_size, offset, length, codec=codec)
+    signatures = await loop.run_in_executor(None, file_signatures, path)
+    return ArchiveSender(None, payload_size, data=signatures, codec=codec)
+
+async def _apply_delta_upload(path, logger):
+    """
+    Rearma path con las diferencias recibidas en path + DELTA_SUFFIX y lo reemplaza (las sesiones que lo
+    estaban leyendo siguen con la copia anterior). Si el resultado no coincide con el archivo del cliente
+    se deja el anterior.
 
-        # Reenviar ACK si el cliente reenvía el mismo paquete
-        while protocol == conexion_type:  # entonces el ACK se perdio, reenviamos
-            logger.debug(f">>> Server: Cliente reenvió conexion_type, reenviando ACK a {addr}")
-            writing_queue.put(((0).to_bytes(4, "big"), addr))
-            try:
-                protocol = channel.get(block=True, timeout=2.0)  # Timeout aumentado
-            except queue.Empty:
-                logger.warning(f"Timeout esperando protocol de {addr}")
-                return
-
-        writing_queue.put(((1).to_bytes(4, "big"), addr))
-        logger.debug(f">>> Server: envié ACK de protocol a {addr}")
-        
-        # Esperar name con timeout
-        try:
-            queue_size = channel.qsize()
-            #print(f">>> Server: Cola de {addr} tiene {queue_size} paquetes antes de esperar name")
-            name = channel.get(block=True, timeout=2.0)  # Timeout aumentado
-            logger.debug(f">>> Server: recibí name={name} de {addr}")
-        except queue.Empty:
-            queue_size = channel.qsize()
-            #print(f">>> Server: timeout esperando name de {addr}, cola tiene {queue_size} paquetes")
-            return
+    Returns:
+        bool: True si se rearmó
+    """
+    delta_path = path + DELTA_SUFFIX
+    tmp = delta_path + ".tmp"
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, apply_delta, path, delta_path, tmp)
+        os.replace(tmp, path)
+        return True
+    except (OSError, ValueError) as e:
+        logger.error(f">>> Server: no se pudo rearmar {path} con las diferencias: {e}")
+        return False
+    finally:
+        for leftover in (tmp, delta_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+async def _extract_bundle_upload(path, logger):
+    """
+    Desarma en el directorio path el bundle recibido en path + BUNDLE_SUFFIX
 
-        # Reenviar ACK si el cliente reenvía el mismo paquete
-        while name == protocol:  # entonces el ACK se perdio, reenviamos
-            logger.debug(f">>> Server: cliente reenvió protocol, reenviando ACK a {addr}")
-            writing_queue.put(((1).to_bytes(4, "big"), addr))
-            try:
-                name = channel.get(block=True, timeout=2.0)  # Timeout aumentado
-            except queue.Empty:
-                logger.warning(f">>> Server: timeout esperando name de {addr}")
-                return
-
-        name = name.decode()
-        protocol = protocol.decode()
-        conexion_type = conexion_type.decode()
-        #logger.debug(f">>> Server: conexion_type={conexion_type}, protocol={protocol}, name={name}, addr={addr}")
-    except Exception as e:
-        logger.warning(f">>> Server: Error en manage_client: {e}")
-        return
-    
-    return conexion_type, protocol, name
+    Returns:
+        bool: True si se desarmó entero
+    """
+    bundle_path = path + BUNDLE_SUFFIX
+    try:
+        files, size = await asyncio.get_running_loop().run_in_executor(None, extract_bundle, bundle_path, path)
+        logger.info(f">>> Server: {files} archivos ({size} bytes) guardados en {path}")
+        return True
+    except (OSError, ValueError) as e:
+        logger.error(f">>> Server: no se pudo desarmar el bundle de {path}: {e}")
+        return False
+    finally:
+        if os.path.exists(bundle_path):
+            os.remove(bundle_path)
+
+def complete_stream(name, stream):
+    """
+    Un stream de un upload en paralelo recibió su rango entero (cada stream por separado no sabe si
+    el archivo ya está completo: lo sabe el último en terminar)
+
+    Args:
+        name: Nombre del archivo en el servidor
+        stream: (id de transferencia, stream, streams, tamaño del archivo), como llega en el SETUP
+
+    Returns:
+        bool: True si con este stream el archivo quedó completo
+    """
+    transfer_id, index, streams, _ = stream
+    return mark_stream_done(_storage_path(name), transfer_id, index, streams)
 
-def download_from_client(name, writing_queue: queue.Queue, addr, window_sz, channel, timeout, verbose=False, quiet=False):
+def handshake_server(msg, addr, writer, session_id, verbose=False, quiet=False, busy=False):
+    """
+    Responde el SETUP con el que un cliente abre una sesión: valida el pedido y envía el SETUP-ACK
+    con lo negociado (tamaño de datos por paquete) y el id de la sesión.
+    Si el SETUP-ACK se pierde el cliente reenvía el mismo SETUP, y el servidor le vuelve a mandar
+    el SETUP-ACK guardado sin pasar por acá.
+
+    Si el cliente pide retomar la transferencia, el SETUP-ACK lleva el offset desde el que sigue:
+    en un upload los bytes que el servidor ya tiene (según el marcador de archivo incompleto), en un
+    download los que el cliente dice tener (0 si el archivo es más chico).
+    Si el SETUP es de un stream de una transferencia en paralelo, la sesión mueve sólo el rango del
+    archivo que le toca (stream_range) y el SETUP-ACK lleva el tamaño del archivo.
+    Con SETUP_OPT_DELTA un download manda las firmas del archivo en lugar del archivo, y un upload
+    recibe las diferencias contra él (ver protocol/delta.py); el archivo tiene que existir.
+    Con SETUP_OPT_COMPRESS el cliente pide comprimir los paquetes de datos con un códec: si está
+    disponible el SETUP-ACK devuelve la opción, si no la transferencia sigue sin comprimir.
+    Con SETUP_OPT_BUNDLE un upload manda un bundle con varios archivos para el directorio del nombre, y
+    un download pide los archivos de una lista de nombres (ver protocol/bundle.py). El download de un
+    directorio también se manda como bundle: el SETUP-ACK lleva la opción siempre que viaja un bundle.
+    Con SETUP_OPT_PACE el cliente elige el pacing de los paquetes del servidor en un download.
+    Con SETUP_OPT_FEC el cliente pide corrección de errores (ver protocol/fec.py): el emisor manda paquetes
+    de paridad y el receptor rearma con ellos las pérdidas. Con Stop and Wait no sirve (hay un solo paquete
+    en vuelo): el SETUP-ACK vuelve sin la opción.
+    busy indica que el archivo se está descargando: un upload se rechaza.
+
+    Returns:
+        tuple | None: (SETUP-ACK enviado, tipo, protocolo, nombre, datos por paquete, offset, bytes a
+        transferir desde offset o None si es hasta el final, tamaño del archivo si es un stream o None,
+        si es delta, códec aceptado o None, si es un bundle, pacing pedido o None, (K, M) de FEC aceptado o
+        None), o None si se rechazó
+    """
+    logger = setup_logging('protocol.server.handshake', verbose, quiet)
+    setup = decode_setup(msg)
+    if setup is None:
+        logger.warning(f">>> Server: SETUP inválido de {addr}, rechazado")
+        writer.send(encode_setup_ack(SETUP_BAD_REQUEST, 0, setup_nonce(msg), 0), addr)
+        return None
+
+    conexion_type, protocol, name, payload_size, nonce, options, resume_offset, stream, codec, pace, fec = setup
+    path = _storage_path(name)
+    delta = bool(options & SETUP_OPT_DELTA)
+    bundle = bool(options & SETUP_OPT_BUNDLE) or (conexion_type == DOWNLOAD and os.path.isdir(path))
+    logger.debug(f">>> Server: SETUP de {addr}: conexion_type={conexion_type}, protocol={protocol}, name={name!r}, "
+                 f"payload={payload_size}, resume={resume_offset}, stream={stream}, delta={delta}, codec={codec}, "
+                 f"bundle={bundle}, pace={pace}, fec={fec}")
+    if (resume_offset is not None) + (stream is not None) + delta + bundle > 1:
+        logger.warning(f">>> Server: SETUP de {addr} combina retomar, streams, delta y varios archivos, rechazado")
+        writer.send(encode_setup_ack(SETUP_BAD_REQUEST, 0, nonce, 0), addr)
+        return None
+    if conexion_type == UPLOAD and (os.path.isfile(path) if bundle else os.path.isdir(path)):
+        logger.warning(f">>> Server: {name} ya existe como {'archivo' if bundle else 'directorio'}, upload rechazado")
+        writer.send(encode_setup_ack(SETUP_BAD_REQUEST, 0, nonce, 0), addr)
+        return None
+    # Un archivo con el upload sin terminar no se puede descargar (ni usar de base para un upload delta)
+    paths = [_storage_path(n) for n in name.split(BUNDLE_NAME_SEP)] if conexion_type == DOWNLOAD and bundle else [path]
+    if (conexion_type == DOWNLOAD or delta) and not all(os.path.exists(p) and not os.path.exists(partial_marker(p))
+                                                        for p in paths):
+        logger.error(f">>> Server: archivo no encontrado: {name!r}")
+        writer.send(encode_setup_ack(SETUP_NOT_FOUND, 0, nonce, 0), addr)
+        return None
+    if conexion_type == UPLOAD and busy:
+        logger.warning(f">>> Server: {name} se está descargando, upload rechazado")
+        writer.send(encode_setup_ack(SETUP_BUSY, 0, nonce, 0), addr)
+        return None
+
+    offset = 0
+    length = None
+    size = None
+    if stream is not None:
+        _, index, streams, size = stream
+        if conexion_type == DOWNLOAD:
+            size = os.path.getsize(path)
+        offset, length = stream_range(size, index, streams)
+        logger.info(f">>> Server: stream {index + 1}/{streams} de {name}: {length} bytes desde el byte {offset}")
+    elif resume_offset is not None:
+        if conexion_type == UPLOAD:
+            offset = read_resume_offset(path)
+        elif resume_offset <= os.path.getsize(path):
+            offset = resume_offset
+        logger.info(f">>> Server: retomando {name} desde el byte {offset}")
+    if codec is not None and codec not in available_codecs():
+        logger.warning(f">>> Server: códec {codec} no disponible, {name} se transfiere sin comprimir")
+        codec = None
+    if fec is not None and protocol == STOP_AND_WAIT:
+        logger.warning(f">>> Server: FEC no se usa con Stop and Wait, {name} se transfiere sin FEC")
+        fec = None
+    accepted = (options & SETUP_OPT_DELTA | (SETUP_OPT_COMPRESS if codec is not None else 0)
+                | (SETUP_OPT_BUNDLE if bundle else 0) | options & SETUP_OPT_PACE | (SETUP_OPT_FEC if fec else 0))
+    setup_ack = encode_setup_ack(SETUP_OK, payload_size, nonce, session_id, accepted,
+                                 resume_offset=offset if resume_offset is not None else None, size=size)
+    writer.send(setup_ack, addr)
+    logger.debug(f">>> Server: envié SETUP-ACK a {addr} (sesión {session_id})")
+    return setup_ack, conexion_type, protocol, name, payload_size, offset, length, size, delta, codec, bundle, pace, fec
+
+async def download_from_client(name, writer, addr, window_sz, channel: PacketChannel, timeout, verbose=False, quiet=False,
+                               congestion=CONGESTION_CONTROL, payload_size=SIZE_PKG, adaptive_payload=False, offset=0,
+                               length=None, delta=False, codec=None, bundle=False, pace=PACE_AUTO, fec=None):
     """
     Envía archivo al cliente usando Go Back N.
-    Utiliza una ventana deslizante para enviar n paquetes y luego esperar ACKs.
+    Utiliza una ventana deslizante cuyo tamaño lo decide el control de congestión (con tope window_sz)
+    y, ante un timeout, reenvía desde el primer paquete sin ACK.
+    El timeout recibido es el RTO inicial, luego se ajusta con el RTT medido.
+    payload_size es el tamaño de datos por paquete negociado en el handshake y offset el byte desde
+    el que se envía (distinto de 0 si el cliente retoma un download). Con length se envían sólo esos
+    bytes (el rango de un stream de una transferencia en paralelo). Con delta se envían las firmas del
+    archivo (el primer paso de un upload delta). Con codec los paquetes se comprimen. Con bundle se
+    envía el bundle de los archivos de name (un directorio o una lista de nombres). pace es el pacing
+    de los paquetes (PACE_AUTO, PACE_OFF o Mbit/s, ver protocol/pacing.py). Con fec = (K, M) se agregan
+    M paquetes de paridad por cada K de datos (ver protocol/fec.py).
     """
     logger = setup_logging('protocol.server.download', verbose, quiet)
-    # Usar path absoluto
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    target_dir = os.path.join(current_dir, "..", "server")
-    target_dir = os.path.abspath(target_dir) 
-
-    path = os.path.join(target_dir, "storage", name)
+    path = _storage_path(name)
 
-    if not os.path.exists(path):
+    if not bundle and not os.path.exists(path):
         logger.error(f">>> Server: archivo no encontrado: {path}")
         return
     logger.info(f">>> Server: archivo encontrado, empezando envío con Go Back N...")
-    arch = ArchiveSender(path)
-    
-    pkg_id = 3
-    pkgs_not_ack = {}
-    file_finished = False
-    end = False
-    
-    while not end:
-        # Fase 1: Enviar paquetes hasta llenar la ventana o terminar el archivo
-        while(len(pkgs_not_ack) < window_sz and not file_finished):
-            pkg, pkg_id_bytes = arch.next_pkg_go_back_n(pkg_id)  # Usar pkg_id directamente
-            if pkg is None:
-                # Crear paquete END con flag_end = 1
-                first_byte = 1  # flag_end = 1 para END
-                pkg = first_byte.to_bytes(1, "big") + (0).to_bytes(2, "big") + (pkg_id).to_bytes(4, "big")  # data_len = 0, pkg_id = pkg_id
-                pkg_id_bytes = (pkg_id).to_bytes(4, "big")  # pkg_id = pkg_id para END
-                file_finished = True
-                logger.debug(f">>> Server: creando paquete END con pkg_id={pkg_id}")
-            writing_queue.put((pkg, addr))
-            logger.info(f">>> Server: envió paquete con flag_end={pkg[0] & 1}, pkg_id={pkg_id} (len={len(pkg)})")
-            
-            # Siempre agregar a pkgs_not_ack, incluyendo el paquete END
-            pkgs_not_ack[pkg_id_bytes] = pkg
-            pkg_id += 1
-        
-        # Fase 2: Esperar ACKs
-        print(f">>> Server: termine de enviar los paquetes, tengo que esperar ACK. Paquetes sin ACK: {len(pkgs_not_ack)}")
-        
+    rtt = RttEstimator(timeout)
+    arch = await _open_sender(path, payload_size, offset, length, delta, codec, name if bundle else None)
+    sender = GoBackNSender(arch, window_sz, rtt, create_congestion_controller(congestion, window_sz),
+                           dup_ack_threshold=_dup_ack_threshold(fec))
+    chunking = AdaptiveChunking(arch, payload_size) if adaptive_payload else None
+    pacer = create_pacer(pace, payload_size + HEADER_SIZE)
+    encoder = FecEncoder(*fec) if fec is not None else None
+    try:
+        await _send_to_client(sender, writer, addr, channel, logger, chunking, pacer, encoder)
+    finally:
+        arch.close()  # también si la sesión se cancela (cliente inactivo)
+    logger.info(f">>> Server: download completado para {name} hacia {addr} ({sender.stats})")
+    if arch.compressor is not None:
+        logger.info(f">>> Server: compresión de {name}: {arch.compressor}")
+
+
+async def download_from_client_selective_repeat(name, writer, addr, window_sz, channel: PacketChannel, timeout, verbose=False,
+                                                quiet=False, congestion=CONGESTION_CONTROL, payload_size=SIZE_PKG,
+                                                adaptive_payload=False, offset=0, length=None, delta=False,
+                                                codec=None, bundle=False, pace=PACE_AUTO, fec=None):
+    """
+    Envía archivo al cliente usando Selective Repeat.
+    Cada paquete tiene su propio timer y sólo se reenvían los paquetes sin ACK cuyo timer venció.
+    offset, length, delta, codec, bundle, pace y fec como en download_from_client.
+    """
+    logger = setup_logging('protocol.server.download', verbose, quiet)
+    path = _storage_path(name)
+
+    if not bundle and not os.path.exists(path):
+        logger.error(f">>> Server: archivo no encontrado: {path}")
+        return
+    logger.info(f">>> Server: archivo encontrado, empezando envío con Selective Repeat...")
+    rtt = RttEstimator(timeout)
+    arch = await _open_sender(path, payload_size, offset, length, delta, codec, name if bundle else None)
+    sender = SelectiveRepeatSender(arch, window_sz, rtt, create_congestion_controller(congestion, window_sz))
+    chunking = AdaptiveChunking(arch, payload_size) if adaptive_payload else None
+    pacer = create_pacer(pace, payload_size + HEADER_SIZE)
+    encoder = FecEncoder(*fec) if fec is not None else None
+    try:
+        await _send_to_client(sender, writer, addr, channel, logger, chunking, pacer, encoder)
+    finally:
+        arch.close()  # también si la sesión se cancela (cliente inactivo)
+    logger.info(f">>> Server: download completado para {name} hacia {addr} ({sender.stats})")
+    if arch.compressor is not None:
+        logger.info(f">>> Server: compresión de {name}: {arch.compressor}")
+
+
+async def _send_to_client(sender, writer, addr, channel: PacketChannel, logger, chunking=None, pacer=None,
+                          encoder=None):
+    """
+    Loop del emisor del servidor, común a GBN/SW (GoBackNSender) y SR (SelectiveRepeatSender).
+    Los ACKs del cliente llegan por channel y los paquetes salen por el writer del servidor.
+    Con chunking (AdaptiveChunking) el tamaño de los paquetes nuevos sigue a la pérdida medida.
+    Con pacer (Pacer) los paquetes de la ventana salen repartidos en el tiempo.
+    Con encoder (FecEncoder) detrás de cada bloque de paquetes nuevos salen sus paquetes de paridad.
+    """
+    while not sender.finished:
+        if chunking is not None:
+            chunking.update(sender.stats)
+        pkgs, timeout = _paced_packets(sender, pacer, time.time(), encoder)
+        writer.send_many(pkgs, addr, sender.arch.limit - sender.arch.offset)
+
         try:
-            pkg = channel.get(block=True, timeout=timeout)
-            if len(pkg) == 4:
-                ack_num = int.from_bytes(pkg, "big")
-                logger.debug(f">>> Server: ACK recibido para paquete {ack_num}")
-                
-                # Remover todos los paquetes con pkg_id <= ack_num
-                to_remove = []
-                for pkg_id_bytes_key in pkgs_not_ack:
-                    pkg_id_num = int.from_bytes(pkg_id_bytes_key, 'big')
-                    if pkg_id_num <= ack_num:
-                        to_remove.append(pkg_id_bytes_key)
-                        logger.debug(f">>> Server: removiendo paquete {pkg_id_num} de la ventana")
-                
-                for pkg_id_bytes_key in to_remove:
-                    del pkgs_not_ack[pkg_id_bytes_key]
-                
-                # Si terminamos el archivo y no hay paquetes sin confirmar, salir
-                if file_finished and not pkgs_not_ack:
-                    logger.debug(">>> Server: todos los paquetes confirmados, finalizando transferencia")
-                    end = True
-
-        except queue.Empty:
-            if file_finished and not pkgs_not_ack:
-                # Si terminamos el archivo y no hay paquetes sin confirmar, salir
-                logger.info(">>> Server: timeout pero no hay paquetes pendientes, finalizando")
-                end = True
-            else:
-                logger.warning(">>> Server: timeout, no recibi ACKs, reenvio los n paquetes")
-                for value in pkgs_not_ack.values():
-                    writing_queue.put((value, addr))
-        except ConnectionResetError:
-                logger.error(">>> Server: Conexión reseteada durante download")
-                return
+            pkg = await _recv(channel, max(timeout, 0.001))
+            ack = decode_ack(pkg) if pkg is not None else None
+            if ack is not None:
+                ack_num, sack_blocks = ack
+                if sender.ack(ack_num, time.time(), sack_blocks):
+                    logger.debug(f">>> Server: ACK recibido para paquete {ack_num} ({sender.congestion})")
         except Exception as e:
-                logger.error(f">>> Server: Error durante download: {e}")
-                return
+            logger.error(f">>> Server: Error durante download: {e}")
+            return
 
-def upload_from_client(name, channel, writing_queue: queue.Queue, addr, protocol=None, sock=None, verbose=False, quiet=False):
+        resend = sender.expired(time.time())
+        if resend:
+            logger.warning(f">>> Server: timeout, no recibi ACKs ({sender.rtt}, {sender.congestion})")
+            writer.send_many(resend, addr, sender.arch.limit - sender.arch.offset)
+            if pacer is not None:
+                pacer.on_send(resend, time.time())
+
+    if sender.gave_up:
+        logger.error(f">>> Server: un paquete alcanzó el máximo de reintentos, abandonando transferencia")
+    if pacer is not None:
+        logger.info(f">>> Server: {pacer}")
+    if encoder is not None:
+        logger.info(f">>> Server: {encoder}")
+    sender.stats.finish()
+
+
+def _paced_packets(sender, pacer, now, encoder=None):
+    """
+    Los paquetes que el emisor puede mandar ahora y cuánto esperar un ACK antes de la próxima vuelta.
+    Sin pacing son todos los que entran en la ventana y se espera hasta el timer de retransmisión; con
+    pacing son los que deja el token bucket y, si quedó lugar en la ventana, se espera como mucho hasta
+    que deje mandar el próximo. Con encoder (FecEncoder) se agregan los paquetes de paridad de los bloques
+    que se completan (también gastan del token bucket).
+
+    Returns:
+        tuple: (paquetes, segundos a esperar)
+    """
+    if pacer is None:
+        pkgs = sender.next_packets(now)
+        return encoder.protect(pkgs) if encoder is not None else pkgs, sender.time_to_next_timeout(now)
+    pacer.update(sender, now)
+    limit = pacer.allowance(now)
+    pkgs = sender.next_packets(now, limit)
+    if encoder is not None:
+        pkgs = encoder.protect(pkgs)
+    pacer.on_send(pkgs, now)
+    timeout = sender.time_to_next_timeout(now)
+    if limit is not None and len(pkgs) >= limit:
+        timeout = min(timeout, pacer.delay(now))
+    return pkgs, timeout
+
+async def upload_from_client(name, channel: PacketChannel, writer, addr, protocol=None, sock=None, verbose=False, quiet=False,
+                             offset=0, size=None, delta=False, codec=None, bundle=False, fec=None, ack_every=ACK_EVERY):
     """
     Recibe archivo del cliente usando Go Back N o Stop and Wait.
-    Protocol determina la lógica de ACK:
-    - STOP_AND_WAIT: ACK del siguiente paquete esperado (pkg_id+1)
-    - GO_BACK_N: ACK del último paquete recibido en orden (expected_pkg_id-1) para fuera de orden
+    El ACK indica el siguiente paquete esperado (pkg_id+1). Con Go Back N los paquetes
+    que llegan fuera de orden se guardan y se informan con bloques SACK en el ACK, y los que llegan
+    en orden se confirman de a ack_every (ver protocol/ack.py, DelayedAck).
+    Con offset distinto de 0 se conservan esos bytes del archivo y lo recibido se escribe a continuación.
+    Con size (el tamaño del archivo) se recibe el rango de un stream, que empieza en offset: el archivo
+    queda marcado como incompleto hasta que llegan todos los streams (complete_stream).
+    Con delta se reciben las diferencias contra el archivo que ya está en el servidor, y al llegar el END
+    se rearma el archivo (el END se confirma recién si el resultado coincide con el del cliente).
+    Con codec se descomprimen los paquetes que llegan comprimidos. Con bundle se recibe un bundle que al
+    llegar el END se desarma en el directorio name (el END se confirma recién con los archivos escritos).
+    Con fec = (K, M) las pérdidas se rearman con los paquetes de paridad del cliente (ver protocol/fec.py).
+    Devuelve True si se recibió todo (el paquete END).
     """
     logger = setup_logging('protocol.server.upload', verbose, quiet)
     logger.debug(f">>> Server: upload_from_client_go_back_n iniciado para {name} desde {addr}")
-    # Usar path absoluto
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    target_dir = os.path.join(current_dir, "..", "server")
-    target_dir = os.path.abspath(target_dir)
-    path = os.path.join(target_dir, "storage", name)
-    arch = ArchiveRecv(path)
-    expected_pkg_id = 3
-    work_done = False
-    
+    path = _storage_path(name)
+    arch = ArchiveRecv(_receive_path(path, delta, bundle), background=True, offset=offset, size=size, codec=codec)
+    window_sz = WINDOW_SIZE_SW if protocol == STOP_AND_WAIT else WINDOW_SIZE_GBN
+    receiver = GoBackNReceiver(arch, window_sz, ack_next_expected=True)
+    decoder = FecDecoder(*fec) if fec is not None else None
+    ack_policy = create_ack_policy(ack_every, window_sz)
+
     logger.debug(f">>> Server: upload_from_client_go_back_n esperando paquetes de {addr}")
-    
-    while not work_done:
-        try:
-            pkg = channel.get(block=True, timeout=30.0)  # Timeout de 30 segundos
-        except queue.Empty:
-            logger.warning(f">>> Server: Timeout esperando paquetes de {addr}")
-            break
-        
-        flag_end, data_len, pkg_id, data = arch.recv_pckg_go_back_n(pkg)
-        
-        logger.debug(f">>> Server: recibí paquete flag_end={flag_end}, pkg_id={pkg_id}, esperado={expected_pkg_id}")
-        
-        
-        if pkg_id == expected_pkg_id:
-            if flag_end == 1:
-                logger.debug(f">>> Server: paquete final recibido (flag_end=1), pkg_id={pkg_id}")
-                ack_data = (pkg_id+1).to_bytes(4, "big")
+
+    try:
+        while not receiver.finished:
+            if ack_policy is not None and ack_policy.expired(time.time()):
+                writer.send(receiver.ack(), addr)  # venció la demora: se confirma lo recibido
+                ack_policy.sent()
+            timeout = ack_policy.timeout(time.time(), 30.0) if ack_policy is not None else 30.0
+            pkg = await _recv(channel, timeout)  # Timeout de 30 segundos
+            if pkg is None:
+                if ack_policy is not None and ack_policy.deadline is not None:
+                    continue
+                logger.warning(f">>> Server: Timeout esperando paquetes de {addr}")
+                break
+
+            if len(pkg) < 7:
+                continue
+
+            ack_data = None
+            send_ack = False
+            now = time.time()
+            for data_pkg in (decoder.receive(pkg) if decoder is not None else (pkg,)):
+                data_ack = receiver.receive(data_pkg)
+                if data_ack is None:
+                    continue
+                ack_data = data_ack
+                if ack_policy is None or ack_policy.on_packet(receiver.in_order, now):
+                    send_ack = True
+                if receiver.finished:
+                    break
+            await _wait_writes(arch)
+            if ack_data is None:
+                continue
+
+            if receiver.finished:
+                logger.debug(f">>> Server: paquete final recibido, finalizando transfer para {addr}")
+                # El END se confirma recién con el archivo en disco
+                await _close_archive(arch, complete=True)
+                if delta and not await _apply_delta_upload(path, logger):
+                    return False
+                if bundle and not await _extract_bundle_upload(path, logger):
+                    return False
                 for i in range(1, 11):
-                    writing_queue.put((ack_data, addr))
-                
-                logger.debug(f">>> Server: finalizando transfer para {addr}")
-                work_done = True
-            else:
-                if (data_len != -1):
-                    arch.write_data(data)
-                    ack_data = (pkg_id+1).to_bytes(4, "big")
-                    writing_queue.put((ack_data, addr))
-                    expected_pkg_id += 1
-        else:
-            writing_queue.put((expected_pkg_id.to_bytes(4, "big"), addr))
-          
-
-        
-    
-    # Cerrar archivo al terminar
-    arch.archivo.close()
+                    writer.send(ack_data, addr)
+            elif send_ack:
+                writer.send(ack_data, addr)
+                if ack_policy is not None:
+                    ack_policy.sent()
+    finally:
+        # También si la sesión se cancela (cliente inactivo)
+        await _close_archive(arch)
+    logger.info(f">>> Server: upload completado para {name} desde {addr}, archivo cerrado")
+    if decoder is not None:
+        logger.info(f">>> Server: {decoder}")
+    if ack_policy is not None:
+        logger.info(f">>> Server: {ack_policy}")
+    return receiver.finished
+
+async def upload_from_client_selective_repeat(name, channel: PacketChannel, writer, addr, window_sz, verbose=False, quiet=False,
+                                              offset=0, size=None, delta=False, codec=None, bundle=False, fec=None):
+    """
+    Recibe archivo del cliente usando Selective Repeat.
+    Confirma cada paquete individualmente y guarda los que llegan fuera de orden.
+    offset, size, delta, codec, bundle y fec como en upload_from_client. Devuelve True si se recibió todo (el paquete END).
+    """
+    logger = setup_logging('protocol.server.upload', verbose, quiet)
+    path = _storage_path(name)
+    arch = ArchiveRecv(_receive_path(path, delta, bundle), background=True, offset=offset, size=size, codec=codec)
+    receiver = SelectiveRepeatReceiver(arch, window_sz)
+    decoder = FecDecoder(*fec) if fec is not None else None
+
+    try:
+        while not receiver.finished:
+            pkg = await _recv(channel, 30.0)  # Timeout de 30 segundos
+            if pkg is None:
+                logger.warning(f">>> Server: Timeout esperando paquetes de {addr}")
+                break
+
+            if len(pkg) < 7:
+                continue
+
+            for data_pkg in (decoder.receive(pkg) if decoder is not None else (pkg,)):
+                ack_num = receiver.receive(data_pkg)
+                if ack_num is None:
+                    continue
+
+                ack_data = ack_num.to_bytes(4, "big")
+                if receiver.finished:
+                    logger.debug(f">>> Server: paquete final recibido, pkg_id={ack_num}")
+                    # El END se confirma recién con el archivo en disco
+                    await _close_archive(arch, complete=True)
+                    if delta and not await _apply_delta_upload(path, logger):
+                        return False
+                    if bundle and not await _extract_bundle_upload(path, logger):
+                        return False
+                    for i in range(1, 11):
+                        writer.send(ack_data, addr)
+                    break
+                writer.send(ack_data, addr)
+            await _wait_writes(arch)
+    finally:
+        # También si la sesión se cancela (cliente inactivo)
+        await _close_archive(arch)
     logger.info(f">>> Server: upload completado para {name} desde {addr}, archivo cerrado")
+    if decoder is not None:
+        logger.info(f">>> Server: {decoder}")
+    return receiver.finished
 
 ################################### FINAL PROTOCOLO SERVER ################################################################
 
@@ -222,253 +551,290 @@ def upload_from_client(name, channel, writing_queue: queue.Queue, addr, protocol
 
 
 ################################### PROTOCOLO DEL CLIENTE #################################################################
-def handshake(sock: socket, name: str, type: str, protocol: str, server_addr, verbose=False, quiet=False):
+def _recovered(decoder, pkgs):
+    """
+    Los paquetes recibidos seguidos de los que el decoder (FecDecoder) rearma con ellos; sin FEC, pkgs
     """
-    Realiza el handshake inicial con el servidor.
-    Envía el tipo de conexión (UPLOAD o DOWNLOAD), el protocolo (SW o GBN) y el nombre del archivo.
+    if decoder is None:
+        return pkgs
+    return [data_pkg for pkg in pkgs for data_pkg in decoder.receive(pkg)]
+
+def handshake(sock: socket, name: str, type: str, protocol: str, server_addr, verbose=False, quiet=False,
+              payload_size=SIZE_PKG, resume_offset=None, stream=None, options=0, codec=None, pace=None, fec=None):
+    """
+    Realiza el handshake inicial con el servidor, en un solo RTT.
+    Envía el SETUP con el tipo de conexión (UPLOAD o DOWNLOAD), el protocolo (SW, GBN o SR), el tamaño
+    de datos por paquete y el nombre del archivo, y lo reenvía hasta recibir el SETUP-ACK con el mismo
+    nonce. Los datos pueden empezar apenas llega: los SETUP y SETUP-ACK duplicados se reconocen por su
+    primer byte y nunca se confunden con paquetes de datos o ACKs.
+    Para retomar una transferencia se pasa resume_offset (en un download los bytes que ya se tienen,
+    en un upload 0) y el servidor responde desde qué byte se sigue.
+    Para un stream de una transferencia en paralelo se pasa stream = (id de transferencia, stream,
+    streams, tamaño del archivo o 0 en un download) y el servidor responde el tamaño del archivo.
+    options son otras opciones a pedir (p.ej. SETUP_OPT_DELTA), codec el códec con el que se pide
+    comprimir los paquetes de datos, pace el pacing de los paquetes del servidor en un download
+    (None para el que tenga configurado el servidor) y fec = (K, M) la corrección de errores que se pide.
+    Devuelve (RttEstimator con la muestra del handshake, tamaño de datos por paquete aceptado, id de sesión,
+    offset desde el que se transfiere, tamaño del archivo o None si no es un stream, códec aceptado o None,
+    si lo que viaja es un bundle con varios archivos, (K, M) de FEC aceptado o None).
     """
     logger = setup_logging('protocol.client.handshake', verbose, quiet)
-    logger.info(f"Iniciando handshake: type={type}, protocol={protocol}, name={name}")
-    stop_and_wait(sock, type.encode(), 0, server_addr)
-    stop_and_wait(sock, protocol.encode(), 1, server_addr)
-    stop_and_wait(sock, name.encode(), 2, server_addr)
-    
-    logger.info("Handshake completado")
-
-    # Delay para evitar que se mezclen paquetes del handshake con los de datos
-    import time
-    time.sleep(1.0)
-  
-def stop_and_wait(sock: socket, msg, ack_number, addr, verbose=False, quiet=False):
-    """
-    Envía un mensaje usando el protocolo Stop and Wait.
-    Reenvía el mensaje hasta recibir confirmación ACK.
-    """
-    logger = setup_logging('protocol.client.saw', verbose, quiet)
-    sock.sendto(msg, addr)
-    ack_recv = False
+    logger.info(f"Iniciando handshake: type={type}, protocol={protocol}, name={name}, payload={payload_size}")
+    rtt = RttEstimator(INITIAL_RTO)
+    nonce = random.getrandbits(32)
+    setup = encode_setup(type, protocol, name, payload_size, nonce, options, resume_offset, stream, codec, pace, fec)
+    sock.sendto(setup, server_addr)
+    send_time = time.time()
+    deadline = send_time + rtt.rto
     retry_count = 0
-    max_retries = 70
-    
-    while not ack_recv and retry_count < max_retries:
-        sock.settimeout(0.1)  # Timeout intermedio
+
+    while retry_count < SETUP_MAX_RETRIES:
+        sock.settimeout(max(deadline - time.time(), 0.001))
         try:
-            pkg, recv_addr = sock.recvfrom(1024)
-            # Verificar que el paquete viene de la dirección correcta
-            value = int.from_bytes(pkg, "big")
-            if recv_addr == addr and len(pkg) == 4 and (value == ack_number) :  # ACK de 4 bytes
-                ack_recv = True
-                ack_value = int.from_bytes(pkg, "big")
-                logger.debug(f"ACK recibido: {ack_value}")
-            elif recv_addr != addr:
-                logger.debug(f"Paquete de dirección incorrecta: {recv_addr} (esperaba {addr})")
-            elif len(pkg) != 4:
-                logger.debug(f"Paquete no es ACK válido (len={len(pkg)}), ignorando...")
+            pkg, recv_addr = sock.recvfrom(RECV_BUFFER_SIZE)
         except socket.timeout:
             retry_count += 1
-            logger.warning(f"timeout, no recibi ACK (intento {retry_count}/{max_retries})")
-            sock.sendto(msg, addr)
-    
-    if not ack_recv:
-        logger.error(f"Error: No se pudo completar el handshake después de {max_retries} intentos")
-        raise Exception("Handshake failed")
+            rtt.backoff()
+            logger.warning(f"timeout, no recibi SETUP-ACK (intento {retry_count}/{SETUP_MAX_RETRIES})")
+            sock.sendto(setup, server_addr)
+            deadline = time.time() + rtt.rto
+            continue
+
+        # Se ignora lo que no sea el SETUP-ACK de este SETUP (p.ej. datos de un download que el
+        # servidor ya empezó a enviar: se reenvían después)
+        setup_ack = decode_setup_ack(pkg) if recv_addr == server_addr else None
+        if setup_ack is None or setup_ack[2] != nonce:
+            continue
 
-def upload(sock: socket, arch: ArchiveSender, end, window_sz, server_addr, timeout, verbose=False, quiet=False):
+        status, payload_size, _, session_id, accepted, offset, size = setup_ack
+        if retry_count == 0:  # Regla de Karn
+            rtt.sample(time.time() - send_time)
+        if status == SETUP_NOT_FOUND:
+            raise FileNotFoundError(f"El servidor no tiene el archivo {name.replace(BUNDLE_NAME_SEP, ', ')}")
+        if status == SETUP_BUSY:
+            raise Exception(f"El archivo {name} se está descargando, reintentar más tarde")
+        if status != SETUP_OK:
+            raise Exception(f"El servidor rechazó el handshake (estado {status})")
+        logger.info(f"Handshake completado: sesión {session_id}, payload={payload_size} ({rtt})")
+        if offset:
+            logger.info(f"Retomando la transferencia desde el byte {offset}")
+        if codec is not None and not accepted & SETUP_OPT_COMPRESS:
+            logger.warning(f"El servidor no acepta el códec {codec}, se transfiere sin comprimir")
+            codec = None
+        if fec is not None and not accepted & SETUP_OPT_FEC:
+            logger.warning(f"El servidor no acepta FEC con {protocol}, se transfiere sin FEC")
+            fec = None
+        return rtt, payload_size, session_id, offset or 0, size, codec, bool(accepted & SETUP_OPT_BUNDLE), fec
+
+    logger.error(f"Error: No se pudo completar el handshake después de {SETUP_MAX_RETRIES} intentos")
+    raise Exception("Handshake failed")
+
+def upload(sock: socket, arch: ArchiveSender, end, window_sz, server_addr, timeout, verbose=False, quiet=False, rtt=None,
+           congestion=CONGESTION_CONTROL, adaptive_payload=False, pace=PACE_AUTO, fec=None):
     """
     Sube un archivo usando el protocolo Go Back N.
     Utiliza una ventana deslizante para enviar múltiples paquetes sin esperar confirmación.
+    El tamaño de la ventana lo decide el control de congestión, con tope window_sz, y pace el pacing
+    con el que salen sus paquetes (PACE_AUTO, PACE_OFF o Mbit/s, ver protocol/pacing.py). Con fec = (K, M)
+    (aceptado en el handshake) se agregan M paquetes de paridad por cada K de datos (ver protocol/fec.py).
+    El timeout de los ACKs sale del RttEstimator (el del handshake, o uno nuevo con RTO inicial = timeout).
+    Devuelve las TransferStats de la transferencia.
     """
+    logger = setup_logging('protocol.client.upload', verbose, quiet)
+    if rtt is None:
+        rtt = RttEstimator(timeout)
+    # El servidor confirma con el próximo paquete que espera
+    sender = GoBackNSender(arch, window_sz, rtt, create_congestion_controller(congestion, window_sz), ack_next_expected=True,
+                           dup_ack_threshold=_dup_ack_threshold(fec))
+
+    chunking = AdaptiveChunking(arch, arch.chunk_size) if adaptive_payload else None
+    pacer = create_pacer(pace, arch.chunk_size + HEADER_SIZE)
+    encoder = FecEncoder(*fec) if fec is not None else None
 
+    logger.info(f">>> Cliente: Iniciando upload GBN con ventana máxima={window_sz}, control de congestión={congestion}")
+    return _send_to_server(sock, sender, server_addr, logger, chunking, pacer, encoder)
+
+
+def upload_selective_repeat(sock: socket, arch: ArchiveSender, window_sz, server_addr, timeout, verbose=False, quiet=False,
+                            rtt=None, congestion=CONGESTION_CONTROL, adaptive_payload=False, pace=PACE_AUTO, fec=None):
+    """
+    Sube un archivo usando el protocolo Selective Repeat.
+    Cada paquete tiene su propio timer y sólo se reenvían los paquetes sin ACK cuyo timer venció.
+    pace y fec como en upload.
+    Devuelve las TransferStats de la transferencia.
+    """
     logger = setup_logging('protocol.client.upload', verbose, quiet)
+    if rtt is None:
+        rtt = RttEstimator(timeout)
+    sender = SelectiveRepeatSender(arch, window_sz, rtt, create_congestion_controller(congestion, window_sz))
+
+    chunking = AdaptiveChunking(arch, arch.chunk_size) if adaptive_payload else None
+    pacer = create_pacer(pace, arch.chunk_size + HEADER_SIZE)
+    encoder = FecEncoder(*fec) if fec is not None else None
 
-    pkg_id = 3
-    pkgs_not_ack = {}
-    file_finished = False
-    last_ack = 0
-    
-    # Control de reintentos y timeout global
-    pkg_retry_count = {}  # Contador de reintentos por paquete
-    max_retries_per_packet = 70  # Máximo 10 reintentos por paquete
-    import time
+    logger.info(f">>> Cliente: Iniciando upload SR con ventana máxima={window_sz}, control de congestión={congestion}")
+    return _send_to_server(sock, sender, server_addr, logger, chunking, pacer, encoder)
+
+
+def _send_to_server(sock: socket, sender, server_addr, logger, chunking=None, pacer=None, encoder=None):
+    """
+    Loop del emisor del cliente, común a GBN/SW (GoBackNSender) y SR (SelectiveRepeatSender).
+    Con chunking (AdaptiveChunking) el tamaño de los paquetes nuevos sigue a la pérdida medida.
+    Con pacer (Pacer) los paquetes de la ventana salen repartidos en el tiempo.
+    Con encoder (FecEncoder) detrás de cada bloque de paquetes nuevos salen sus paquetes de paridad.
+    Devuelve las TransferStats del emisor.
+    """
     transfer_start_time = time.time()
     max_transfer_time = 300  # 5 minutos máximo para transferencia completa
+    batch_sock = BatchSocket(sock)
 
-    logger.info(f">>> Cliente: Iniciando upload GBN con ventana={window_sz}")
-    while not end:
-        logger.debug(f">>> Cliente: Ciclo principal - end={end}, file_finished={file_finished}, pkgs_not_ack={len(pkgs_not_ack)}")
-        # Fase 1: Enviar paquetes hasta llenar la ventana o terminar el archivo
-        while(len(pkgs_not_ack) < window_sz and not file_finished):
-            logger.debug(f">>> Cliente: Enviando paquete pkg_id={pkg_id}")
-            pkg, pkg_id_bytes = arch.next_pkg_go_back_n(pkg_id)  # Usar pkg_id completo
-            if pkg is None:
-                # Crear paquete END con flag_end = 1
-                first_byte = 1  # flag_end = 1 para END
-                pkg = first_byte.to_bytes(1, "big") + (0).to_bytes(2, "big") + (pkg_id).to_bytes(4, "big")  # data_len = 0, pkg_id = pkg_id
-                pkg_id_bytes = (pkg_id).to_bytes(4, "big")  # pkg_id = pkg_id para END
-                file_finished = True
-                logger.debug(f">>> Cliente: Creando paquete END con pkg_id={pkg_id}")
-            
-            sock.sendto(pkg, server_addr)
-            logger.debug(f">>> Cliente: Envié paquete pkg_id={pkg_id} (len={len(pkg)})")
-            
-            # Agregar a pkgs_not_ack, incluyendo el paquete END
-            pkgs_not_ack[pkg_id_bytes] = pkg
-            pkg_id += 1
-        
-
-        # Fase 2: Esperar ACKs
-        logger.debug(f">>> Cliente: Terminé de enviar paquetes, esperando ACKs. Paquetes sin ACK: {len(pkgs_not_ack)}")
-
-        import time
-        start_time = time.time()
-        sock.settimeout(timeout)  # Timeout pequeño para no bloquearse indefinidamente
-        while time.time() - start_time < timeout:
-            try:
-                pkg, recv_addr = sock.recvfrom(1024)
-                if pkg is None:
-                    continue
-            except socket.timeout:
-                # Timeout del socket, continuar para verificar si se agotó el timeout principal
-                continue
-            
-            logger.debug(f">>> Cliente: Recibí ACK: {pkg} de {recv_addr}")
-            value = int.from_bytes(pkg, "big")
-            if len(pkg) == 4:
-                ack_num = int.from_bytes(pkg, "big")
-                logger.debug(f">>> Cliente: Procesando ACK {ack_num} (bytes: {pkg})")
-                if ack_num > last_ack:
-                    to_remove = []
-                    for pkg_id_bytes_key in pkgs_not_ack:
-                        pkg_id_num = int.from_bytes(pkg_id_bytes_key, 'big')
-                        if pkg_id_num < ack_num:
-                            to_remove.append(pkg_id_bytes_key)
-                            logger.debug(f">>> Cliente: Removiendo paquete {pkg_id_num} de la ventana")
-                    for pkg_id_bytes_key in to_remove:
-                        del pkgs_not_ack[pkg_id_bytes_key]
-                    
-                    # Actualizar last_ack al ACK recibido
-                    last_ack = ack_num
-                    
-                    logger.debug(f">>> Cliente: Después del ACK - file_finished={file_finished}, pkgs_not_ack={len(pkgs_not_ack)}")
-                    if file_finished and not pkgs_not_ack:
-                        logger.info(">>> Cliente: Archivo terminado y todos los paquetes confirmados, saliendo...")
-                        end = True
-                    break
-                else:
-                    logger.debug(f">>> Cliente: ACK {ack_num} es menor que el último ACK {last_ack}, ignorando...")
-                    continue
+    while not sender.finished:
+        if chunking is not None:
+            chunking.update(sender.stats)
+        pkgs, timeout = _paced_packets(sender, pacer, time.time(), encoder)
+        batch_sock.send_many(pkgs, server_addr)
 
-        # Restaurar timeout del socket
-        sock.settimeout(None)
-        
-        if time.time() - start_time >= timeout:
-            logger.warning(f">>> Cliente: Timeout esperando ACKs - file_finished={file_finished}, pkgs_not_ack={len(pkgs_not_ack)}")
-            
-            # Verificar timeout global
-            if time.time() - transfer_start_time >= max_transfer_time:
-                logger.error(f">>> Cliente: TIMEOUT GLOBAL - Transfer excedió {max_transfer_time} segundos, abortando...")
-                return
-            
-            if file_finished and not pkgs_not_ack:
-                # Si terminamos el archivo y no hay paquetes sin confirmar, salir
-                logger.info(">>> Cliente: Archivo terminado y no hay paquetes sin confirmar, saliendo...")
-                end = True
-            else:
-                # Verificar reintentos por paquete antes de reenviar
-                packets_to_remove = []
-                packets_to_retry = []
-                
-                for pkg_id_bytes_key, value in pkgs_not_ack.items():
-                    pkg_num = int.from_bytes(pkg_id_bytes_key, 'big')
-                    retry_count = pkg_retry_count.get(pkg_num, 0)
-                    
-                    if retry_count >= max_retries_per_packet:
-                        logger.warning(f">>> Cliente: Paquete {pkg_num} alcanzó máximo de reintentos ({max_retries_per_packet}), asumirndo entregado")
-                        packets_to_remove.append(pkg_id_bytes_key)
-                    else:
-                        packets_to_retry.append((pkg_id_bytes_key, value, pkg_num))
-                        pkg_retry_count[pkg_num] = retry_count + 1
-                
-                # Remover paquetes que alcanzaron el límite
-                for pkg_key in packets_to_remove:
-                    del pkgs_not_ack[pkg_key]
-                
-                # Reenviar paquetes que no alcanzaron el límite
-                if packets_to_retry:
-                    logger.warning(f">>> Cliente: Reenviando {len(packets_to_retry)} paquetes sin ACK")
-                    for pkg_id_bytes_key, value, pkg_num in packets_to_retry:
-                        sock.sendto(value, server_addr)
-                        logger.debug(f">>> Cliente: Reenvié paquete {pkg_num} (intento {pkg_retry_count[pkg_num]})")
-                else:
-                    logger.warning(">>> Cliente: Todos los paquetes alcanzaron el límite de reintentos, asumiendo transferencia completa")
-                    end = True
-
-def download(sock: socket, arch: ArchiveRecv, server_addr, timeout, verbose=False, quiet=False):
-    """
-    Descarga un archivo usando el protocolo Go Back N.
-    Funciona como stop and wait desde el lado del receptor.
+        sock.settimeout(max(timeout, 0.001))
+        try:
+            pkg, recv_addr = sock.recvfrom(RECV_BUFFER_SIZE)
+            ack = decode_ack(pkg) if recv_addr == server_addr else None
+            if ack is not None:
+                ack_num, sack_blocks = ack
+                if sender.ack(ack_num, time.time(), sack_blocks):
+                    logger.debug(f">>> Cliente: ACK recibido: {ack_num} ({sender.congestion})")
+        except socket.timeout:
+            pass
+
+        resend = sender.expired(time.time())
+        if resend:
+            logger.warning(f">>> Cliente: Timeout esperando ACKs ({sender.rtt}, {sender.congestion})")
+            batch_sock.send_many(resend, server_addr)
+            if pacer is not None:
+                pacer.on_send(resend, time.time())
+
+        if time.time() - transfer_start_time >= max_transfer_time:
+            logger.error(f">>> Cliente: TIMEOUT GLOBAL - Transfer excedió {max_transfer_time} segundos, abortando...")
+            break
+
+    if sender.gave_up:
+        logger.warning(">>> Cliente: Un paquete alcanzó el límite de reintentos, asumiendo transferencia completa")
+    if pacer is not None:
+        logger.info(f">>> Cliente: {pacer}")
+    if encoder is not None:
+        logger.info(f">>> Cliente: {encoder}")
+    sock.settimeout(None)
+    sender.stats.finish()
+    return sender.stats
+
+
+def download(sock: socket, arch: ArchiveRecv, server_addr, timeout, verbose=False, quiet=False, window_sz=WINDOW_SIZE_SW,
+             fec=None, ack_every=ACK_EVERY):
+    """
+    Descarga un archivo usando el protocolo Go Back N (o Stop and Wait con window_sz=1).
+    El ACK indica el último paquete recibido en orden. Con ventana mayor a 1 los paquetes
+    que llegan fuera de orden se guardan y se informan con bloques SACK en el ACK, y los que llegan
+    en orden se confirman de a ack_every (ver protocol/ack.py, DelayedAck).
+    Con fec = (K, M) (aceptado en el handshake) las pérdidas se rearman con los paquetes de paridad
+    del servidor (ver protocol/fec.py).
     """
     logger = setup_logging('client.download', verbose, quiet)
 
     logger.info(">>> Cliente: empezando a recibir archivo con Go Back N...")
-    expected_pkg_id = 3
-    work_done = False
-
-    while not work_done:
+    receiver = GoBackNReceiver(arch, window_sz)
+    decoder = FecDecoder(*fec) if fec is not None else None
+    ack_policy = create_ack_policy(ack_every, window_sz)
+    batch_sock = BatchSocket(sock, gro=True)
+
+    while not receiver.finished:
+        if ack_policy is not None and ack_policy.expired(time.time()):
+            sock.sendto(receiver.ack(), server_addr)  # venció la demora: se confirma lo recibido
+            ack_policy.sent()
         try:
-            logger.debug(f">>> Cliente: Esperando paquete del servidor (expected_pkg_id={expected_pkg_id})...")
-            sock.settimeout(timeout)
-            pkg, recv_addr = sock.recvfrom(1024)
-            logger.debug(f">>> Cliente: Recibí paquete de {len(pkg)} bytes de {recv_addr}")
-            
-            # Verificar que el paquete viene del servidor correcto
-            if recv_addr != server_addr:
-                logger.warning(f">>> Cliente: Paquete de dirección incorrecta {recv_addr} (esperaba {server_addr}), ignorando...")
-                continue
-                
+            sock.settimeout(ack_policy.timeout(time.time(), timeout) if ack_policy is not None else timeout)
+            pkgs, recv_addr = batch_sock.recv_many()
+        except socket.timeout:
+            logger.debug(f">>> Cliente: Timeout esperando paquetes del servidor (expected_pkg_id={receiver.expected_pkg_id})")
+            continue
+
+        # Verificar que el paquete viene del servidor correcto
+        if recv_addr != server_addr:
+            logger.warning(f">>> Cliente: Paquete de dirección incorrecta {recv_addr} (esperaba {server_addr}), ignorando...")
+            continue
+
+        now = time.time()
+        for pkg in _recovered(decoder, pkgs):
             # Filtrar paquetes que no son del protocolo de datos (menos de 7 bytes)
             if len(pkg) < 7:
                 logger.warning(f">>> Cliente: Recibí paquete no válido del protocolo (len={len(pkg)}), ignorando...")
                 continue
-                
+            if is_setup_ack(pkg):  # duplicado del handshake
+                continue
+
+            ack_data = receiver.receive(pkg)
+            if ack_data is None:
+                continue
+
+            if receiver.finished:
+                logger.info(">>> Cliente: Transferencia finalizada (paquete END recibido)")
+                arch.close(complete=True)  # El END se confirma recién con el archivo en disco
+                for i in range(1, 11):
+                    sock.sendto(ack_data, server_addr)
+                break
+            if ack_policy is None:
+                sock.sendto(ack_data, server_addr)
+            elif ack_policy.on_packet(receiver.in_order, now):
+                sock.sendto(ack_data, server_addr)
+                ack_policy.sent()
+
+    logger.warning(">>> Cliente: cerrando archivo...")
+    arch.close()
+    if decoder is not None:
+        logger.info(f">>> Cliente: {decoder}")
+    if ack_policy is not None:
+        logger.info(f">>> Cliente: {ack_policy}")
+
+def download_selective_repeat(sock: socket, arch: ArchiveRecv, server_addr, window_sz, timeout, verbose=False, quiet=False,
+                              fec=None):
+    """
+    Descarga un archivo usando el protocolo Selective Repeat.
+    Confirma cada paquete individualmente y guarda los que llegan fuera de orden.
+    fec como en download.
+    """
+    logger = setup_logging('client.download', verbose, quiet)
+    logger.info(">>> Cliente: empezando a recibir archivo con Selective Repeat...")
+    receiver = SelectiveRepeatReceiver(arch, window_sz)
+    decoder = FecDecoder(*fec) if fec is not None else None
+    batch_sock = BatchSocket(sock, gro=True)
+
+    while not receiver.finished:
+        try:
+            sock.settimeout(timeout)
+            pkgs, recv_addr = batch_sock.recv_many()
         except socket.timeout:
-            logger.debug(f">>> Cliente: Timeout esperando paquetes del servidor (expected_pkg_id={expected_pkg_id})")
             continue
 
-        flag_end, data_len, pkg_id, data = arch.recv_pckg_go_back_n(pkg)
-        logger.debug(f">>> Cliente: Procesando paquete - flag_end={flag_end}, pkg_id={pkg_id}, expected_pkg_id={expected_pkg_id}, data_len={data_len}")
+        if recv_addr != server_addr:
+            continue
+
+        for pkg in _recovered(decoder, pkgs):
+            if len(pkg) < 7 or is_setup_ack(pkg):
+                continue
 
-        if pkg_id == expected_pkg_id:
-            if flag_end == 1:
+            ack_num = receiver.receive(pkg)
+            if ack_num is None:
+                continue
+
+            if receiver.finished:
                 logger.info(">>> Cliente: Transferencia finalizada (paquete END recibido)")
-                work_done = True
-                # Enviar ACK para el paquete END
-                for i in range(1,11):
-                    sock.sendto(pkg_id.to_bytes(4, "big"), server_addr)  # ACK de 4 bytes
-                logger.debug(f">>> Cliente: Envié ACK final para paquete END {pkg_id}")
-            
-            else:
-                if (data_len != -1):
-                    # Paquete en orden, procesar y enviar ACK
-                    logger.debug(f">>> Cliente: Paquete en orden, escribiendo {data_len} bytes")
-                    arch.write_data(data)
-                    sock.sendto(pkg_id.to_bytes(4, "big"), server_addr)
-                    logger.debug(f">>> Cliente: Envié ACK{pkg_id} para paquete en orden")
-                    expected_pkg_id += 1
-        else:
-            # Paquete fuera de orden, enviar ACK del último paquete correcto
-            if expected_pkg_id > 0:
-                last_ack = expected_pkg_id - 1
-            else:
-                last_ack = 0  # Si es el primer paquete y está fuera de orden
-            sock.sendto(last_ack.to_bytes(4, "big"), server_addr)
-            logger.debug(f">>> Cliente: Paquete fuera de orden (recibí {pkg_id}, esperaba {expected_pkg_id}), reenvío ACK{last_ack}")
-        
-        
-
-       
-    
+                arch.close(complete=True)  # El END se confirma recién con el archivo en disco
+                for i in range(1, 11):
+                    sock.sendto(ack_num.to_bytes(4, "big"), server_addr)
+                break
+            sock.sendto(ack_num.to_bytes(4, "big"), server_addr)
+
     logger.warning(">>> Cliente: cerrando archivo...")
-    arch.archivo.close()
+    arch.close()
+    if decoder is not None:
+        logger.info(f">>> Cliente: {decoder}")
 
 ################################### FIN PROTOCOLO DE CLIENTE #################################################################
\ No newline at end of file
@@ -0,0 +1,67 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import MIN_RTO, MAX_RTO
+
+
+class RttEstimator:
+    """
+    Estimador del RTT de una sesión para calcular el timeout de retransmisión (RTO)
+    Sigue el algoritmo de Jacobson/Karels (RFC 6298): RTT suavizado, varianza del RTT
+    y backoff exponencial ante cada timeout.
+    Por la regla de Karn, sólo se deben pasar muestras de paquetes que no fueron retransmitidos.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial_rto, min_rto=MIN_RTO, max_rto=MAX_RTO):
+        """
+        Inicializa el estimador
+
+        Args:
+            initial_rto: RTO a usar hasta tener la primera muestra
+            min_rto: Cota inferior del RTO
+            max_rto: Cota superior del RTO (también limita el backoff)
+        """
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+        self.backoffs = 0
+
+    def sample(self, rtt):
+        """
+        Agrega una muestra de RTT (en segundos) y recalcula el RTO
+        """
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.backoffs = 0
+        self.rto = min(max(self.srtt + self.K * self.rttvar, self.min_rto), self.max_rto)
+
+    def restore(self):
+        """
+        Deshace el backoff cuando llega un ACK de datos nuevos aunque no sirva como
+        muestra (el camino sigue vivo, no hace falta seguir esperando el doble)
+        """
+        if self.backoffs and self.srtt is not None:
+            self.backoffs = 0
+            self.rto = min(max(self.srtt + self.K * self.rttvar, self.min_rto), self.max_rto)
+
+    def backoff(self):
+        """
+        Duplica el RTO luego de un timeout
+        """
+        self.backoffs += 1
+        self.rto = min(self.rto * 2, self.max_rto)
+
+    def __str__(self):
+        srtt = f"{self.srtt * 1000:.2f}ms" if self.srtt is not None else "-"
+        return f"srtt={srtt}, rto={self.rto * 1000:.2f}ms"
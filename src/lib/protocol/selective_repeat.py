@@ -0,0 +1,222 @@
+import heapq
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import FIRST_DATA_PKG_ID
+from lib.protocol.stats import TransferStats
+from lib.protocol.window import SendWindow
+
+
+class SelectiveRepeatSender:
+    """
+    Estado del emisor de Selective Repeat
+    Cada paquete en vuelo tiene su propio timer y se confirma con un ACK individual,
+    por lo que ante una pérdida sólo se reenvía el paquete perdido y no toda la ventana.
+    Los timers están en un heap ordenado por vencimiento, así buscar los vencidos no recorre la ventana.
+    No hace I/O: el cliente y el servidor se encargan de enviar lo que devuelve.
+    """
+
+    def __init__(self, arch, window_sz, rtt, congestion, max_retries=70, first_pkg_id=FIRST_DATA_PKG_ID):
+        """
+        Inicializa el emisor
+
+        Args:
+            arch: ArchiveSender del archivo a enviar
+            window_sz: Tamaño de la ventana del receptor (tope de paquetes en vuelo)
+            rtt: RttEstimator que da el timeout de cada paquete
+            congestion: Controlador de congestión (ver lib.protocol.congestion)
+            max_retries: Reintentos de un paquete antes de abandonar la transferencia
+            first_pkg_id: pkg_id del primer paquete de datos
+        """
+        self.arch = arch
+        self.window_sz = window_sz
+        self.rtt = rtt
+        self.congestion = congestion
+        self.max_retries = max_retries
+        self.stats = TransferStats(rtt)
+        self.base = first_pkg_id            # menor pkg_id sin ACK
+        self.next_pkg_id = first_pkg_id     # pkg_id del próximo paquete nuevo
+        self.in_flight = SendWindow(window_sz, first_pkg_id)
+        self.timers = []                    # heap de (deadline, pkg_id); los de paquetes ya confirmados
+                                            # o con el timer reprogramado se descartan al salir
+        self.file_finished = False
+        self.end_pkg_id = None
+        self.gave_up = False
+        self.recovery_pkg_id = first_pkg_id  # pérdidas de paquetes anteriores son el mismo evento
+
+    @property
+    def finished(self):
+        return self.gave_up or (self.file_finished and not self.in_flight)
+
+    def next_packets(self, now, limit=None):
+        """
+        Arma los paquetes nuevos que entran en la ventana
+
+        Args:
+            now: Momento del envío
+            limit: Máximo de paquetes a armar (el pacing), None para llenar la ventana
+
+        Returns:
+            list: paquetes a enviar
+        """
+        pkgs = []
+        while (self.next_pkg_id < self.base + self.window_sz and len(self.in_flight) < self.congestion.window
+               and not self.file_finished and (limit is None or len(pkgs) < limit)):
+            pkg, _ = self.arch.next_pkg_go_back_n(self.next_pkg_id)
+            if pkg is None:
+                pkg, _ = self.arch.end_pkg(self.next_pkg_id)
+                self.file_finished = True
+                self.end_pkg_id = self.next_pkg_id
+            deadline = now + self.rtt.rto
+            self.in_flight.push(now, deadline)
+            heapq.heappush(self.timers, (deadline, self.next_pkg_id))
+            self.stats.on_send(pkg)
+            pkgs.append(pkg)
+            self.next_pkg_id += 1
+        return pkgs
+
+    def ack(self, ack_num, now, sack_blocks=()):
+        """
+        Procesa el ACK individual de un paquete
+        (sack_blocks se acepta para compartir el loop del emisor con GBN: en SR cada
+        paquete ya tiene su propio ACK, así que no se usa)
+
+        Returns:
+            bool: True si el ACK confirmó un paquete en vuelo
+        """
+        if ack_num not in self.in_flight:
+            return False
+
+        i = self.in_flight.slot(ack_num)
+        if self.in_flight.retries[i] == 0:  # Regla de Karn: no medir paquetes retransmitidos
+            self.rtt.sample(now - self.in_flight.sent_time[i])
+        else:
+            self.rtt.restore()
+
+        acked = 1
+        if ack_num == self.end_pkg_id:
+            # El receptor sólo confirma el END cuando recibió todo en orden
+            acked = len(self.in_flight)
+            self.in_flight.advance(self.next_pkg_id)
+            self.timers.clear()
+        else:
+            self.in_flight.mark_acked(ack_num)
+
+        self.base = self.in_flight.base
+        self.congestion.on_ack(acked, now)
+        self.stats.on_ack(acked)
+        return True
+
+    def _pending_timer(self, deadline, pkg_id):
+        """
+        True si la entrada del heap es el timer vigente de un paquete en vuelo
+        """
+        return pkg_id in self.in_flight and self.in_flight.deadline[self.in_flight.slot(pkg_id)] == deadline
+
+    def expired(self, now):
+        """
+        Busca los paquetes cuyo timer venció y los rearma para reenviar.
+        Si alguno supera max_retries se abandona la transferencia.
+
+        Returns:
+            list: paquetes a reenviar
+        """
+        expired = []
+        while self.timers and self.timers[0][0] <= now:
+            deadline, pkg_id = heapq.heappop(self.timers)
+            if self._pending_timer(deadline, pkg_id):
+                expired.append(pkg_id)
+        if not expired:
+            return []
+
+        if any(self.in_flight.retries[self.in_flight.slot(pkg_id)] >= self.max_retries for pkg_id in expired):
+            self.gave_up = True
+            return []
+
+        expired.sort()
+        self.rtt.backoff()
+        if expired[0] >= self.recovery_pkg_id:
+            # Una sola reducción de la ventana por ventana de datos perdida
+            self.congestion.on_loss(now)
+            self.recovery_pkg_id = self.next_pkg_id
+
+        to_resend = []
+        deadline = now + self.rtt.rto
+        for pkg_id in expired:
+            i = self.in_flight.slot(pkg_id)
+            self.in_flight.deadline[i] = deadline
+            self.in_flight.retries[i] += 1
+            heapq.heappush(self.timers, (deadline, pkg_id))
+            pkg = self.arch.pkg(pkg_id)  # Se rearma desde el archivo
+            self.stats.on_send(pkg, retransmission=True)
+            to_resend.append(pkg)
+        return to_resend
+
+    def time_to_next_timeout(self, now):
+        """
+        Tiempo hasta que venza el próximo timer (o el timeout completo si no hay paquetes en vuelo)
+        """
+        while self.timers and not self._pending_timer(*self.timers[0]):
+            heapq.heappop(self.timers)
+        if not self.timers:
+            return self.rtt.rto
+        return max(self.timers[0][0] - now, 0)
+
+
+class SelectiveRepeatReceiver:
+    """
+    Estado del receptor de Selective Repeat
+    Guarda los paquetes que llegan fuera de orden dentro de la ventana y los escribe
+    en el archivo cuando se completa el hueco.
+    """
+
+    def __init__(self, arch, window_sz, first_pkg_id=FIRST_DATA_PKG_ID):
+        """
+        Inicializa el receptor
+
+        Args:
+            arch: ArchiveRecv donde se escribe el archivo
+            window_sz: Tamaño de la ventana (paquetes que se pueden guardar)
+            first_pkg_id: pkg_id del primer paquete de datos
+        """
+        self.arch = arch
+        self.window_sz = window_sz
+        self.expected_pkg_id = first_pkg_id
+        self.buffer = {}                    # pkg_id -> (flag_end, data)
+        self.finished = False
+
+    def receive(self, pkg):
+        """
+        Procesa un paquete de datos
+
+        Returns:
+            int | None: pkg_id a confirmar, o None si el paquete se descarta
+        """
+        flag_end, data_len, pkg_id, data = self.arch.recv_pckg_go_back_n(pkg)
+        if data_len == -1:
+            return None
+
+        if pkg_id < self.expected_pkg_id:
+            # Ya entregado, el ACK se perdió: confirmar de nuevo
+            return pkg_id
+        if pkg_id >= self.expected_pkg_id + self.window_sz:
+            return None
+
+        if pkg_id not in self.buffer:
+            # Los que llegan fuera de orden se copian: data es una vista de toda la lectura con GRO
+            # (hasta 64 KiB), que si no quedaría en memoria mientras el paquete espera en el buffer
+            self.buffer[pkg_id] = (flag_end, data if pkg_id == self.expected_pkg_id else bytes(data))
+
+        while self.expected_pkg_id in self.buffer:
+            buffered_end, buffered_data = self.buffer.pop(self.expected_pkg_id)
+            if buffered_end == 1:
+                self.finished = True
+                return self.expected_pkg_id
+            self.arch.write_data(buffered_data)
+            self.expected_pkg_id += 1
+
+        if flag_end == 1:
+            # El END se confirma recién cuando se recibió todo lo anterior
+            return None
+        return pkg_id
@@ -0,0 +1,250 @@
+import struct
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import (
+    SETUP_VERSION, SETUP_KIND, SETUP_ACK_KIND, STOP_AND_WAIT, GO_BACK_N, SELECTIVE_REPEAT, SIZE_PKG, SETUP_OPT_RESUME,
+    SETUP_OPT_STREAM, MAX_STREAMS, SETUP_OPT_COMPRESS, SETUP_OPT_PACE, PACE_AUTO, PACE_OFF, PACE_SETUP_OFF,
+    PACE_SETUP_AUTO, SETUP_OPT_FEC, FEC_MAX_BLOCK
+)
+from lib.protocol.compression import CODECS
+from lib.protocol.payload import clamp_payload_size
+
+# SETUP:     [kind:1][versión:1][tipo:1][protocolo:1][opciones:1][datos por paquete:2][nonce:4] + nombre
+# SETUP-ACK: [kind:1][versión:1][estado:1][opciones:1][datos por paquete:2][nonce:4][sesión:4]
+# Entre el header y el nombre van los campos de las opciones activas, en este orden:
+# - SETUP_OPT_RESUME: [offset:8] desde el que se retoma la transferencia (en ambos)
+# - SETUP_OPT_STREAM: en el SETUP [transferencia:4][stream:1][streams:1][tamaño:8], en el SETUP-ACK
+#   [tamaño:8]; cada stream mueve el rango stream_range(tamaño, stream, streams) del archivo
+# - SETUP_OPT_COMPRESS: en el SETUP [códec:1] (índice en CODECS), el SETUP-ACK sólo devuelve la opción
+# - SETUP_OPT_PACE: en el SETUP [ritmo:4] en kbit/s (PACE_SETUP_OFF sin pacing, PACE_SETUP_AUTO automático),
+#   el SETUP-ACK sólo devuelve la opción
+# - SETUP_OPT_FEC: en el SETUP [K:1][M:1] (paquetes de datos y de paridad por bloque), el SETUP-ACK sólo
+#   devuelve la opción
+SETUP = struct.Struct(">BBBBBHI")
+SETUP_ACK = struct.Struct(">BBBBHII")
+RESUME_OFFSET = struct.Struct(">Q")
+STREAM = struct.Struct(">IBBQ")
+STREAM_SIZE = struct.Struct(">Q")
+CODEC = struct.Struct(">B")
+PACE = struct.Struct(">I")
+FEC = struct.Struct(">BB")
+PROTOCOLS = (STOP_AND_WAIT, GO_BACK_N, SELECTIVE_REPEAT)
+
+
+def stream_range(size, stream, streams):
+    """
+    Rango del archivo que mueve un stream de una transferencia en paralelo (partes iguales)
+
+    Args:
+        size: Tamaño del archivo
+        stream: Índice del stream (0 a streams - 1)
+        streams: Cantidad de streams
+
+    Returns:
+        tuple: (offset, bytes)
+    """
+    start = size * stream // streams
+    end = size * (stream + 1) // streams
+    return start, end - start
+
+
+def _encode_pace(pace):
+    if pace == PACE_OFF:
+        return PACE_SETUP_OFF
+    if pace == PACE_AUTO:
+        return PACE_SETUP_AUTO
+    return min(max(round(pace * 1000), 1), PACE_SETUP_AUTO - 1)
+
+
+def _decode_pace(value):
+    if value == PACE_SETUP_OFF:
+        return PACE_OFF
+    if value == PACE_SETUP_AUTO:
+        return PACE_AUTO
+    return value / 1000
+
+
+def encode_setup(conexion_type, protocol, name, payload_size=SIZE_PKG, nonce=0, options=0, resume_offset=None,
+                 stream=None, codec=None, pace=None, fec=None):
+    """
+    Arma el SETUP: todo lo que antes se mandaba en tres mensajes (tipo, protocolo, nombre)
+    en un solo datagrama
+
+    Args:
+        conexion_type: UPLOAD o DOWNLOAD
+        protocol: STOP_AND_WAIT, GO_BACK_N o SELECTIVE_REPEAT
+        name: Nombre del archivo en el servidor
+        payload_size: Bytes de datos por paquete que propone el cliente
+        nonce: Número al azar del cliente, el servidor lo devuelve en el SETUP-ACK
+        options: Bits de opciones a negociar
+        resume_offset: Para retomar una transferencia: en un download los bytes que el cliente ya
+            tiene, en un upload 0 (el servidor responde cuántos tiene él)
+        stream: Para una transferencia en paralelo, (id de transferencia, stream, streams, tamaño del
+            archivo); el tamaño sólo se usa en los uploads
+        codec: Códec con el que se pide comprimir los paquetes de datos, None para no comprimir
+        pace: Pacing que se pide para los paquetes del servidor (PACE_AUTO, PACE_OFF o Mbit/s), None para
+            el que tenga configurado el servidor
+        fec: (K, M) para pedir corrección de errores (ver protocol/fec.py), None sin FEC
+
+    Returns:
+        bytes: el SETUP a enviar
+    """
+    fields = []
+    if resume_offset is not None:
+        options |= SETUP_OPT_RESUME
+        fields.append(RESUME_OFFSET.pack(resume_offset))
+    if stream is not None:
+        options |= SETUP_OPT_STREAM
+        fields.append(STREAM.pack(*stream))
+    if codec is not None:
+        options |= SETUP_OPT_COMPRESS
+        fields.append(CODEC.pack(CODECS.index(codec)))
+    if pace is not None:
+        options |= SETUP_OPT_PACE
+        fields.append(PACE.pack(_encode_pace(pace)))
+    if fec is not None:
+        options |= SETUP_OPT_FEC
+        fields.append(FEC.pack(*fec))
+    header = SETUP.pack(SETUP_KIND, SETUP_VERSION, ord(conexion_type), PROTOCOLS.index(protocol), options,
+                        payload_size, nonce)
+    return b"".join([header] + fields + [name.encode()])
+
+
+def is_setup(pkg):
+    """
+    Indica si pkg es un SETUP (de cualquier versión)
+    """
+    return len(pkg) >= 2 and pkg[0] == SETUP_KIND
+
+
+def setup_nonce(pkg):
+    """
+    Nonce de un SETUP aunque no se pueda desarmar (para rechazarlo con un SETUP-ACK que el cliente
+    reconozca). Todas las versiones comparten el header
+
+    Returns:
+        int: el nonce, o 0 si el SETUP ni siquiera tiene el header completo
+    """
+    if len(pkg) < SETUP.size:
+        return 0
+    return SETUP.unpack_from(pkg)[-1]
+
+
+def decode_setup(pkg):
+    """
+    Desarma un SETUP
+
+    Returns:
+        tuple | None: (tipo, protocolo, nombre, datos por paquete acotados, nonce, opciones, offset a retomar
+        o None, (transferencia, stream, streams, tamaño) o None, códec o None, pacing o None, (K, M) o None),
+        o None si no es un SETUP válido de esta versión
+    """
+    if len(pkg) <= SETUP.size:
+        return None
+    kind, version, conexion_type, protocol, options, payload_size, nonce = SETUP.unpack_from(pkg)
+    if kind != SETUP_KIND or version != SETUP_VERSION or protocol >= len(PROTOCOLS):
+        return None
+    pos = SETUP.size
+    resume_offset = None
+    stream = None
+    codec = None
+    pace = None
+    fec = None
+    try:
+        if options & SETUP_OPT_RESUME:
+            resume_offset = RESUME_OFFSET.unpack_from(pkg, pos)[0]
+            pos += RESUME_OFFSET.size
+        if options & SETUP_OPT_STREAM:
+            stream = STREAM.unpack_from(pkg, pos)
+            pos += STREAM.size
+            if not stream[1] < stream[2] <= MAX_STREAMS:
+                return None
+        if options & SETUP_OPT_COMPRESS:
+            codec_id = CODEC.unpack_from(pkg, pos)[0]
+            pos += CODEC.size
+            if codec_id >= len(CODECS):
+                return None
+            codec = CODECS[codec_id]
+        if options & SETUP_OPT_PACE:
+            pace = _decode_pace(PACE.unpack_from(pkg, pos)[0])
+            pos += PACE.size
+        if options & SETUP_OPT_FEC:
+            fec = FEC.unpack_from(pkg, pos)
+            pos += FEC.size
+            if not 1 <= fec[1] <= fec[0] <= FEC_MAX_BLOCK:
+                return None
+        name = bytes(pkg[pos:]).decode()
+    except (struct.error, UnicodeDecodeError):
+        return None
+    if not name:
+        return None
+    return (chr(conexion_type), PROTOCOLS[protocol], name, clamp_payload_size(payload_size), nonce, options,
+            resume_offset, stream, codec, pace, fec)
+
+
+def encode_setup_ack(status, payload_size, nonce, session_id, options=0, resume_offset=None, size=None):
+    """
+    Arma el SETUP-ACK con lo negociado
+
+    Args:
+        status: SETUP_OK o el motivo del rechazo
+        payload_size: Bytes de datos por paquete aceptados por el servidor
+        nonce: El nonce del SETUP que se confirma
+        session_id: Id de la sesión creada en el servidor
+        options: Bits de opciones aceptadas
+        resume_offset: Offset desde el que se retoma la transferencia, si se pidió retomarla
+        size: Tamaño del archivo, si el SETUP era de un stream de una transferencia en paralelo
+
+    Returns:
+        bytes: el SETUP-ACK a enviar
+    """
+    fields = []
+    if resume_offset is not None:
+        options |= SETUP_OPT_RESUME
+        fields.append(RESUME_OFFSET.pack(resume_offset))
+    if size is not None:
+        options |= SETUP_OPT_STREAM
+        fields.append(STREAM_SIZE.pack(size))
+    header = SETUP_ACK.pack(SETUP_ACK_KIND, SETUP_VERSION, status, options, payload_size, nonce, session_id)
+    return b"".join([header] + fields)
+
+
+def is_setup_ack(pkg):
+    """
+    Indica si pkg es un SETUP-ACK (p.ej. uno duplicado que llega ya empezados los datos).
+    Sus tamaños posibles (14, 22 y 30 bytes) no coinciden con los de un ACK con SACK.
+    """
+    return len(pkg) in (SETUP_ACK.size, SETUP_ACK.size + 8, SETUP_ACK.size + 16) and pkg[0] == SETUP_ACK_KIND
+
+
+def decode_setup_ack(pkg):
+    """
+    Desarma un SETUP-ACK
+
+    Returns:
+        tuple | None: (estado, datos por paquete, nonce, sesión, opciones, offset a retomar o None, tamaño
+        del archivo o None), o None si no es un SETUP-ACK
+    """
+    if not is_setup_ack(pkg):
+        return None
+    _, version, status, options, payload_size, nonce, session_id = SETUP_ACK.unpack_from(pkg)
+    if version != SETUP_VERSION:
+        return None
+    pos = SETUP_ACK.size
+    resume_offset = None
+    size = None
+    if options & SETUP_OPT_RESUME:
+        if len(pkg) < pos + RESUME_OFFSET.size:
+            return None
+        resume_offset = RESUME_OFFSET.unpack_from(pkg, pos)[0]
+        pos += RESUME_OFFSET.size
+    if options & SETUP_OPT_STREAM:
+        if len(pkg) < pos + STREAM_SIZE.size:
+            return None
+        size = STREAM_SIZE.unpack_from(pkg, pos)[0]
+        pos += STREAM_SIZE.size
+    if pos != len(pkg):
+        return None
+    return status, payload_size, nonce, session_id, options, resume_offset, size
@@ -0,0 +1,57 @@
+import time
+
+
+class TransferStats:
+    """
+    Estadísticas de una transferencia del lado del emisor
+    """
+
+    def __init__(self, rtt=None):
+        """
+        Inicializa las estadísticas
+
+        Args:
+            rtt: RttEstimator de la sesión (para informar SRTT y RTO)
+        """
+        self.rtt = rtt
+        self.start_time = time.time()
+        self.end_time = None
+        self.pkgs_sent = 0
+        self.pkgs_retransmitted = 0
+        self.bytes_sent = 0
+        self.bytes_retransmitted = 0
+        self.fast_retransmits = 0
+        self.pkgs_delivered = 0     # confirmados por el receptor (para medir el ritmo de entrega)
+
+    def on_send(self, pkg, retransmission=False):
+        self.pkgs_sent += 1
+        self.bytes_sent += len(pkg)
+        if retransmission:
+            self.pkgs_retransmitted += 1
+            self.bytes_retransmitted += len(pkg)
+
+    def on_ack(self, acked):
+        self.pkgs_delivered += acked
+
+    def finish(self):
+        self.end_time = time.time()
+
+    @property
+    def duration(self):
+        end = self.end_time if self.end_time is not None else time.time()
+        return end - self.start_time
+
+    def as_dict(self):
+        return {
+            "duration_s": round(self.duration, 3),
+            "pkgs_sent": self.pkgs_sent,
+            "pkgs_retransmitted": self.pkgs_retransmitted,
+            "bytes_sent": self.bytes_sent,
+            "bytes_retransmitted": self.bytes_retransmitted,
+            "fast_retransmits": self.fast_retransmits,
+            "srtt_ms": round(self.rtt.srtt * 1000, 3) if self.rtt and self.rtt.srtt is not None else None,
+            "rto_ms": round(self.rtt.rto * 1000, 3) if self.rtt else None,
+        }
+
+    def __str__(self):
+        return ", ".join(f"{key}={value}" for key, value in self.as_dict().items())
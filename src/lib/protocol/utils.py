@@ -7,7 +7,11 @@ import os
 import socket
 import  sys
 
-from lib.constants import STOP_AND_WAIT, GO_BACK_N
+from lib.constants import (
+    STOP_AND_WAIT, GO_BACK_N, SELECTIVE_REPEAT, RENO, CUBIC, CONGESTION_CONTROL, SIZE_PKG, PAYLOAD_AUTO,
+    MIN_PAYLOAD_SIZE, MAX_PAYLOAD_SIZE, MAX_STREAMS, COMPRESS_ZLIB, COMPRESS_BZ2, COMPRESS_LZMA, PACE_AUTO, PACE_OFF,
+    FEC_MAX_BLOCK, ACK_EVERY, ACK_DELAY, SCHEDULER_DRR, SCHEDULER_SRPT, SCHEDULER
+)
 
 
 def find_free_port():
@@ -90,12 +94,80 @@ def validate_protocol(protocol):
     """
     Valida que el protocolo es válido
     """
-    valid_protocols = [STOP_AND_WAIT, GO_BACK_N]
+    valid_protocols = [STOP_AND_WAIT, GO_BACK_N, SELECTIVE_REPEAT]
     if protocol not in valid_protocols:
         raise ValueError(f"Invalid protocol. Must be one of: {valid_protocols}")
     return protocol
 
 
+def validate_payload_size(value):
+    """
+    Valida el tamaño de datos por paquete (bytes o "auto")
+    """
+    if value == PAYLOAD_AUTO:
+        return value
+    if not value.isdigit() or not MIN_PAYLOAD_SIZE <= int(value) <= MAX_PAYLOAD_SIZE:
+        raise argparse.ArgumentTypeError(
+            f"Invalid payload size. Must be between {MIN_PAYLOAD_SIZE} and {MAX_PAYLOAD_SIZE} or '{PAYLOAD_AUTO}'"
+        )
+    return int(value)
+
+
+def validate_streams(value):
+    """
+    Valida la cantidad de streams en paralelo
+    """
+    if not value.isdigit() or not 1 <= int(value) <= MAX_STREAMS:
+        raise argparse.ArgumentTypeError(f"Invalid number of streams. Must be between 1 and {MAX_STREAMS}")
+    return int(value)
+
+
+def validate_pace(value):
+    """
+    Valida el pacing ("auto", "off" o un ritmo fijo en Mbit/s)
+    """
+    if value in (PACE_AUTO, PACE_OFF):
+        return value
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = 0
+    if not rate > 0:
+        raise argparse.ArgumentTypeError(f"Invalid pacing. Must be '{PACE_AUTO}', '{PACE_OFF}' or a rate in Mbit/s")
+    return rate
+
+
+def validate_fec(value):
+    """
+    Valida la corrección de errores: "K:M", M paquetes de paridad por cada K de datos
+
+    Returns:
+        tuple: (K, M)
+    """
+    k, _, m = value.partition(":")
+    if not k.isdigit() or not m.isdigit() or not 1 <= int(m) <= int(k) <= FEC_MAX_BLOCK:
+        raise argparse.ArgumentTypeError(f"Invalid FEC. Must be K:M with 1 <= M <= K <= {FEC_MAX_BLOCK}")
+    return int(k), int(m)
+
+
+def validate_ack_every(value):
+    """
+    Valida los paquetes en orden por ACK
+    """
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError("Invalid ACK policy. Must be at least 1 packet per ACK")
+    return int(value)
+
+
+def validate_workers(value):
+    """
+    Valida la cantidad de procesos del servidor
+    """
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError("Invalid number of workers. Must be at least 1")
+    return int(value)
+
+
 def setup_client_socket(host, port):
     """
     Configura el socket del cliente
@@ -152,11 +224,68 @@ def create_common_parser_args(parser):
     
     parser.add_argument(
         '-r', '--protocol',
-        choices=[STOP_AND_WAIT, GO_BACK_N],
+        choices=[STOP_AND_WAIT, GO_BACK_N, SELECTIVE_REPEAT],
         default=STOP_AND_WAIT,
         help='error recovery protocol'
     )
     
+    parser.add_argument(
+        '-c', '--congestion',
+        choices=[RENO, CUBIC],
+        default=CONGESTION_CONTROL,
+        help='congestion control algorithm'
+    )
+    
+    parser.add_argument(
+        '-l', '--payload',
+        type=validate_payload_size,
+        default=SIZE_PKG,
+        help=f'data bytes per packet ({MIN_PAYLOAD_SIZE}-{MAX_PAYLOAD_SIZE}) or "{PAYLOAD_AUTO}" to fit the path MTU'
+    )
+    
+    parser.add_argument(
+        '-a', '--adaptive-payload',
+        action='store_true',
+        help='shrink packets when loss is high and grow them back when it is low (uploads)'
+    )
+    
+    parser.add_argument(
+        '-R', '--resume',
+        action='store_true',
+        help='continue an interrupted transfer from the bytes the receiver already has'
+    )
+    
+    parser.add_argument(
+        '-P', '--streams',
+        type=validate_streams,
+        default=1,
+        help=f'split the file in N byte ranges, each sent over its own socket and window (1-{MAX_STREAMS})'
+    )
+    
+    parser.add_argument(
+        '-z', '--compress',
+        choices=[COMPRESS_ZLIB, COMPRESS_BZ2, COMPRESS_LZMA],
+        default=None,
+        help='compress data packets with this codec (stops by itself when the data does not shrink)'
+    )
+    
+    parser.add_argument(
+        '-t', '--pace',
+        type=validate_pace,
+        default=None,
+        help=f'spread packets over time: "{PACE_AUTO}" (follow the window and the measured rate, default), '
+             f'"{PACE_OFF}" or a fixed rate in Mbit/s; downloads ask the server for it (default: the server\'s)'
+    )
+    
+    parser.add_argument(
+        '-F', '--fec',
+        type=validate_fec,
+        default=None,
+        metavar='K:M',
+        help='forward error correction: send M XOR parity packets for every K data packets so the receiver '
+             'rebuilds lost packets without a retransmission (GBN and SR, e.g. 8:2)'
+    )
+    
     return parser
 
 
@@ -174,13 +303,20 @@ def create_upload_parser():
     parser.add_argument(
         '-s', '--src',
         required=True,
-        help='source file path'
+        nargs='+',
+        help='source file path(s) or directory'
     )
     
     parser.add_argument(
         '-n', '--name',
         required=True,
-        help='file name'
+        help='file name (directory name when uploading several files or a directory)'
+    )
+    
+    parser.add_argument(
+        '-D', '--delta',
+        action='store_true',
+        help='send only the blocks that differ from the copy the server already has (rsync style)'
     )
     
     return parser
@@ -200,7 +336,8 @@ def create_download_parser():
     parser.add_argument(
         '-n', '--name',
         required=True,
-        help='file name to download'
+        nargs='+',
+        help='file name(s) or directory to download'
     )
     
     parser.add_argument(
@@ -210,6 +347,14 @@ def create_download_parser():
         help='destination file path'
     )
     
+    parser.add_argument(
+        '-k', '--ack-every',
+        type=validate_ack_every,
+        default=ACK_EVERY,
+        help=f'with GBN, acknowledge every N in-order packets (or after {ACK_DELAY * 1000:g} ms); out-of-order '
+             f'packets are acknowledged right away (1 acknowledges every packet, default: {ACK_EVERY})'
+    )
+    
     return parser
 
 
@@ -253,4 +398,48 @@ def create_server_parser():
         help='directory to store uploaded files'
     )
     
+    parser.add_argument(
+        '-c', '--congestion',
+        choices=[RENO, CUBIC],
+        default=CONGESTION_CONTROL,
+        help='congestion control algorithm for downloads'
+    )
+    
+    parser.add_argument(
+        '-a', '--adaptive-payload',
+        action='store_true',
+        help='shrink packets when loss is high and grow them back when it is low (downloads)'
+    )
+    
+    parser.add_argument(
+        '-w', '--workers',
+        type=validate_workers,
+        default=1,
+        help='server processes sharing the port with SO_REUSEPORT (clients are spread across them)'
+    )
+    
+    parser.add_argument(
+        '-t', '--pace',
+        type=validate_pace,
+        default=PACE_AUTO,
+        help=f'pacing for downloads that do not ask for one: "{PACE_AUTO}", "{PACE_OFF}" or a fixed rate in Mbit/s'
+    )
+    
+    parser.add_argument(
+        '-k', '--ack-every',
+        type=validate_ack_every,
+        default=ACK_EVERY,
+        help=f'in GBN uploads, acknowledge every N in-order packets (or after {ACK_DELAY * 1000:g} ms); '
+             f'out-of-order packets are acknowledged right away (1 acknowledges every packet, default: {ACK_EVERY})'
+    )
+    
+    parser.add_argument(
+        '-S', '--scheduler',
+        choices=[SCHEDULER_DRR, SCHEDULER_SRPT],
+        default=SCHEDULER,
+        help=f'order in which data packets of the sessions leave the server: "{SCHEDULER_DRR}" (deficit round '
+             f'robin, fair share) or "{SCHEDULER_SRPT}" (shortest remaining transfer first); '
+             f'ACKs and handshake packets always go first'
+    )
+    
     return parser
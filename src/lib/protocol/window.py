@@ -0,0 +1,148 @@
+import sys
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import FIRST_DATA_PKG_ID
+
+
+class SendWindow:
+    """
+    Paquetes en vuelo del emisor, entre base (el más viejo sin ACK) y end (el próximo a enviar).
+    Es un buffer circular indexado por pkg_id: el estado de cada paquete (momento de envío,
+    deadline, reintentos y si ya se confirmó) vive en arrays de tamaño fijo, sin un objeto por
+    paquete. Agregar un paquete, buscarlo y avanzar con un ACK acumulativo es O(1).
+    """
+
+    def __init__(self, capacity, first_pkg_id=FIRST_DATA_PKG_ID):
+        """
+        Inicializa la ventana
+
+        Args:
+            capacity: Máximo de paquetes en vuelo (el tope de la ventana del emisor)
+            first_pkg_id: pkg_id del primer paquete de datos
+        """
+        self.capacity = capacity
+        self.base = first_pkg_id
+        self.end = first_pkg_id
+        self.sent_time = array("d", bytes(8 * capacity))   # momento del primer envío
+        self.deadline = array("d", bytes(8 * capacity))    # vencimiento del timer (SR)
+        self.retries = array("I", bytes(4 * capacity))
+        self.acked = bytearray(capacity)                   # confirmado individualmente (SR)
+        self.acked_count = 0                               # confirmados entre base y end
+
+    def __len__(self):
+        """
+        Paquetes en vuelo todavía sin confirmar
+        """
+        return self.end - self.base - self.acked_count
+
+    def __contains__(self, pkg_id):
+        return self.base <= pkg_id < self.end and not self.acked[pkg_id % self.capacity]
+
+    def slot(self, pkg_id):
+        """
+        Posición de pkg_id en los arrays
+        """
+        return pkg_id % self.capacity
+
+    def push(self, now, deadline=0.0):
+        """
+        Agrega el paquete end (recién enviado por primera vez)
+        """
+        if self.end - self.base >= self.capacity:
+            raise OverflowError("ventana de envío llena")
+        i = self.end % self.capacity
+        self.sent_time[i] = now
+        self.deadline[i] = deadline
+        self.retries[i] = 0
+        self.acked[i] = 0
+        self.end += 1
+
+    def advance(self, pkg_id):
+        """
+        ACK acumulativo: descarta los paquetes anteriores a pkg_id
+        """
+        if self.acked_count:
+            # Sólo con confirmaciones individuales (SR) hay que descontarlas
+            for old in range(self.base, min(pkg_id, self.end)):
+                i = old % self.capacity
+                if self.acked[i]:
+                    self.acked[i] = 0
+                    self.acked_count -= 1
+        self.base = max(self.base, min(pkg_id, self.end))
+
+    def mark_acked(self, pkg_id):
+        """
+        ACK individual: confirma pkg_id y corre base hasta el primero sin confirmar
+        """
+        if pkg_id == self.base:
+            self.base += 1
+        else:
+            self.acked[pkg_id % self.capacity] = 1
+            self.acked_count += 1
+        while self.acked_count and self.base < self.end and self.acked[self.base % self.capacity]:
+            self.acked[self.base % self.capacity] = 0
+            self.acked_count -= 1
+            self.base += 1
+
+
+class RangeSet:
+    """
+    Conjunto de pkg_ids guardado como rangos disjuntos y ordenados [primero, último].
+    Es lo que informan los bloques SACK: agregar un rango o descartar lo confirmado cuesta
+    según la cantidad de rangos, no la de paquetes.
+    """
+
+    def __init__(self):
+        self.firsts = []
+        self.lasts = []
+        self.count = 0      # pkg_ids en el conjunto
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, pkg_id):
+        i = bisect_right(self.firsts, pkg_id) - 1
+        return i >= 0 and pkg_id <= self.lasts[i]
+
+    def add(self, pkg_id):
+        self.add_range(pkg_id, pkg_id)
+
+    def add_range(self, first, last):
+        """
+        Agrega los pkg_ids de first a last inclusive, uniendo los rangos que se tocan
+        """
+        i = bisect_left(self.lasts, first - 1)
+        j = bisect_right(self.firsts, last + 1)
+        covered = 0
+        if i < j:
+            covered = sum(self.lasts[k] - self.firsts[k] + 1 for k in range(i, j))
+            first = min(first, self.firsts[i])
+            last = max(last, self.lasts[j - 1])
+        self.firsts[i:j] = [first]
+        self.lasts[i:j] = [last]
+        self.count += last - first + 1 - covered
+
+    def discard_below(self, pkg_id):
+        """
+        Saca los pkg_ids menores a pkg_id (ya confirmados acumulativamente)
+        """
+        i = bisect_right(self.lasts, pkg_id - 1)
+        if i:
+            self.count -= sum(self.lasts[k] - self.firsts[k] + 1 for k in range(i))
+            del self.firsts[:i]
+            del self.lasts[:i]
+        if self.firsts and self.firsts[0] < pkg_id:
+            self.count -= pkg_id - self.firsts[0]
+            self.firsts[0] = pkg_id
+
+    def max(self):
+        return self.lasts[-1]
+
+    def ranges(self, limit=None):
+        """
+        Los primeros limit rangos (todos si es None), de menor a mayor
+        """
+        return list(zip(self.firsts[:limit], self.lasts[:limit]))
@@ -0,0 +1,173 @@
+import sys
+import os
+from collections import deque
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import SCHEDULER_DRR, SCHEDULER_SRPT, DRR_QUANTUM, SEND_QUEUE_MAX, GSO_MAX_SEGMENTS
+
+
+class SendQueue:
+    """
+    Paquetes de datos de una sesión que esperan salir por el socket del servidor, con la demora que
+    pasaron en la cola (desde que el emisor los entregó hasta que salieron)
+    """
+
+    def __init__(self, addr, order):
+        """
+        Inicializa la cola
+
+        Args:
+            addr: Dirección del cliente
+            order: Orden de llegada de la sesión (desempata en SRPT)
+        """
+        self.addr = addr
+        self.order = order
+        self.pkgs = deque()         # (paquete, momento en que se encoló)
+        self.deficit = 0            # bytes que puede mandar en la ronda actual (DRR)
+        self.remaining = 0          # bytes del archivo que todavía no se empaquetaron (SRPT)
+        self.scheduled = False      # está en la lista del scheduler
+        self.sent = 0
+        self.dropped = 0
+        self.delay_total = 0.0
+        self.delay_max = 0.0
+
+    def put(self, pkgs, now):
+        """
+        Encola los paquetes; los que no entran en SEND_QUEUE_MAX se descartan
+
+        Returns:
+            bool: True si la cola tiene paquetes
+        """
+        room = SEND_QUEUE_MAX - len(self.pkgs)
+        if len(pkgs) > room:
+            self.dropped += len(pkgs) - max(room, 0)
+            pkgs = pkgs[:max(room, 0)]
+        self.pkgs.extend((pkg, now) for pkg in pkgs)
+        return bool(self.pkgs)
+
+    def on_sent(self, batch, now):
+        """
+        Registra la demora en la cola de los paquetes que salieron
+        """
+        for _, queued in batch:
+            delay = now - queued
+            self.delay_total += delay
+            if delay > self.delay_max:
+                self.delay_max = delay
+        self.sent += len(batch)
+
+    def __str__(self):
+        mean = self.delay_total / self.sent if self.sent else 0.0
+        return (f"cola de envío: {self.sent} paquetes, demora media={mean * 1000:.3f}ms, "
+                f"máxima={self.delay_max * 1000:.3f}ms, descartados={self.dropped}")
+
+
+class DrrScheduler:
+    """
+    Deficit round robin: las colas con paquetes se atienden por turnos y en cada ronda una cola suma
+    quantum bytes de crédito, que gasta en paquetes enteros. Una sesión con una ventana grande o una
+    ráfaga de retransmisiones no puede mandar más que las otras por ronda.
+    """
+
+    def __init__(self, quantum=DRR_QUANTUM):
+        self.quantum = quantum
+        self.active = deque()       # colas con paquetes, la primera es la que tiene el turno
+
+    def push(self, queue):
+        """
+        La cola tiene paquetes: entra al final de la ronda
+        """
+        if not queue.scheduled:
+            queue.scheduled = True
+            queue.deficit = self.quantum
+            self.active.append(queue)
+
+    def pop(self):
+        """
+        Próximos paquetes a mandar
+
+        Returns:
+            tuple | None: (cola, [(paquete, momento en que se encoló), ...]), o None si no hay nada
+        """
+        while self.active:
+            queue = self.active[0]
+            if not queue.pkgs:
+                self.active.popleft()
+                queue.scheduled = False
+                queue.deficit = 0
+                continue
+            if len(queue.pkgs[0][0]) > queue.deficit:
+                # Se le terminó el turno: al final de la ronda, con más crédito
+                queue.deficit += self.quantum
+                self.active.rotate(-1)
+                continue
+            batch = []
+            while queue.pkgs and len(queue.pkgs[0][0]) <= queue.deficit and len(batch) < GSO_MAX_SEGMENTS:
+                item = queue.pkgs.popleft()
+                queue.deficit -= len(item[0])
+                batch.append(item)
+            return queue, batch
+        return None
+
+    def unpop(self, queue, batch):
+        """
+        El socket no aceptó batch: vuelve al principio de la cola, que conserva el turno
+        """
+        queue.pkgs.extendleft(reversed(batch))
+        queue.deficit += sum(len(pkg) for pkg, _ in batch)
+
+    def remove(self, queue):
+        if queue.scheduled:
+            self.active.remove(queue)
+            queue.scheduled = False
+
+
+class SrptScheduler:
+    """
+    Shortest remaining processing time: siempre sale primero la cola de la sesión a la que le quedan
+    menos bytes por mandar (a igualdad, la más vieja). Las transferencias chicas terminan antes aunque
+    haya una grande en curso; la grande sólo avanza cuando las chicas no tienen paquetes en cola.
+    """
+
+    def __init__(self):
+        self.active = []
+
+    def push(self, queue):
+        if not queue.scheduled:
+            queue.scheduled = True
+            self.active.append(queue)
+
+    def pop(self):
+        """
+        Próximos paquetes a mandar (como DrrScheduler.pop)
+        """
+        for queue in [queue for queue in self.active if not queue.pkgs]:
+            self.remove(queue)
+        if not self.active:
+            return None
+        queue = min(self.active, key=lambda queue: (queue.remaining, queue.order))
+        batch = [queue.pkgs.popleft() for _ in range(min(len(queue.pkgs), GSO_MAX_SEGMENTS))]
+        return queue, batch
+
+    def unpop(self, queue, batch):
+        queue.pkgs.extendleft(reversed(batch))
+
+    def remove(self, queue):
+        if queue.scheduled:
+            self.active.remove(queue)
+            queue.scheduled = False
+
+
+def create_scheduler(name=SCHEDULER_DRR):
+    """
+    Crea el scheduler de la salida del servidor
+
+    Args:
+        name: SCHEDULER_DRR o SCHEDULER_SRPT
+
+    Returns:
+        DrrScheduler | SrptScheduler
+    """
+    if name == SCHEDULER_SRPT:
+        return SrptScheduler()
+    return DrrScheduler()
@@ -1,112 +1,340 @@
+import asyncio
+import signal
 import socket
-import threading
-import queue
 import sys
 import os
 import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 from lib.constants import (
-     UPLOAD, DOWNLOAD, STOP_AND_WAIT, GO_BACK_N, ACK_TIMEOUT_SW, ACK_TIMEOUT_GBN, WINDOW_SIZE_GBN, WINDOW_SIZE_SW
+     UPLOAD, DOWNLOAD, STOP_AND_WAIT, GO_BACK_N, SELECTIVE_REPEAT, ACK_TIMEOUT_SW, ACK_TIMEOUT_GBN, ACK_TIMEOUT_SR,
+     WINDOW_SIZE_GBN, WINDOW_SIZE_SW, WINDOW_SIZE_SR, CONGESTION_CONTROL, READ_BATCH, SESSION_IDLE_TIMEOUT,
+     SESSION_REAP_INTERVAL, SETUP_OPT_DELTA, PACE_AUTO, ACK_EVERY, SCHEDULER, SEND_BATCH
  )
-from lib.protocol.protocol import handshake_server, download_from_client, upload_from_client
+from lib.protocol.protocol import (
+    handshake_server, download_from_client, upload_from_client,
+    download_from_client_selective_repeat, upload_from_client_selective_repeat, complete_stream
+)
+from lib.protocol.channel import PacketChannel
+from lib.protocol.batch_io import BatchSocket
+from lib.protocol.setup import is_setup, decode_setup
+from lib.server.sessions import SessionTable
+from lib.server.scheduler import SendQueue, create_scheduler
 from lib.protocol.utils import setup_logging, create_server_parser
 
-def manage_client(channel: queue.Queue, addr, sock: socket, writing_queue, verbose=False, quiet=False):
-
-    # ✅ Pasar verbose y quiet
-    conexion_type, protocol, name = handshake_server(channel, addr, writing_queue, verbose, quiet)
-
-    for i in range (1, 11):
-        # Enviar ACK del nombre del archivo
-        writing_queue.put(((2).to_bytes(4, "big"), addr))
-        #print(f">>> Server: envié ACK del nombre del archivo: {name}")
-    
+async def manage_client(channel: PacketChannel, addr, writer, conexion_type, protocol, name, payload_size, offset=0,
+                        verbose=False, quiet=False, congestion=CONGESTION_CONTROL, adaptive_payload=False, length=None,
+                        size=None, delta=False, codec=None, bundle=False, pace=PACE_AUTO, fec=None,
+                        ack_every=ACK_EVERY):
+    """
+    Sesión de un cliente luego del handshake (el SETUP-ACK ya fue enviado): los datos empiezan enseguida,
+    desde el byte offset del archivo si se retoma una transferencia. Un stream de una transferencia en
+    paralelo mueve sólo length bytes desde offset de un archivo de size bytes. Con delta se mueven las
+    firmas (download) o las diferencias (upload) de un upload delta. Con codec los paquetes de datos van
+    comprimidos. Con bundle se mueven varios archivos (ver protocol/bundle.py). pace es el pacing de los
+    paquetes de un download (ver protocol/pacing.py). Con fec = (K, M) (nunca con Stop and Wait) el emisor
+    agrega paquetes de paridad y el receptor rearma con ellos las pérdidas (ver protocol/fec.py). ack_every
+    son los paquetes en orden por ACK de un upload GBN (ver protocol/ack.py).
+    Devuelve True si un upload se recibió entero.
+    """
     if conexion_type == UPLOAD:
-        
-        # Delay para evitar que se mezclen paquetes del handshake con los de datos
-        #print(f">>> Server: Iniciando delay de 1 segundo para {addr} (upload)")
-        time.sleep(1.0)
-        #print(f">>> Server: Delay completado para {addr}, iniciando upload_from_client_go_back_n")
-        
         if protocol == STOP_AND_WAIT:
-            upload_from_client(name, channel, writing_queue, addr, STOP_AND_WAIT, sock)
+            return await upload_from_client(name, channel, writer, addr, STOP_AND_WAIT, offset=offset, size=size,
+                                            delta=delta, codec=codec, bundle=bundle)
         elif protocol == GO_BACK_N:
-            upload_from_client(name, channel, writing_queue, addr, GO_BACK_N, sock)
+            return await upload_from_client(name, channel, writer, addr, GO_BACK_N, offset=offset, size=size,
+                                            delta=delta, codec=codec, bundle=bundle, fec=fec, ack_every=ack_every)
+        elif protocol == SELECTIVE_REPEAT:
+            return await upload_from_client_selective_repeat(name, channel, writer, addr, WINDOW_SIZE_SR, offset=offset,
+                                                             size=size, delta=delta, codec=codec, bundle=bundle,
+                                                             fec=fec)
     elif conexion_type == DOWNLOAD:
-        
-        # Delay para evitar que se mezclen paquetes del handshake con los de datos
-        #print(f">>> Server: Iniciando delay de 1 segundo para {addr} (download)")
-        time.sleep(1.0)
-        #print(f">>> Server: Delay completado para {addr}, iniciando download_from_client_go_back_n")
-        
         if protocol == STOP_AND_WAIT:
-            download_from_client(name, writing_queue, addr, WINDOW_SIZE_SW, channel, ACK_TIMEOUT_SW)  # GBN con ventana de 1
+            await download_from_client(name, writer, addr, WINDOW_SIZE_SW, channel, ACK_TIMEOUT_SW,
+                                       congestion=congestion, payload_size=payload_size,
+                                       adaptive_payload=adaptive_payload, offset=offset,
+                                       length=length, delta=delta, codec=codec, bundle=bundle, pace=pace)  # GBN con ventana de 1
         elif protocol == GO_BACK_N:
-            download_from_client(name, writing_queue, addr, WINDOW_SIZE_GBN, channel, ACK_TIMEOUT_GBN)
-    
+            await download_from_client(name, writer, addr, WINDOW_SIZE_GBN, channel, ACK_TIMEOUT_GBN, congestion=congestion,
+                                       payload_size=payload_size, adaptive_payload=adaptive_payload, offset=offset,
+                                       length=length, delta=delta, codec=codec, bundle=bundle, pace=pace,
+                                       fec=fec)
+        elif protocol == SELECTIVE_REPEAT:
+            await download_from_client_selective_repeat(name, writer, addr, WINDOW_SIZE_SR, channel, ACK_TIMEOUT_SR,
+                                                        congestion=congestion, payload_size=payload_size,
+                                                        adaptive_payload=adaptive_payload, offset=offset,
+                                                        length=length, delta=delta, codec=codec, bundle=bundle, pace=pace,
+                                                        fec=fec)
+    return False
+
+
+class DatagramWriter:
+    """
+    Salida de paquetes del servidor, compartida por todas las sesiones.
+    Los ACKs y los mensajes del handshake (send) salen enseguida por el socket no bloqueante, antes que
+    cualquier dato en cola; si el buffer del kernel está lleno se descartan, igual que si se perdieran en
+    la red. Los paquetes de datos (send_many) esperan en la cola de su sesión y salen en la próxima vuelta
+    del event loop, en el orden que decide el scheduler (ver server/scheduler.py), de a lo sumo SEND_BATCH
+    por vuelta y en lotes con GSO si se puede. Así una sesión con una ventana grande o una ráfaga de
+    retransmisiones no demora los paquetes de las demás. Si el buffer del kernel se llena, los datos
+    esperan a que el socket acepte más.
+    """
 
-def manage_writing(writing_queue: queue.Queue, sock: socket):
-    try:
-        while True:
-            pkg, addr = writing_queue.get(block=True)
-            sock.sendto(pkg, addr)
-            #print(f">>> Server: envié paquete de {len(pkg)} bytes a {addr}")
-    except Exception as e:
-        #print(f">>> Server: Error en manage_writing: {e}")
-        return
+    def __init__(self, batch_sock, scheduler=SCHEDULER):
+        self.batch_sock = batch_sock
+        self.scheduler = create_scheduler(scheduler)
+        self.queues = {}            # dirección del cliente -> SendQueue de su sesión
+        self.opened = 0
+        self.draining = False       # hay un _drain programado o esperando que el socket acepte más
 
+    def open(self, addr):
+        """
+        Crea la cola de envío de una sesión nueva de addr (la de una sesión anterior desde la misma
+        dirección queda afuera)
 
+        Returns:
+            SendQueue: la cola, para cerrarla al terminar la sesión
+        """
+        previous = self.queues.get(addr)
+        if previous is not None:
+            self.close(previous)
+        self.opened += 1
+        queue = self.queues[addr] = SendQueue(addr, self.opened)
+        return queue
+
+    def close(self, queue):
+        """
+        La sesión terminó: se descartan sus paquetes pendientes
+        """
+        self.scheduler.remove(queue)
+        queue.pkgs.clear()
+        if self.queues.get(queue.addr) is queue:
+            del self.queues[queue.addr]
+
+    def send(self, pkg, addr):
+        try:
+            self.batch_sock.sock.sendto(pkg, addr)
+        except (BlockingIOError, InterruptedError, ConnectionRefusedError):
+            pass
+
+    def send_many(self, pkgs, addr, remaining=0):
+        """
+        Encola paquetes de datos de la sesión de addr
+
+        Args:
+            pkgs: Paquetes a enviar, en orden
+            addr: Dirección del cliente
+            remaining: Bytes que a la transferencia le quedan por empaquetar (los usa el scheduler SRPT)
+        """
+        if not pkgs:
+            return
+        queue = self.queues.get(addr)
+        if queue is None:
+            self._send_now(pkgs, addr)  # sin sesión (no pasa por el scheduler)
+            return
+        queue.remaining = remaining
+        if queue.put(pkgs, time.monotonic()):
+            self.scheduler.push(queue)
+            self._schedule()
+
+    def _send_now(self, pkgs, addr):
+        try:
+            self.batch_sock.send_many(pkgs, addr)
+        except (BlockingIOError, InterruptedError, ConnectionRefusedError):
+            pass
+
+    def _schedule(self):
+        if not self.draining:
+            self.draining = True
+            asyncio.get_running_loop().call_soon(self._drain)
+
+    def _drain(self):
+        """
+        Manda hasta SEND_BATCH paquetes de las colas, en el orden del scheduler
+        """
+        self.draining = False
+        sent = 0
+        while sent < SEND_BATCH:
+            item = self.scheduler.pop()
+            if item is None:
+                return
+            queue, batch = item
+            try:
+                self.batch_sock.send_many([pkg for pkg, _ in batch], queue.addr)
+            except (BlockingIOError, InterruptedError):
+                # El buffer del kernel está lleno: el lote vuelve a la cola y se sigue cuando el socket
+                # acepte más (si una parte ya había salido se repite, el receptor descarta los duplicados)
+                self.scheduler.unpop(queue, batch)
+                self.draining = True
+                asyncio.get_running_loop().add_writer(self.batch_sock.sock.fileno(), self._writable)
+                return
+            except ConnectionRefusedError:
+                pass  # ICMP port unreachable: el cliente ya cerró
+            queue.on_sent(batch, time.monotonic())
+            sent += len(batch)
+        self._schedule()  # quedan paquetes: siguen en la próxima vuelta, después de las lecturas
+
+    def _writable(self):
+        asyncio.get_running_loop().remove_writer(self.batch_sock.sock.fileno())
+        self._drain()
 
 
 class Server:
-    def __init__(self, udp_ip, udp_port, path, verbose=False, quiet=False):
+    """
+    Servidor con un único event loop (asyncio) que multiplexa todas las sesiones.
+    Cada cliente es una corrutina (manage_client) con su propia cola de paquetes recibidos, registrada
+    en la tabla de sesiones hasta que termina o queda inactiva SESSION_IDLE_TIMEOUT segundos.
+    Las sesiones de una transferencia en paralelo (una por stream) comparten el id de transferencia;
+    el archivo recién se marca completo cuando terminaron todas.
+    Con reuse_port varios procesos (workers) abren cada uno su Server en el mismo puerto y el kernel
+    les reparte los clientes; la tabla de sesiones es de cada proceso.
+    """
+
+    def __init__(self, udp_ip, udp_port, path, verbose=False, quiet=False, congestion=CONGESTION_CONTROL,
+                 adaptive_payload=False, reuse_port=False, pace=PACE_AUTO, ack_every=ACK_EVERY,
+                 scheduler=SCHEDULER):
         self.udp_ip = udp_ip
         self.udp_port = udp_port
         self.verbose = verbose  
         self.quiet = quiet      
-        self.clients = {}
+        self.congestion = congestion
+        self.adaptive_payload = adaptive_payload
+        self.pace = pace    # pacing de los downloads cuyo SETUP no pide uno
+        self.ack_every = ack_every  # paquetes en orden por ACK en los uploads GBN
+        self.scheduler = scheduler  # orden en que salen los paquetes de datos de las sesiones
+        self.sessions = SessionTable()
+        self.logger = setup_logging('server.sessions', verbose, quiet)
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if reuse_port:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.sock.bind((udp_ip, udp_port))
-        #print(f"Server bound to {udp_ip}:{udp_port}")
-        self.writing_queue = queue.Queue()
-        self.writing_thread = None
-
-    def _start_writing_thread(self):
-        self.writing_thread = threading.Thread(target=manage_writing, args=(self.writing_queue, self.sock))
-        self.writing_thread.start()
+        self.writer = None
 
     def _listen(self):
-        while True:
+        asyncio.run(self._serve())
+
+    async def _serve(self):
+        loop = asyncio.get_running_loop()
+        self.sock.setblocking(False)
+        self.batch_sock = BatchSocket(self.sock, gro=True)
+        self.writer = DatagramWriter(self.batch_sock, self.scheduler)
+        loop.add_reader(self.sock.fileno(), self._read_ready)
+        self._reaper = loop.call_later(SESSION_REAP_INTERVAL, self._reap)
+        try:
+            await loop.create_future()  # Atender clientes hasta que se interrumpa el servidor
+        finally:
+            loop.remove_reader(self.sock.fileno())
+            self._reaper.cancel()
+            self.logger.info(f">>> Server: {self.sessions}")
+
+    def _read_ready(self):
+        """
+        El socket tiene datos: se leen todos los paquetes disponibles (hasta READ_BATCH lecturas,
+        cada una puede traer varios datagramas agrupados con GRO) antes de volver al loop,
+        así una ráfaga cuesta una sola vuelta del event loop
+        """
+        for _ in range(READ_BATCH):
             try:
-                pkg, addr = self.sock.recvfrom(1024)
-                #print(f">>> Server: recibí paquete de {len(pkg)} bytes de {addr}")
-                if addr in self.clients:
-                    queue_size = self.clients[addr][0].qsize()
-                    #print(f">>> Server: Cola de {addr} tiene {queue_size} paquetes antes de agregar")
-                    self.clients[addr][0].put(pkg)
-                    queue_size_after = self.clients[addr][0].qsize()
-                    #print(f">>> Server: Cola de {addr} tiene {queue_size_after} paquetes después de agregar")
-                else:
-                    #print(f">>> Server: Cliente nuevo {addr}, iniciando thread")
-                    self.start_client(pkg, addr, self.writing_queue)
+                pkgs, addr = self.batch_sock.recv_many()
+            except (BlockingIOError, InterruptedError):
+                return
             except ConnectionResetError:
-                #print(">>> Server: Conexión reseteada por el cliente")
-                continue
-            except socket.timeout:
-                continue
-            except Exception as e:
-                #print(f">>> Server: Error inesperado: {e}")
+                # ICMP port unreachable de clientes que ya cerraron
                 continue
+            for pkg in pkgs:
+                self.dispatch(pkg, addr)
+
+    def dispatch(self, pkg, addr):
+        session = self.sessions.by_address(addr)
+        if is_setup(pkg):
+            if session is not None and session.setup == pkg:
+                # El cliente reenvió el SETUP: se perdió el SETUP-ACK (o todavía no se respondió)
+                if session.setup_ack is not None:
+                    self.writer.send(session.setup_ack, addr)
+                return
+            if session is not None:
+                # Un SETUP distinto desde la misma dirección (p.ej. otro cliente que reusa el puerto):
+                # la sesión anterior se cierra
+                self.sessions.close(session)
+            self.start_client(pkg, addr)
+        elif session is not None:
+            session.last_seen = time.monotonic()
+            session.channel.put(pkg)
+
+    def start_client(self, msg, addr):
+        setup = decode_setup(msg)
+        conexion_type, name = (setup[0], setup[2]) if setup is not None else (None, None)
+        transfer = setup[7][0] if setup is not None and setup[7] is not None else None
+        delta = setup is not None and bool(setup[5] & SETUP_OPT_DELTA)
+        # Un upload no puede pisar un archivo que se está descargando (el emisor lo tiene mapeado en
+        # memoria), y si retoma o reemplaza uno que otra sesión todavía recibe (p.ej. la de un cliente
+        # que se cortó) primero se cierra esa sesión, que deja el archivo y su marcador al día.
+        # Los otros streams de la misma transferencia en paralelo siguen. Un upload delta reemplaza el
+        # archivo de una vez (los downloads en curso siguen con el anterior) y las firmas se leen a
+        # memoria, así que esas sesiones no bloquean.
+        others = self.sessions.by_name(name) if conexion_type == UPLOAD else []
+        busy = not delta and any(s.conexion_type == DOWNLOAD and not s.delta for s in others)
+        previous = [s for s in others if s.conexion_type == UPLOAD and (transfer is None or s.transfer != transfer)]
+        if busy:
+            previous = []
 
-    def start_client(self, msg, addr, writing_queue):
-        #print(f">>> Server: start_client iniciando para {addr}")
-        chan = queue.Queue()
-        t = threading.Thread(target=manage_client, args=(chan, addr, self.sock, writing_queue, self.verbose, self.quiet))
-        self.clients[addr] = [chan, t]
-        chan.put(msg)
-        #print(f">>> Server: Thread iniciado para {addr}, mensaje inicial: {len(msg)} bytes")
-        t.start()
+        session = self.sessions.open(addr, bytes(msg), conexion_type, name, transfer, delta)
+        if session is None:
+            self.logger.warning(f">>> Server: tabla de sesiones llena, ignorando SETUP de {addr}")
+            return
+        for other in previous:
+            self.sessions.close(other)
+        session.send_queue = self.writer.open(addr)
+        session.task = asyncio.get_running_loop().create_task(
+            self._run_session(session, msg, [other.task for other in previous], busy)
+        )
+        session.task.add_done_callback(lambda task: self._session_done(session, task))
+
+    async def _run_session(self, session, msg, previous, busy):
+        """
+        Handshake (una vez cerradas las sesiones previous) y transferencia de una sesión
+        """
+        if previous:
+            await asyncio.wait(previous)
+        result = handshake_server(msg, session.addr, self.writer, session.id, self.verbose, self.quiet, busy)
+        if result is None:
+            return
+        (session.setup_ack, conexion_type, protocol, name, payload_size, offset, length, size, delta, codec,
+         bundle, pace, fec) = result
+        complete = await manage_client(session.channel, session.addr, self.writer, conexion_type, protocol, name,
+                                       payload_size, offset, self.verbose, self.quiet, self.congestion,
+                                       self.adaptive_payload, length, size, delta, codec, bundle,
+                                       self.pace if pace is None else pace, fec, self.ack_every)
+        # El último stream de un upload en paralelo en terminar (en este proceso o en otro worker)
+        # marca el archivo como completo
+        stream = decode_setup(msg)[7]
+        if complete and stream is not None and complete_stream(name, stream):
+            self.logger.info(f">>> Server: upload en paralelo de {name} completo ({stream[2]} streams)")
+
+    def _session_done(self, session, task):
+        """
+        La corrutina de la sesión terminó (completa, con error o cancelada): se saca de la tabla
+        """
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f">>> Server: error en la sesión {session.id:#x} de {session.addr}: {task.exception()}")
+        self.sessions.remove(session, reaped=session.setup_ack is not None)  # un SETUP rechazado no cuenta
+        self.writer.close(session.send_queue)
+        if session.send_queue.sent:
+            self.logger.info(f">>> Server: sesión {session.id:#x} de {session.addr}, {session.send_queue}")
+        self.logger.debug(f">>> Server: sesión {session.id:#x} de {session.addr} cerrada ({self.sessions})")
+
+    def _reap(self):
+        """
+        Cierra las sesiones que no reciben paquetes hace más de SESSION_IDLE_TIMEOUT segundos
+        (clientes que desaparecieron) y se vuelve a programar
+        """
+        idle = self.sessions.idle(time.monotonic(), SESSION_IDLE_TIMEOUT)
+        for session in idle:
+            self.logger.warning(f">>> Server: sesión {session.id:#x} de {session.addr} inactiva, cerrándola")
+            self.sessions.close(session, expired=True)
+        if idle:
+            self.logger.info(f">>> Server: {self.sessions}")
+        self._reaper = asyncio.get_running_loop().call_later(SESSION_REAP_INTERVAL, self._reap)
 
 
 class ServerInterface:
@@ -124,14 +352,19 @@ class ServerInterface:
             # Crear directorio de almacenamiento si no existe
             os.makedirs(args.storage, exist_ok=True)
             
+            if args.workers > 1:
+                self._start_workers(args)
+                return
+            
             # Crear servidor
-            self.server = Server(args.host, args.port, args.storage, args.verbose, args.quiet)
+            self.server = Server(args.host, args.port, args.storage, args.verbose, args.quiet, args.congestion,
+                                 args.adaptive_payload, pace=args.pace, ack_every=args.ack_every,
+                                 scheduler=args.scheduler)
             
             self.logger.info("Server started successfully. Press Ctrl+C to stop.")
             self.logger.info("Waiting for connections...")
             
             # Iniciar servidor
-            self.server._start_writing_thread()
             self.server._listen()
             
         except KeyboardInterrupt:
@@ -143,6 +376,70 @@ class ServerInterface:
             if self.server and self.server.sock:
                 self.server.sock.close()
 
+    def _start_workers(self, args):
+        """
+        Levanta args.workers procesos servidor que comparten el puerto con SO_REUSEPORT: el kernel reparte
+        los clientes entre ellos según su dirección (todos los paquetes de un cliente llegan al mismo
+        proceso) y cada uno corre su propio Server, con su event loop y su writer, en su propio core.
+        Este proceso sólo los espera; al interrumpirlo (Ctrl+C o SIGTERM) los detiene.
+        """
+        if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+            raise Exception("--workers requiere SO_REUSEPORT y fork")
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        workers = []
+        try:
+            for worker in range(args.workers):
+                pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        code = self._run_worker(args, worker)
+                    finally:
+                        os._exit(code)  # el hijo nunca sigue con el código del proceso principal
+                workers.append(pid)
+            self.logger.info(f"Server started with {args.workers} workers (pids {workers}). Press Ctrl+C to stop.")
+            for pid in workers:
+                os.waitpid(pid, 0)
+        except KeyboardInterrupt:
+            self.logger.info("Server stopped by user")
+            for pid in workers:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            for pid in workers:
+                os.waitpid(pid, 0)
+
+    def _run_worker(self, args, worker):
+        """
+        Cuerpo de un worker (en el proceso hijo): sólo lo detiene el SIGTERM del proceso principal, y una
+        sola vez, así un Ctrl+C o un SIGTERM a todo el grupo no lo interrumpe mientras cierra sus sesiones
+
+        Returns:
+            int: código de salida del proceso
+        """
+        def stop(signum, frame):
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            raise KeyboardInterrupt
+
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            self.server = Server(args.host, args.port, args.storage, args.verbose, args.quiet, args.congestion,
+                                 args.adaptive_payload, reuse_port=True, pace=args.pace,
+                                 ack_every=args.ack_every, scheduler=args.scheduler)
+            self.logger.debug(f">>> Server: worker {worker} escuchando (pid {os.getpid()})")
+            self.server._listen()
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            self.logger.error(f">>> Server: error en el worker {worker}: {e}")
+            return 1
+        finally:
+            if self.server and self.server.sock:
+                self.server.sock.close()
+        return 0
+
 
 def main():
     interactive_logger = setup_logging('file_transfer_server.interactive')
@@ -0,0 +1,152 @@
+import time
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from lib.constants import SESSION_SLOT_BITS, MAX_SESSIONS, SESSION_IDLE_TIMEOUT
+from lib.protocol.channel import PacketChannel
+
+
+class Session:
+    """
+    Una sesión del servidor: el cliente, su cola de paquetes y la corrutina que la atiende
+    """
+
+    __slots__ = ("id", "addr", "conexion_type", "name", "transfer", "delta", "channel", "task", "setup", "setup_ack",
+                 "last_seen", "send_queue")
+
+    def __init__(self, session_id, addr, setup, conexion_type=None, name=None, transfer=None, delta=False):
+        self.id = session_id
+        self.addr = addr
+        self.conexion_type = conexion_type
+        self.name = name            # archivo que se transfiere
+        self.transfer = transfer    # id de la transferencia en paralelo de la que es un stream, o None
+        self.delta = delta          # parte de un upload delta (firmas o diferencias)
+        self.channel = PacketChannel()
+        self.task = None
+        self.setup = setup          # SETUP que abrió la sesión (para reconocer reenvíos)
+        self.setup_ack = None       # SETUP-ACK enviado (se repite si el SETUP se reenvía), None si aún no se aceptó
+        self.last_seen = time.monotonic()
+        self.send_queue = None      # SendQueue de sus paquetes de datos en el writer del servidor
+
+
+class SessionTable:
+    """
+    Sesiones activas del servidor, indexadas por id de conexión (el que va en el SETUP-ACK) y por la
+    dirección del cliente (los paquetes de datos y los ACKs no llevan el id).
+    Los ids son slot + generación: cuando una sesión termina su slot queda libre y se reusa con la
+    generación siguiente, así un id viejo nunca apunta a la sesión nueva.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        """
+        Inicializa la tabla
+
+        Args:
+            max_sessions: Tope de sesiones simultáneas (a lo sumo MAX_SESSIONS)
+        """
+        self.max_sessions = min(max_sessions, MAX_SESSIONS)
+        self.slots = []             # Session o None
+        self.generations = []       # generación actual de cada slot
+        self.free = []              # slots libres para reusar
+        self.by_addr = {}
+        self.active = 0
+        self.reaped = 0             # sesiones cerradas y sacadas de la tabla
+        self.expired = 0            # de ellas, las cerradas por inactividad
+
+    def __len__(self):
+        """
+        Sesiones activas
+        """
+        return self.active
+
+    def get(self, session_id):
+        """
+        Sesión con ese id de conexión, o None si ya terminó
+        """
+        slot = session_id & (MAX_SESSIONS - 1)
+        if slot >= len(self.slots):
+            return None
+        session = self.slots[slot]
+        return session if session is not None and session.id == session_id else None
+
+    def by_address(self, addr):
+        return self.by_addr.get(addr)
+
+    def by_name(self, name):
+        """
+        Sesiones que transfieren el archivo name
+        """
+        return [s for s in self.slots if s is not None and s.name == name]
+
+    def open(self, addr, setup, conexion_type=None, name=None, transfer=None, delta=False):
+        """
+        Crea una sesión para addr (la que hubiera desde esa dirección queda fuera del índice)
+
+        Returns:
+            Session | None: la sesión nueva, o None si la tabla está llena
+        """
+        if self.free:
+            slot = self.free.pop()
+        elif len(self.slots) < self.max_sessions:
+            slot = len(self.slots)
+            self.slots.append(None)
+            self.generations.append(0)
+        else:
+            return None
+        self.generations[slot] = (self.generations[slot] + 1) & ((1 << (32 - SESSION_SLOT_BITS)) - 1)
+        session = Session((self.generations[slot] << SESSION_SLOT_BITS) | slot, addr, setup, conexion_type, name,
+                          transfer, delta)
+        self.slots[slot] = session
+        self.by_addr[addr] = session
+        self.active += 1
+        return session
+
+    def remove(self, session, reaped=True):
+        """
+        Saca la sesión de la tabla y libera su slot y su cola
+
+        Args:
+            session: La sesión (si ya no está en la tabla no hace nada)
+            reaped: Si cuenta como sesión cerrada (no lo es un SETUP rechazado)
+        """
+        slot = session.id & (MAX_SESSIONS - 1)
+        if self.slots[slot] is not session:
+            return
+        self.slots[slot] = None
+        self.free.append(slot)
+        self.active -= 1
+        if self.by_addr.get(session.addr) is session:
+            del self.by_addr[session.addr]
+        session.channel.close()
+        if reaped:
+            self.reaped += 1
+
+    def close(self, session, expired=False):
+        """
+        Termina la sesión: cancela su corrutina, que al terminar la saca de la tabla
+
+        Args:
+            session: La sesión
+            expired: Si se cierra por inactividad
+        """
+        if expired:
+            self.expired += 1
+        if session.task is not None and not session.task.done():
+            session.task.cancel()
+        else:
+            self.remove(session)
+
+    def idle(self, now=None, timeout=SESSION_IDLE_TIMEOUT):
+        """
+        Sesiones que no recibieron paquetes en los últimos timeout segundos
+        """
+        if now is None:
+            now = time.monotonic()
+        return [s for s in self.slots if s is not None and now - s.last_seen > timeout]
+
+    def counts(self):
+        return {"active": len(self), "reaped": self.reaped, "expired": self.expired}
+
+    def __str__(self):
+        return f"sesiones activas={len(self)}, cerradas={self.reaped} (por inactividad={self.expired})"